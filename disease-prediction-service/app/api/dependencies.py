@@ -0,0 +1,33 @@
+"""
+Shared route dependencies
+"""
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+# Endpoints answered from state held in a single API worker
+PER_WORKER_ENDPOINTS = (
+    "GET|POST|DELETE /api/v1/train/shadow",
+    "POST /api/v1/train/shadow/promote",
+    "GET /predict/drift",
+    "POST /predict/drift/reset",
+)
+
+
+def single_worker_only():
+    """
+    Reject the request when several API workers are running
+
+    The shadow model and drift counts live in the worker that created
+    them. With WORKERS > 1 consecutive requests reach different workers,
+    so a shadow or drift change would apply to one worker only.
+
+    Raises:
+        HTTPException: 501 when WORKERS > 1
+    """
+    if settings.WORKERS > 1:
+        raise HTTPException(
+            status_code=501,
+            detail=f"Not available with WORKERS={settings.WORKERS}: this endpoint's state is kept per API "
+                   f"worker. Run with WORKERS=1 to use it."
+        )
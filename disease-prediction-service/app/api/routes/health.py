@@ -1,13 +1,23 @@
 """
-Health check endpoint
+Health check endpoints
 """
-from fastapi import APIRouter
-from app.schemas.prediction import HealthResponse
+from fastapi import APIRouter, Response
+import asyncio
+
+from app.schemas.prediction import HealthResponse, ReadinessResponse
 from app.ml.model import predictor
+from app.ml.memory import memory_report
 from app.core.config import settings
+from app.core.startup import startup
 
 router = APIRouter()
 
+
+def is_ready() -> bool:
+    """Startup has finished and, unless loading is lazy, a model is being served"""
+    return startup.ready and (predictor.is_trained or not settings.MODEL_PRELOAD)
+
+
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
@@ -15,5 +25,58 @@ async def health_check():
         status="healthy",
         service=settings.SERVICE_NAME,
         version=settings.MODEL_VERSION,
-        model_loaded=predictor.is_trained
+        model_loaded=predictor.is_trained,
+        ready=is_ready()
     )
+
+
+@router.get("/health/live")
+async def liveness():
+    """
+    Liveness probe
+    
+    Answers as soon as the process serves HTTP, including while the model
+    is still loading. A failure means the process should be restarted.
+    """
+    return {"status": "alive"}
+
+
+@router.get("/health/ready", response_model=ReadinessResponse)
+async def readiness(response: Response):
+    """
+    Readiness probe
+    
+    503 until the model is loaded and warmed, then 200. Includes the
+    startup time breakdown, so slow replicas can be diagnosed from the
+    probe itself.
+    """
+    ready = is_ready()
+    if not ready:
+        response.status_code = 503
+    bundle = predictor.bundle
+    return ReadinessResponse(
+        ready=ready,
+        model_loaded=bundle is not None,
+        model_version=bundle.version if bundle is not None else None,
+        **startup.report()
+    )
+
+
+@router.get("/health/memory")
+async def memory_usage():
+    """
+    Per-worker memory report
+    
+    Lists RSS, PSS, shared and private memory of every API worker on this
+    host, plus how much of each is the memory-mapped model. The answering
+    worker is identified by pid.
+    """
+    bundle = predictor.bundle
+    return {
+        "success": True,
+        "workers_configured": settings.WORKERS,
+        "model_version": bundle.version if bundle is not None else None,
+        "inference_backend": bundle.backend if bundle is not None else settings.INFERENCE_BACKEND,
+        "artifact_mmap": settings.ARTIFACT_MMAP,
+        **await asyncio.to_thread(memory_report)
+    }
@@ -0,0 +1,20 @@
+"""
+Prometheus metrics endpoint
+"""
+from fastapi import APIRouter, Response
+
+from app.core.metrics import CONTENT_TYPE, REGISTRY
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Service metrics in the Prometheus text exposition format
+    
+    Request counts and latencies per route, prediction stage timings,
+    symptom match counts, inference queue and cache counters, model load
+    durations and the model version being served
+    """
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -1,20 +1,58 @@
 """
 Prediction API routes
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from typing import List
+import asyncio
 import logging
 
 from app.schemas.prediction import (
     SymptomInput,
     PredictionResponse,
-    SymptomsListResponse
+    BatchSymptomInput,
+    BatchPredictionItem,
+    BatchPredictionResponse,
+    SymptomsListResponse,
+    SymptomSearchResponse,
+    RelatedSymptomsResponse,
+    DiseaseProfileResponse
 )
-from app.ml.model import predictor
+from app.api.dependencies import single_worker_only
+from app.ml.model import (
+    predictor,
+    predict_symptoms,
+    predict_symptom_sets,
+    search_symptom_names,
+    related_symptom_suggestions
+)
+from app.ml.executor import inference_executor, QueueFullError
+from app.ml.batching import micro_batcher
+from app.ml.shadow import shadow_evaluator
+from app.ml.drift import drift_monitor
+from app.core.config import settings
+from app.core.responses import VersionedResponse
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+MODEL_NOT_TRAINED = "Model not trained yet. Please train the model first using /api/v1/train/ endpoint"
+
+
+async def ensure_model_loaded(detail: str = MODEL_NOT_TRAINED):
+    """Load the model off the event loop if needed, or fail with 503"""
+    if not predictor.is_trained:
+        if not await asyncio.to_thread(predictor.ensure_loaded):
+            raise HTTPException(status_code=503, detail=detail)
+
+
+def queue_full_response(error: QueueFullError) -> HTTPException:
+    """503 telling clients when to retry after the queue was saturated"""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
 
 @router.post("/", response_model=PredictionResponse)
 async def predict_disease(request: SymptomInput):
@@ -26,17 +64,15 @@ async def predict_disease(request: SymptomInput):
     Returns the predicted disease with confidence score and alternatives
     """
     try:
-        # Check if model is loaded
-        if not predictor.is_trained:
-            # Try to load model
-            if not predictor.load_model():
-                raise HTTPException(
-                    status_code=503,
-                    detail="Model not trained yet. Please train the model first using /api/v1/train/ endpoint"
-                )
+        await ensure_model_loaded()
         
         # Make prediction
-        result = predictor.predict(request.symptoms)
+        if settings.MICRO_BATCHING_ENABLED:
+            result = await micro_batcher.submit(request.symptoms)
+        else:
+            result = await inference_executor.run(predict_symptoms, request.symptoms)
+        shadow_evaluator.observe(request.symptoms)
+        drift_monitor.observe(result)
         
         return PredictionResponse(
             success=True,
@@ -44,60 +80,228 @@ async def predict_disease(request: SymptomInput):
             prediction=result
         )
         
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise queue_full_response(e)
     except ValueError as e:
+        drift_monitor.observe_rejected(request.symptoms)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Prediction error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
 
-@router.get("/symptoms", response_model=SymptomsListResponse)
-async def get_symptoms():
+@router.post("/batch", response_model=BatchPredictionResponse)
+async def predict_disease_batch(request: BatchSymptomInput):
     """
-    Get list of all available symptoms
+    Predict diseases for many symptom lists in one request
     
-    Returns complete list of symptoms that can be used for prediction
+    - **symptom_sets**: List of symptom lists (e.g., [["fever", "cough"], ["headache"]])
+    
+    All lists are evaluated with a single model call. Lists that cannot be
+    predicted are reported individually instead of failing the whole batch.
     """
     try:
-        # Check if model is loaded
-        if not predictor.is_trained:
-            # Try to load model
-            if not predictor.load_model():
-                raise HTTPException(
-                    status_code=503,
-                    detail="Model not trained yet. Please train the model first."
-                )
+        if len(request.symptom_sets) > settings.MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch too large. Maximum is {settings.MAX_BATCH_SIZE} symptom lists per request"
+            )
         
-        symptoms = predictor.get_all_symptoms()
+        await ensure_model_loaded()
         
-        return SymptomsListResponse(
+        results = await inference_executor.run(predict_symptom_sets, request.symptom_sets)
+        for symptoms, result in zip(request.symptom_sets, results):
+            if 'error' in result:
+                drift_monitor.observe_rejected(symptoms)
+            else:
+                drift_monitor.observe(result)
+        
+        items = [
+            BatchPredictionItem(index=index, success=False, error=result['error'])
+            if 'error' in result
+            else BatchPredictionItem(index=index, success=True, prediction=result)
+            for index, result in enumerate(results)
+        ]
+        succeeded = sum(1 for item in items if item.success)
+        
+        return BatchPredictionResponse(
             success=True,
-            symptoms=symptoms,
-            total=len(symptoms)
+            message="Batch prediction completed",
+            total=len(items),
+            succeeded=succeeded,
+            failed=len(items) - succeeded,
+            predictions=items
         )
         
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise queue_full_response(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Batch prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+
+_symptoms_response = VersionedResponse(lambda bundle: SymptomsListResponse(
+    success=True,
+    symptoms=bundle.symptoms,
+    total=len(bundle.symptoms)
+))
+
+
+@router.get("/symptoms", response_model=SymptomsListResponse)
+async def get_symptoms(request: Request):
+    """
+    Get list of all available symptoms
+    
+    Returns complete list of symptoms that can be used for prediction.
+    The body is serialized once per model version and carries an ETag;
+    requests with a matching If-None-Match get 304.
+    """
+    try:
+        await ensure_model_loaded("Model not trained yet. Please train the model first.")
+        
+        return _symptoms_response.respond(request, predictor.bundle)
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting symptoms: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get symptoms: {str(e)}")
 
 
+@router.get("/symptoms/search", response_model=SymptomSearchResponse)
+async def search_symptoms(
+    q: str = Query(..., min_length=1, description="Partial or misspelled symptom"),
+    limit: int = Query(10, ge=1, le=50, description="Most symptoms to return")
+):
+    """
+    Autocomplete symptom names
+    
+    - **q**: Text typed so far (e.g., "short", "head ache", "feaver")
+    - **limit**: Most symptoms to return
+    
+    Symptoms starting with the query come first, followed by synonym and
+    fuzzy matches from the trigram index, each with a confidence score
+    """
+    try:
+        await ensure_model_loaded("Model not trained yet. Please train the model first.")
+        
+        matches = await inference_executor.run(search_symptom_names, q, limit)
+        
+        return SymptomSearchResponse(success=True, query=q, matches=matches)
+        
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise queue_full_response(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Symptom search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Symptom search failed: {str(e)}")
+
+
+@router.get("/symptoms/related", response_model=RelatedSymptomsResponse)
+async def get_related_symptoms(
+    symptoms: List[str] = Query(..., description="Known symptoms, comma separated or repeated"),
+    limit: int = Query(5, ge=1, le=50, description="Number of suggestions")
+):
+    """
+    Suggest the most informative symptoms to ask about next
+    
+    - **symptoms**: Symptoms reported so far (e.g., ?symptoms=fever,cough)
+    - **limit**: Number of suggestions
+    
+    Suggestions are ranked by expected information gain about the disease,
+    computed from the co-occurrence index stored with the model
+    """
+    try:
+        await ensure_model_loaded()
+        
+        input_symptoms = [symptom for value in symptoms for symptom in value.split(",") if symptom.strip()]
+        result = await inference_executor.run(related_symptom_suggestions, input_symptoms, limit)
+        
+        return RelatedSymptomsResponse(success=True, **result)
+        
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise queue_full_response(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Related symptoms error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to suggest symptoms: {str(e)}")
+
+
+@router.get("/diseases/{name}/profile", response_model=DiseaseProfileResponse)
+async def get_disease_profile(
+    name: str,
+    top_k: int = Query(None, ge=1, description="Characteristic symptoms to return (default: all stored)")
+):
+    """
+    Get the symptom profile of a disease
+    
+    - **name**: Disease name, case-insensitive
+    - **top_k**: Number of characteristic symptoms
+    
+    Returns the disease's share of the training data and its most prevalent
+    symptoms, with their lift over the overall prevalence and the forest's
+    feature importance
+    """
+    try:
+        await ensure_model_loaded()
+        
+        profile = predictor.disease_profile(name, top_k)
+        
+        return DiseaseProfileResponse(success=True, **profile)
+        
+    except HTTPException:
+        raise
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Disease not found: {name}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Disease profile error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get disease profile: {str(e)}")
+
+
+# The body reports the registry's active version, which another process can
+# change without this one swapping bundles, so the pointer is part of the key.
+# predictor.active_version is the copy the sync task keeps in memory; reading
+# the ACTIVE file here would block the event loop on every request.
+_info_response = VersionedResponse(lambda bundle: {
+    "success": True,
+    "model_info": predictor.get_model_info(bundle)
+}, key=lambda bundle: predictor.active_version)
+
+
 @router.get("/info")
-async def get_model_info():
+async def get_model_info(request: Request):
     """
     Get information about the loaded model
     
-    Returns model statistics and configuration
+    Returns model statistics and configuration, cached per model version
+    with an ETag like /symptoms
     """
     try:
         # Try to load model if not loaded
         if not predictor.is_trained:
-            predictor.load_model()
+            await asyncio.to_thread(predictor.ensure_loaded)
         
-        info = predictor.get_model_info()
-        return {
-            "success": True,
-            "model_info": info
-        }
+        bundle = predictor.bundle
+        if bundle is None:
+            return {
+                "success": True,
+                "model_info": predictor.get_model_info()
+            }
+        return _info_response.respond(request, bundle)
         
     except Exception as e:
         logger.error(f"Error getting model info: {str(e)}")
@@ -105,3 +309,52 @@ async def get_model_info():
             "success": False,
             "message": str(e)
         }
+
+
+@router.get("/stats")
+async def get_prediction_stats():
+    """
+    Get prediction execution statistics
+    
+    Returns worker pool queue depth, rejection counts, queue wait times,
+    prediction cache counters, distilled student answer/fallback counts
+    and, when micro-batching is enabled, batch size statistics
+    """
+    cache = predictor.cache.stats()
+    if inference_executor.mode == "process":
+        # Counters are merged from the workers, but the entries live there
+        cache['size'] = None
+    return {
+        "success": True,
+        "executor": inference_executor.stats(),
+        "cache": cache,
+        "student": predictor.student_stats(),
+        "micro_batching": micro_batcher.stats() if settings.MICRO_BATCHING_ENABLED else None
+    }
+
+
+@router.get("/drift", dependencies=[Depends(single_worker_only)])
+async def get_drift_report():
+    """
+    Compare live inputs and predictions with the training profile
+    
+    Returns the Jensen-Shannon divergence of symptom frequencies, symptoms
+    per row and predicted diseases from the served model's training data,
+    whether any exceeds DRIFT_ALERT_THRESHOLD, the symptoms whose rate
+    moved most and the most frequent unmatched symptom strings. Counts
+    start over when a different model version is served.
+    """
+    return {
+        "success": True,
+        **await asyncio.to_thread(drift_monitor.report)
+    }
+
+
+@router.post("/drift/reset", dependencies=[Depends(single_worker_only)])
+async def reset_drift_monitor():
+    """Discard the drift monitor's counts and start a new observation window"""
+    drift_monitor.reset()
+    return {
+        "success": True,
+        "message": "Drift monitor reset"
+    }
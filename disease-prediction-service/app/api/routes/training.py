@@ -1,34 +1,105 @@
 """
 Training API routes
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pathlib import Path
+from typing import List, Optional
+import asyncio
+import csv
 import logging
 
-from app.schemas.prediction import TrainingResponse, ModelStatusResponse
+from app.schemas.prediction import (
+    IncrementalTrainingRequest,
+    ModelStatusResponse,
+    TrainingJobResponse,
+    TrainingJobStatus
+)
+from app.api.dependencies import single_worker_only
 from app.ml.model import predictor
+from app.ml.jobs import training_jobs
+from app.ml.registry import VersionPrunedError
+from app.ml.executor import inference_executor
+from app.ml.shadow import shadow_evaluator
 from app.core.config import settings
+from app.core.responses import VersionedResponse
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/", response_model=TrainingResponse)
+def _load_trained_model(job: dict):
+    """Swap in the model produced by a finished training job, or shadow it"""
+    if not job.get('activate', True):
+        if settings.WORKERS > 1:
+            logger.warning(f"Training job {job['job_id']} published model version {job['model_version']} "
+                           f"without activating it; shadowing needs WORKERS=1, activate it with "
+                           f"POST /api/v1/train/rollback?version={job['model_version']}")
+            return
+        try:
+            shadow_evaluator.load(job['model_version'])
+            logger.info(f"Shadowing model from training job {job['job_id']}")
+        except Exception as e:
+            logger.error(f"Could not shadow model from training job {job['job_id']}: {str(e)}")
+        return
+    if predictor.load_model():
+        inference_executor.reset()
+        logger.info(f"Loaded model from training job {job['job_id']}")
+    else:
+        logger.error(f"Could not load model from training job {job['job_id']}")
+
+
+training_jobs.on_complete(_load_trained_model)
+
+
+def _resolve_dataset_path(dataset_path: str) -> Path:
+    """
+    Resolve a client-supplied dataset path, which must name a CSV file
+    under RAW_DATA_PATH or PROCESSED_DATA_PATH
+
+    Raises:
+        HTTPException: 400 for any other path, 404 if the CSV does not exist
+    """
+    path = Path(dataset_path).resolve()
+    allowed = [Path(settings.RAW_DATA_PATH).resolve(), Path(settings.PROCESSED_DATA_PATH).resolve()]
+    if path.suffix.lower() != ".csv" or not any(path.is_relative_to(root) for root in allowed):
+        raise HTTPException(
+            status_code=400,
+            detail=f"dataset_path must be a CSV file under {settings.RAW_DATA_PATH} or {settings.PROCESSED_DATA_PATH}"
+        )
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail=f"Dataset not found at {dataset_path}")
+    return path
+
+
+def _check_dataset_columns(path: Path, symptoms: List[str]):
+    """Reject a CSV whose symptom columns differ from the model's before a job is queued"""
+    with open(path, newline="") as f:
+        header = next(csv.reader(f), [])
+    columns = set(header[1:])
+    missing = [symptom for symptom in symptoms if symptom not in columns]
+    extra = sorted(columns - set(symptoms))
+    if missing or extra:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Dataset symptoms do not match the model: {len(missing)} missing, {len(extra)} unexpected"
+        )
+
+
+@router.post("/", response_model=TrainingJobResponse, status_code=202)
 async def train_model():
     """
-    Train the disease prediction model
+    Start training the disease prediction model in the background
     
     This endpoint will:
-    1. Load the dataset from app/data/processed/
-    2. Train a Random Forest classifier
-    3. Save the trained model to disk
-    4. Return training metrics
+    1. Queue a training job in a separate worker process
+    2. Return the job id immediately
     
-    Note: This may take several minutes depending on dataset size
+    The worker loads the dataset from app/data/processed/, trains a Random
+    Forest classifier and saves it to disk. Predictions keep being served
+    from the currently loaded model until the job completes, after which
+    the new model is loaded. Poll /api/v1/train/jobs/{job_id} for progress.
     """
     try:
-        logger.info("Starting model training...")
-        
         # Check if dataset exists
         if not Path(settings.DATA_FILE).exists():
             raise HTTPException(
@@ -36,64 +107,120 @@ async def train_model():
                 detail=f"Dataset not found at {settings.DATA_FILE}"
             )
         
-        # Train model
-        metrics = predictor.train()
+        job = training_jobs.submit(activate=not settings.SHADOW_NEW_MODELS)
+        logger.info(f"Model training job {job['job_id']} submitted")
         
-        # Save model
-        saved_paths = predictor.save_model()
-        
-        logger.info("Model training completed successfully")
-        
-        return TrainingResponse(
+        return TrainingJobResponse(
             success=True,
-            message="Model trained and saved successfully",
-            metrics={
-                'train_accuracy': float(metrics['train_accuracy']),
-                'test_accuracy': float(metrics['test_accuracy']),
-                'precision': float(metrics['precision']),
-                'recall': float(metrics['recall']),
-                'f1_score': float(metrics['f1_score']),
-                'n_diseases': metrics['n_diseases'],
-                'n_symptoms': metrics['n_symptoms'],
-                'n_samples': metrics['n_samples']
-            },
-            model_path=saved_paths['model_path']
+            message="Training job queued",
+            job=TrainingJobStatus(**job)
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Training error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Training failed: {str(e)}")
 
 
+@router.post("/increment", response_model=TrainingJobResponse, status_code=202)
+async def increment_model(request: IncrementalTrainingRequest):
+    """
+    Grow the active model with trees fitted on new rows
+    
+    - **dataset_path**: CSV with new labeled rows, same columns as the training dataset,
+      under RAW_DATA_PATH or PROCESSED_DATA_PATH
+    - **n_estimators**: Trees to add (default INCREMENT_N_ESTIMATORS)
+    - **retire_oldest**: Oldest trees to drop afterwards, keeping the forest size bounded
+    - **replay_rows**: Original rows fitted alongside the new ones (default INCREMENT_REPLAY_ROWS)
+    
+    Runs as a background job like a full training run and publishes a new
+    model version, which is loaded when the job completes.
+    """
+    try:
+        dataset_path = _resolve_dataset_path(request.dataset_path)
+        if not await asyncio.to_thread(predictor.ensure_loaded):
+            raise HTTPException(
+                status_code=409,
+                detail="No trained model to update. Please train the model first using /api/v1/train/ endpoint"
+            )
+        await asyncio.to_thread(_check_dataset_columns, dataset_path, predictor.bundle.symptoms)
+        
+        job = training_jobs.submit(str(dataset_path), increment={
+            'n_estimators': request.n_estimators,
+            'retire_oldest': request.retire_oldest,
+            'replay_rows': request.replay_rows,
+        }, activate=not settings.SHADOW_NEW_MODELS)
+        logger.info(f"Incremental training job {job['job_id']} submitted")
+        
+        return TrainingJobResponse(
+            success=True,
+            message="Incremental training job queued",
+            job=TrainingJobStatus(**job)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Incremental training error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Incremental training failed: {str(e)}")
+
+
+@router.get("/jobs", response_model=List[TrainingJobStatus])
+async def list_training_jobs():
+    """
+    List recent training jobs, newest first
+    """
+    return [TrainingJobStatus(**job) for job in await asyncio.to_thread(training_jobs.list)]
+
+
+@router.get("/jobs/{job_id}", response_model=TrainingJobStatus)
+async def get_training_job(job_id: str):
+    """
+    Get the status of a training job
+    
+    Reports the current phase, elapsed time and, once finished, the
+    training metrics or the error that stopped the job. Job state is
+    shared through the registry, so any API worker can answer.
+    """
+    job = await asyncio.to_thread(training_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Training job not found: {job_id}")
+    return TrainingJobStatus(**job)
+
+
+_status_response = VersionedResponse(lambda bundle: ModelStatusResponse(
+    model_loaded=True,
+    message="Model is loaded and ready",
+    model_path=str(predictor.registry.path(bundle.version)),
+    model_version=bundle.version,
+    n_diseases=len(bundle.encoder.classes_),
+    n_symptoms=len(bundle.symptoms),
+    model_type="Random Forest"
+))
+
+
 @router.get("/status", response_model=ModelStatusResponse)
-async def get_training_status():
+async def get_training_status(request: Request):
     """
     Get current model status
     
-    Returns information about whether a model is loaded and its details
+    Returns information about whether a model is loaded and its details.
+    While a model is loaded the body is cached per model version with an
+    ETag; requests with a matching If-None-Match get 304.
     """
     try:
         # Try to load model if not loaded
         if not predictor.is_trained:
-            loaded = predictor.load_model()
+            loaded = await asyncio.to_thread(predictor.ensure_loaded)
             if not loaded:
                 return ModelStatusResponse(
                     model_loaded=False,
                     message="No trained model found. Please train the model first.",
-                    model_path=settings.MODEL_PATH
+                    model_path=settings.MODEL_REGISTRY_PATH
                 )
         
-        info = predictor.get_model_info()
-        
-        return ModelStatusResponse(
-            model_loaded=True,
-            message="Model is loaded and ready",
-            model_path=settings.MODEL_PATH,
-            model_version=settings.MODEL_VERSION,
-            n_diseases=info.get('n_diseases', 0),
-            n_symptoms=info.get('n_symptoms', 0),
-            model_type="Random Forest"
-        )
+        return _status_response.respond(request, predictor.bundle)
         
     except Exception as e:
         logger.error(f"Error checking status: {str(e)}")
@@ -103,12 +230,13 @@ async def get_training_status():
 @router.post("/reload")
 async def reload_model():
     """
-    Reload the model from disk
+    Reload the active model version from disk
     
-    Useful after training or updating the model files
+    Useful after training or updating the model files. The new model is
+    swapped in atomically; in-flight predictions finish on the old one.
     """
     try:
-        success = predictor.load_model()
+        success = await asyncio.to_thread(predictor.load_model)
         
         if not success:
             raise HTTPException(
@@ -116,6 +244,7 @@ async def reload_model():
                 detail="Failed to load model. Please ensure model files exist."
             )
         
+        inference_executor.reset()
         info = predictor.get_model_info()
         
         return {
@@ -124,6 +253,157 @@ async def reload_model():
             "model_info": info
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error reloading model: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to reload model: {str(e)}")
+
+
+@router.get("/versions")
+async def list_model_versions():
+    """
+    List registered model versions, newest first
+    
+    Each entry carries the version's metadata and whether it is active
+    """
+    try:
+        versions = await asyncio.to_thread(predictor.registry.list_versions)
+        return {
+            "success": True,
+            "active_version": predictor.registry.active_version(),
+            "serving_version": predictor.bundle.version if predictor.is_trained else None,
+            "versions": versions
+        }
+        
+    except Exception as e:
+        logger.error(f"Error listing model versions: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to list model versions: {str(e)}")
+
+
+@router.post("/rollback")
+async def rollback_model(version: Optional[str] = None):
+    """
+    Roll back to an earlier model version
+    
+    - **version**: Version to restore (defaults to the previously active version)
+    
+    Answers 410 when the target was published but has since been pruned.
+    """
+    try:
+        restored = await asyncio.to_thread(predictor.rollback, version)
+        inference_executor.reset()
+        
+        return {
+            "success": True,
+            "message": f"Rolled back to model version {restored}",
+            "model_info": predictor.get_model_info()
+        }
+        
+    except VersionPrunedError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error rolling back model: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to roll back model: {str(e)}")
+
+
+@router.get("/shadow", dependencies=[Depends(single_worker_only)])
+async def get_shadow_report():
+    """
+    Compare the shadow model with the served one
+    
+    Returns top-1 agreement, confidence deltas and latency percentiles of
+    both models on the sampled /predict/ calls, plus whether the shadow
+    meets the SHADOW_* promotion thresholds and why not if it does not
+    """
+    return {
+        "success": True,
+        **await asyncio.to_thread(shadow_evaluator.report)
+    }
+
+
+@router.post("/shadow", dependencies=[Depends(single_worker_only)])
+async def load_shadow_model(version: Optional[str] = None):
+    """
+    Load a model version as the shadow model
+    
+    - **version**: Version to shadow (defaults to the newest version not being served)
+    
+    A SHADOW_SAMPLE_RATE fraction of /predict/ calls is replayed against it
+    in the background; responses keep coming from the served model.
+    """
+    try:
+        if predictor.is_trained and version == predictor.bundle.version:
+            raise HTTPException(status_code=409, detail=f"Model version {version} is already being served")
+        
+        loaded = await asyncio.to_thread(shadow_evaluator.load, version)
+        
+        return {
+            "success": True,
+            "message": f"Shadowing model version {loaded}",
+            "shadow_version": loaded
+        }
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error loading shadow model: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to load shadow model: {str(e)}")
+
+
+@router.delete("/shadow", dependencies=[Depends(single_worker_only)])
+async def unload_shadow_model():
+    """Stop shadowing and release the shadow model"""
+    version = shadow_evaluator.unload()
+    if version is None:
+        raise HTTPException(status_code=404, detail="No shadow model loaded")
+    
+    return {
+        "success": True,
+        "message": f"Stopped shadowing model version {version}"
+    }
+
+
+@router.post("/shadow/promote", dependencies=[Depends(single_worker_only)])
+async def promote_shadow_model(force: bool = False):
+    """
+    Activate and serve the shadow model
+    
+    - **force**: Promote even if the shadow does not meet the promotion thresholds
+    
+    Answers 409 with the failed checks when the shadow is not safe to
+    promote and force is not set.
+    """
+    try:
+        report = await asyncio.to_thread(shadow_evaluator.report)
+        version = report['shadow_version']
+        if version is None:
+            raise HTTPException(status_code=404, detail="No shadow model loaded")
+        if not report['safe_to_promote'] and not force:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Model version {version} is not safe to promote: {'; '.join(report['reasons'])}"
+            )
+        
+        await asyncio.to_thread(predictor.activate, version)
+        inference_executor.reset()
+        shadow_evaluator.unload()
+        
+        return {
+            "success": True,
+            "message": f"Promoted model version {version}",
+            "shadow_report": report,
+            "model_info": predictor.get_model_info()
+        }
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error promoting shadow model: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to promote shadow model: {str(e)}")
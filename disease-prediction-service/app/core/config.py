@@ -14,6 +14,8 @@ class Settings(BaseSettings):
     SERVICE_HOST: str = "0.0.0.0"
     SERVICE_PORT: int = 8002
     DEBUG: bool = True
+    WORKERS: int = 1  # Uvicorn worker processes, each serving the same mmap'd model
+    MODEL_SYNC_INTERVAL: float = 5.0  # Seconds between active-version checks with WORKERS > 1
     
     # API Configuration
     API_V1_STR: str = "/api/v1"
@@ -23,20 +25,84 @@ class Settings(BaseSettings):
     MODEL_PATH: str = "app/data/models/disease_model.pkl"
     ENCODER_PATH: str = "app/data/models/encoder.pkl"
     SYMPTOM_INDEX_PATH: str = "app/data/models/symptom_index.pkl"
+    COMPILED_MODEL_PATH: str = "app/data/models/compiled_forest"
     MODEL_NAME: str = "disease_prediction_model"
     MODEL_VERSION: str = "1.0.0"
+    MODEL_REGISTRY_PATH: str = "app/data/models/registry"
+    MODEL_REGISTRY_KEEP: int = 5  # Versions kept on disk; the active, previous and shadow ones are never pruned
+    ARTIFACT_MMAP: bool = True  # Memory-map model arrays instead of reading them
+    ARTIFACT_VERIFY_CHECKSUM: bool = True  # Check SHA-256 of artifacts on load
     
     # Data Paths
     RAW_DATA_PATH: str = "app/data/raw"
     PROCESSED_DATA_PATH: str = "app/data/processed"
     MODELS_PATH: str = "app/data/models"
     DATA_FILE: str = "app/data/processed/Final_Augmented_dataset_Diseases_and_Symptoms.csv"
+    DATASET_CACHE_ENABLED: bool = True  # Reuse a uint8 .npy copy of the CSV while it is unchanged
+    DATASET_CACHE_PATH: str = "app/data/processed/cache"
     
     # ML Configuration
     TEST_SIZE: float = 0.2
     RANDOM_STATE: int = 42
     N_ESTIMATORS: int = 100
-    N_ROWS: int = 50000  # Number of rows to use for training
+    MAX_DEPTH: Optional[int] = None  # Unbounded when unset
+    MIN_SAMPLES_LEAF: int = 1
+    MAX_FEATURES: str = "sqrt"  # "sqrt", "log2", "none", an int count or a float fraction
+    N_ROWS: int = 50000  # Number of rows to use for in_memory training
+    FAST_EVALUATION: bool = True  # OOB score instead of re-predicting the training set
+    TRAINING_MODE: str = "in_memory"  # "in_memory" or "out_of_core" (all rows, sharded)
+    TRAINING_MEMORY_BUDGET_MB: float = 1024  # Largest shard out_of_core training materializes
+    PROFILE_TOP_K: int = 10  # Characteristic symptoms stored per disease profile
+    DISTILL_STUDENT: bool = True  # Train a linear student alongside every forest
+    DISTILL_ROWS: int = 20000  # Training rows the teacher labels for the student
+    DISTILL_EPOCHS: int = 15
+    DISTILL_LEARNING_RATE: float = 0.05
+    INCREMENT_N_ESTIMATORS: int = 10  # Trees added by an incremental update
+    INCREMENT_REPLAY_ROWS: int = 5000  # Original rows replayed so every disease stays in the fit
+    TRAINING_WORKERS: int = 1  # Processes available for background training jobs
+    TRAINING_JOB_HISTORY: int = 20  # Finished jobs kept for status queries
+    
+    # Prediction Configuration
+    TOP_K_PREDICTIONS: int = 3  # Primary disease plus alternatives
+    INFERENCE_N_JOBS: int = 1  # Forest threads per predict_proba call
+    INFERENCE_BACKEND: str = "sklearn"  # "sklearn" or "compiled"
+    INFERENCE_EXECUTOR: str = "thread"  # "thread" or "process" worker pool
+    INFERENCE_WORKERS: int = 4  # Concurrent predictions
+    INFERENCE_QUEUE_SIZE: int = 64  # Waiting predictions before shedding load
+    INFERENCE_RETRY_AFTER: int = 1  # Retry-After seconds on 503 when saturated
+    MICRO_BATCHING_ENABLED: bool = False  # Coalesce concurrent /predict/ calls
+    MICRO_BATCH_MAX_WAIT_MS: float = 5.0  # Longest a request waits for its batch
+    MICRO_BATCH_MAX_SIZE: int = 32  # Flush as soon as this many requests are queued
+    PREDICTION_CACHE_SIZE: int = 4096  # Cached symptom combinations, 0 disables
+    PREDICTION_CACHE_TTL: float = 3600.0  # Seconds before an entry expires, 0 for never
+    STUDENT_ENABLED: bool = True  # Answer with the distilled student when it is confident
+    STUDENT_CONFIDENCE_THRESHOLD: float = 0.5  # Below this top probability the forest answers
+    FUZZY_MATCHING_ENABLED: bool = True  # Resolve misspelled or colloquial symptoms
+    FUZZY_MATCH_THRESHOLD: float = 0.8  # Lowest match confidence accepted for a prediction
+    SYMPTOM_SYNONYMS_FILE: Optional[str] = None  # JSON {"alias": "symptom"} extending the built-in table
+    MAX_BATCH_SIZE: int = 1000  # Maximum symptom lists per batch request
+    METADATA_CACHE_MAX_AGE: int = 60  # Seconds clients may reuse /symptoms, /info and /status before revalidating
+    
+    # Shadow Evaluation Configuration
+    SHADOW_NEW_MODELS: bool = False  # Load newly trained versions as the shadow model instead of serving them
+    SHADOW_SAMPLE_RATE: float = 0.1  # Fraction of /predict/ calls replayed against the shadow model
+    SHADOW_QUEUE_SIZE: int = 32  # Pending shadow comparisons before further samples are dropped
+    SHADOW_MIN_SAMPLES: int = 500  # Comparisons needed before a shadow can be judged safe to promote
+    SHADOW_MIN_AGREEMENT: float = 0.95  # Lowest top-1 agreement with the served model
+    SHADOW_MAX_CONFIDENCE_DROP: float = 0.05  # Largest mean top-1 confidence drop versus the served model
+    SHADOW_MAX_LATENCY_RATIO: float = 1.5  # Largest shadow p95 latency as a multiple of the served model's
+    
+    # Drift Monitoring Configuration
+    DRIFT_MONITOR_ENABLED: bool = True  # Compare live inputs and predictions with the training profile
+    DRIFT_SKETCH_WIDTH: int = 2048  # Count-min sketch counters per row for unmatched symptom strings
+    DRIFT_SKETCH_DEPTH: int = 4  # Count-min sketch rows (independent hashes), at most 8
+    DRIFT_TOP_UNMATCHED: int = 20  # Most frequent unmatched strings kept for the report
+    DRIFT_MIN_ROWS: int = 200  # Predictions observed before drift is reported
+    DRIFT_ALERT_THRESHOLD: float = 0.1  # Jensen-Shannon divergence (bits, 0-1) reported as drift
+    
+    # Startup Configuration
+    MODEL_PRELOAD: bool = True  # Load and warm the model at startup instead of on the first request
+    MODEL_WARMUP_PREDICTIONS: int = 16  # Throwaway predictions run after the startup load
     
     class Config:
         env_file = ".env"
@@ -45,7 +111,9 @@ class Settings(BaseSettings):
 # Create settings instance
 settings = Settings()
 
-# Create directories if they don't exist
-Path(settings.RAW_DATA_PATH).mkdir(parents=True, exist_ok=True)
-Path(settings.PROCESSED_DATA_PATH).mkdir(parents=True, exist_ok=True)
-Path(settings.MODELS_PATH).mkdir(parents=True, exist_ok=True)
+
+def ensure_directories():
+    """Create the data directories if they don't exist (training entry points call this)"""
+    Path(settings.RAW_DATA_PATH).mkdir(parents=True, exist_ok=True)
+    Path(settings.PROCESSED_DATA_PATH).mkdir(parents=True, exist_ok=True)
+    Path(settings.MODELS_PATH).mkdir(parents=True, exist_ok=True)
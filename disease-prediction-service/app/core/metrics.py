@@ -0,0 +1,325 @@
+"""
+Prometheus metrics
+Counters, gauges and histograms kept in process memory and rendered in the
+Prometheus text exposition format by GET /metrics
+"""
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; prediction stages run in tens of microseconds, requests in milliseconds
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+                   0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Seconds; model loads and training jobs
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class _Value:
+    """One counter or gauge series"""
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float):
+        self.value = float(value)
+
+    def take(self) -> float:
+        """Return the value and reset it to zero"""
+        with self._lock:
+            value, self.value = self.value, 0.0
+        return value
+
+    def add(self, taken: float):
+        self.inc(taken)
+
+
+class _Buckets:
+    """One histogram series: per-bucket counts plus the sum of observations"""
+    __slots__ = ("_lock", "bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        # Buckets are "less than or equal": the first bound >= value
+        position = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[position] += 1
+            self.sum += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self.counts), self.sum
+
+    def take(self) -> Optional[Tuple[List[int], float]]:
+        """Return the counts and sum and reset them, None if nothing was observed"""
+        with self._lock:
+            if not any(self.counts):
+                return None
+            taken = self.counts, self.sum
+            self.counts, self.sum = [0] * (len(self.bounds) + 1), 0.0
+        return taken
+
+    def add(self, taken: Tuple[List[int], float]):
+        counts, total = taken
+        with self._lock:
+            self.counts = [mine + theirs for mine, theirs in zip(self.counts, counts)]
+            self.sum += total
+
+
+class MetricsRegistry:
+    """All metrics of the process, in registration order"""
+
+    def __init__(self):
+        self._metrics: Dict[str, "_Metric"] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric"):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def drain(self) -> Dict[str, List[Tuple[Tuple[str, ...], object]]]:
+        """
+        Take every counter and histogram observation recorded since the last drain
+
+        Inference worker processes ship this back with each result and the
+        API process merge()s it, so /metrics covers work done in the
+        workers. Gauges and function-backed metrics describe the current
+        state of one process and are left out.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        drained = {}
+        for metric in metrics:
+            if metric.function is not None or not isinstance(metric, (Counter, Histogram)):
+                continue
+            taken = [(labels, series.take()) for labels, series in metric._items()]
+            taken = [(labels, value) for labels, value in taken if value]
+            if taken:
+                drained[metric.name] = taken
+        return drained
+
+    def merge(self, drained: Dict[str, List[Tuple[Tuple[str, ...], object]]]):
+        """Add observations drain()ed in another process"""
+        for name, taken in drained.items():
+            metric = self._metrics.get(name)
+            if metric is None:
+                continue
+            for labels, value in taken:
+                metric.labels(*labels).add(value)
+
+    def render(self) -> str:
+        """Every metric in the text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _Metric:
+    """
+    A named metric with zero or more labels
+
+    labels(*values) returns the series for one combination of label values;
+    callers on hot paths keep that series instead of looking it up per call.
+    Metrics without labels record directly. A metric built with a function
+    is read from it at render time instead: the function returns a value,
+    or {label values tuple: value} for labelled metrics.
+    """
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable] = None, registry: MetricsRegistry = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self._series: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames and function is None:
+            self._series[()] = self._new_series()
+        (registry or REGISTRY).register(self)
+
+    def _new_series(self):
+        return _Value()
+
+    def labels(self, *values):
+        """The series for these label values, created on first use"""
+        values = tuple(str(value) for value in values)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        series = self._series.get(values)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(values, self._new_series())
+        return series
+
+    def _items(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return sorted(self._series.items())
+
+    def _samples(self) -> List[Tuple[str, Tuple[str, ...], Tuple[str, ...], float]]:
+        """(name suffix, label names, label values, value) of every sample"""
+        if self.function is not None:
+            values = self.function()
+            if not isinstance(values, dict):
+                values = {(): values}
+            return [("", self.labelnames, tuple(str(label) for label in labels), float(value))
+                    for labels, value in values.items()]
+        return [("", self.labelnames, labels, series.value) for labels, series in self._items()]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, names, values, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing total"""
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0):
+        self._series[()].inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    kind = "gauge"
+
+    def set(self, value: float):
+        self._series[()].set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._series[()].inc(amount)
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed buckets"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry: MetricsRegistry = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry=registry)
+
+    def _new_series(self):
+        return _Buckets(self.buckets)
+
+    def observe(self, value: float):
+        self._series[()].observe(value)
+
+    def _samples(self):
+        samples = []
+        names = self.labelnames + ("le",)
+        for labels, series in self._items():
+            counts, total = series.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append(("_bucket", names, labels + (_format_value(bound),), cumulative))
+            samples.append(("_sum", self.labelnames, labels, total))
+            samples.append(("_count", self.labelnames, labels, cumulative))
+        return samples
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template, method and status code",
+    ("method", "route", "status")
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template and method",
+    ("method", "route")
+)
+
+
+class MetricsMiddleware:
+    """
+    Count and time every HTTP request
+
+    A plain ASGI middleware rather than BaseHTTPMiddleware, which would
+    add a task and a response copy to each request. Requests are labelled
+    with the matched route template (/predict/diseases/{name}/profile), so
+    the number of series stays bounded; unrouted paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = _route_template(scope)
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(scope["method"], route, status).inc()
+
+
+def _route_template(scope) -> str:
+    """
+    Path template of the matched route, router prefix included
+
+    The template comes from the route itself, never from parameter values
+    in the request. Depending on the FastAPI version, route.path does or
+    does not already include the prefix its router was included with; the
+    prefix is whatever precedes the route's own segments, which matching
+    guarantees is the literal prefix. No route takes a {param:path}, so
+    each matches a fixed number of segments.
+    """
+    template = getattr(scope.get("route"), "path", None)
+    if not template:
+        return "unmatched"
+    segments = scope["path"].split("/")
+    prefix = "/".join(segments[:len(segments) - template.count("/")])
+    return prefix + template
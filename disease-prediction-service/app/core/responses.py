@@ -0,0 +1,92 @@
+"""
+Versioned responses
+Metadata responses serialized once per model version and served with
+strong ETags, so repeat requests skip the payload rebuild and revalidations
+answer 304 without a body
+"""
+import hashlib
+import threading
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches an ETag
+
+    If-None-Match uses weak comparison, so a W/ prefix on either side is
+    ignored. The header may list several tags or be "*".
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class VersionedResponse:
+    """
+    A JSON response body built once per model version
+
+    build(bundle) returns a pydantic model or a dict for the bundle being
+    served. The serialized bytes and ETag are kept until a different
+    bundle is served, or until key(bundle) changes when the body depends
+    on more than the bundle; the ETag combines the model version with a
+    hash of the body, so every worker serving the same content hands out
+    the same tag.
+    """
+
+    def __init__(self, build: Callable[[Any], Any], max_age: int = None,
+                 key: Optional[Callable[[Any], Hashable]] = None):
+        self._build = build
+        self._key = key
+        self.max_age = settings.METADATA_CACHE_MAX_AGE if max_age is None else max_age
+        self._lock = threading.Lock()
+        # (cache key, body, ETag), replaced as one tuple so readers need no lock
+        self._entry: Optional[Tuple[Hashable, bytes, str]] = None
+
+    def _serialize(self, bundle) -> Tuple[bytes, str]:
+        payload = self._build(bundle)
+        if isinstance(payload, BaseModel):
+            body = payload.model_dump_json().encode()
+        else:
+            body = JSONResponse(jsonable_encoder(payload)).body
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        return body, f'"{bundle.version}-{digest}"'
+
+    def get(self, bundle) -> Tuple[bytes, str]:
+        """Serialized body and ETag for this bundle, built on first use"""
+        key = (bundle.token, self._key(bundle)) if self._key is not None else bundle.token
+        entry = self._entry
+        if entry is None or entry[0] != key:
+            with self._lock:
+                entry = self._entry
+                if entry is None or entry[0] != key:
+                    entry = (key, *self._serialize(bundle))
+                    self._entry = entry
+        return entry[1], entry[2]
+
+    def respond(self, request: Request, bundle) -> Response:
+        """200 with the cached body, or 304 when the client's copy is current"""
+        body, etag = self.get(bundle)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={self.max_age}, must-revalidate",
+        }
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
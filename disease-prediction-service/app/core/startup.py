@@ -0,0 +1,64 @@
+"""
+Startup tracking
+Seconds spent per startup phase and whether this process can take traffic
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class StartupState:
+    """
+    Startup phases of the serving process
+
+    Phases are recorded as they finish; the process is ready once
+    mark_ready() is called. Read by the readiness probe, so updates
+    happen under a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._created = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self.ready = False
+        self.error: Optional[str] = None
+        self.ready_after: Optional[float] = None
+
+    def record(self, phase: str, seconds: float):
+        with self._lock:
+            self.timings[phase] = round(self.timings.get(phase, 0.0) + seconds, 4)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Record the seconds spent inside the block as a phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def mark_ready(self, error: Optional[str] = None):
+        """Startup finished; error explains a degraded start (e.g. no model)"""
+        with self._lock:
+            self.ready = True
+            self.error = error
+            self.ready_after = round(time.perf_counter() - self._created, 4)
+
+    def summary(self) -> str:
+        with self._lock:
+            return ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in self.timings.items())
+
+    def report(self) -> Dict:
+        """Phase timings and readiness, for the readiness probe"""
+        with self._lock:
+            return {
+                'startup_complete': self.ready,
+                'startup_seconds': self.ready_after,
+                'phases': dict(self.timings),
+                'error': self.error,
+            }
+
+
+# Created by main before the app's other imports, so 'imports' covers them
+startup = StartupState()
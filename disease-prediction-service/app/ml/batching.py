@@ -0,0 +1,100 @@
+"""
+Request micro-batching
+Coalesces concurrent single predictions into one batched model call
+"""
+import asyncio
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from app.core.config import settings
+from app.ml.executor import inference_executor
+from app.ml.model import predict_symptom_sets
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Collects concurrent prediction requests into small batches
+
+    A batch is flushed when it reaches max_size items or when the first
+    item has waited max_wait_ms, whichever comes first. The batch is then
+    evaluated with a single predict_proba call on the inference executor
+    and each result is handed back to its waiting request.
+    """
+
+    def __init__(self, max_wait_ms: float = None, max_size: int = None):
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else settings.MICRO_BATCH_MAX_WAIT_MS) / 1000
+        self.max_size = max_size or settings.MICRO_BATCH_MAX_SIZE
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._batches = 0
+        self._items = 0
+        self._largest = 0
+
+    async def submit(self, input_symptoms: List[str]) -> Dict:
+        """
+        Queue one symptom list and wait for its prediction
+
+        Raises:
+            ValueError: If the symptoms cannot be predicted
+            QueueFullError: If the inference executor is saturated
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((input_symptoms, future))
+
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Hand the pending items to a background batch task"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[List[str], asyncio.Future]]):
+        """Evaluate one batch and fan the results out"""
+        self._batches += 1
+        self._items += len(batch)
+        self._largest = max(self._largest, len(batch))
+
+        try:
+            results = await inference_executor.run(predict_symptom_sets, [symptoms for symptoms, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if 'error' in result:
+                future.set_exception(ValueError(result['error']))
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        """Batch size statistics"""
+        return {
+            'max_wait_ms': self.max_wait * 1000,
+            'max_size': self.max_size,
+            'pending': len(self._pending),
+            'batches': self._batches,
+            'items': self._items,
+            'avg_batch_size': round(self._items / self._batches, 2) if self._batches else 0.0,
+            'largest_batch': self._largest,
+        }
+
+
+# Global micro-batcher, used when MICRO_BATCHING_ENABLED is set
+micro_batcher = MicroBatcher()
@@ -0,0 +1,108 @@
+"""
+Prediction cache
+LRU/TTL memoization of model outputs keyed on the canonical symptom set
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from app.core.config import settings
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with optional time-to-live
+
+    Keys are expected to include the model version so entries from a
+    previous model can never be served; clear() additionally drops them
+    as soon as a model is swapped.
+    """
+
+    def __init__(self, maxsize: int = None, ttl: float = None):
+        self.maxsize = maxsize if maxsize is not None else settings.PREDICTION_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else settings.PREDICTION_CACHE_TTL
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None, refreshing its LRU position"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries"""
+        if not self.enabled:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries, e.g. after a model swap"""
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+
+    _COUNTERS = ('hits', 'misses', 'evictions', 'expirations', 'invalidations')
+
+    def drain_counts(self) -> Dict[str, int]:
+        """Take the counters accumulated since the last drain, resetting them"""
+        with self._lock:
+            counts = {name: getattr(self, name) for name in self._COUNTERS}
+            for name in self._COUNTERS:
+                setattr(self, name, 0)
+        return counts
+
+    def merge_counts(self, counts: Dict[str, int]):
+        """Add counters drained from a cache in another process"""
+        with self._lock:
+            for name in self._COUNTERS:
+                setattr(self, name, getattr(self, name) + counts.get(name, 0))
+
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters"""
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'size': size,
+            'maxsize': self.maxsize,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
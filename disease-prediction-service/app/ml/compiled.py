@@ -0,0 +1,290 @@
+"""
+Compiled Random Forest
+Flat array representation of a trained RandomForestClassifier for fast inference
+"""
+import json
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+COMPILED_FORMAT_VERSION = 1
+
+_ARRAY_NAMES = (
+    'feature', 'threshold', 'left', 'right', 'leaf_slot',
+    'leaf_ptr', 'leaf_class', 'leaf_prob', 'roots', 'classes'
+)
+
+
+class CompiledForest:
+    """
+    Random Forest flattened into NumPy arrays
+
+    All trees share one node table. Internal nodes hold a feature id, a
+    threshold and global child offsets; leaves point into a CSR table of
+    class distributions, which stays small because most leaves of a fully
+    grown forest are pure. When every split can only mean "is this
+    feature present?" (see from_sklearn), 0/1 inputs are bit-packed and
+    each split is a single byte lookup and mask.
+
+    Nothing is derived from the tables at load time, so arrays opened
+    with mmap_mode='r' are used as-is and never copied.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], n_features: int, binary: bool):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.leaf_slot = arrays['leaf_slot']
+        self.leaf_ptr = arrays['leaf_ptr']
+        self.leaf_class = arrays['leaf_class']
+        self.leaf_prob = arrays['leaf_prob']
+        self.roots = arrays['roots']
+        self.classes_ = arrays['classes']
+        self.n_features = n_features
+        self.n_classes = len(self.classes_)
+        self.n_trees = len(self.roots)
+        self.binary = binary
+        self._n_bytes = (n_features + 7) // 8
+
+    @classmethod
+    def from_sklearn(cls, model, binary_inputs: bool = False) -> "CompiledForest":
+        """
+        Compile a fitted RandomForestClassifier
+
+        Splits are treated as presence tests, enabling the bit-packed path,
+        when every threshold is 0.5 (what sklearn picks between 0 and 1),
+        or when the caller guarantees 0/1 inputs and every threshold lies
+        in [0, 1). A forest fitted on continuous features in [0, 1) keeps
+        the threshold comparison.
+
+        Args:
+            model: Fitted single-output RandomForestClassifier
+            binary_inputs: The forest was fitted on, and will only see, 0/1 features
+
+        Returns:
+            CompiledForest producing the same predict_proba output
+        """
+        features, thresholds, lefts, rights, leaf_slots = [], [], [], [], []
+        leaf_ptr = [np.zeros(1, dtype=np.int64)]
+        leaf_classes, leaf_probs = [], []
+        roots = []
+        node_offset = 0
+        leaf_offset = 0
+        entry_offset = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(n_nodes)
+
+            roots.append(node_offset)
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left).astype(np.int32) + node_offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right).astype(np.int32) + node_offset)
+
+            slots = np.full(n_nodes, -1, dtype=np.int32)
+            slots[is_leaf] = np.arange(is_leaf.sum(), dtype=np.int32) + leaf_offset
+            leaf_slots.append(slots)
+
+            # Leaf class distributions, normalized and stored sparsely
+            values = tree.value[is_leaf, 0, :]
+            values = values / values.sum(axis=1, keepdims=True)
+            rows, columns = np.nonzero(values)
+            counts = np.bincount(rows, minlength=len(values))
+            leaf_ptr.append(np.cumsum(counts) + entry_offset)
+            leaf_classes.append(columns.astype(np.int32))
+            leaf_probs.append(values[rows, columns])
+
+            node_offset += n_nodes
+            leaf_offset += int(is_leaf.sum())
+            entry_offset += len(columns)
+
+        arrays = {
+            'feature': np.concatenate(features),
+            'threshold': np.concatenate(thresholds).astype(np.float64),
+            'left': np.concatenate(lefts),
+            'right': np.concatenate(rights),
+            'leaf_slot': np.concatenate(leaf_slots),
+            'leaf_ptr': np.concatenate(leaf_ptr),
+            'leaf_class': np.concatenate(leaf_classes),
+            'leaf_prob': np.concatenate(leaf_probs).astype(np.float64),
+            'roots': np.asarray(roots, dtype=np.int32),
+            'classes': np.asarray(model.classes_),
+        }
+
+        internal = arrays['leaf_slot'] < 0
+        split_thresholds = arrays['threshold'][internal]
+        if binary_inputs:
+            binary = bool(np.all((split_thresholds >= 0) & (split_thresholds < 1)))
+        else:
+            binary = bool(np.all(split_thresholds == 0.5))
+
+        compiled = cls(arrays, n_features=int(model.n_features_in_), binary=binary)
+        logger.info(
+            f"Compiled forest: {compiled.n_trees} trees, {len(compiled.feature)} nodes, "
+            f"{len(compiled.leaf_class)} leaf entries, {compiled.nbytes / 1e6:.1f} MB"
+            f"{' (binary splits)' if binary else ''}"
+        )
+        return compiled
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the node and leaf tables in bytes"""
+        return sum(getattr(self, name).nbytes for name in (
+            'feature', 'threshold', 'left', 'right', 'leaf_slot',
+            'leaf_ptr', 'leaf_class', 'leaf_prob', 'roots'
+        ))
+
+    def pack_indices(self, rows: Sequence[Sequence[int]]) -> np.ndarray:
+        """Bit-pack rows given as lists of present feature indices"""
+        packed = np.zeros((len(rows), self._n_bytes), dtype=np.uint8)
+        for row, indices in enumerate(rows):
+            indices = np.asarray(indices, dtype=np.intp)
+            np.bitwise_or.at(packed[row], indices >> 3, (1 << (indices & 7)).astype(np.uint8))
+        return packed
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict class probabilities for a dense feature matrix
+
+        Args:
+            X: Array of shape (n_samples, n_features)
+
+        Returns:
+            Array of shape (n_samples, n_classes)
+        """
+        X = np.asarray(X)
+        # Packing reduces values to present/absent, exact only for 0/1 inputs
+        if self.binary and np.all((X == 0) | (X == 1)):
+            return self._predict_packed(np.packbits(X != 0, axis=1, bitorder='little'))
+        return self._predict_dense(X.astype(np.float32, copy=False))
+
+    def predict_proba_indices(self, rows: Sequence[Sequence[int]]) -> np.ndarray:
+        """
+        Predict class probabilities for rows of present feature indices
+
+        Args:
+            rows: One list of active feature indices per sample
+
+        Returns:
+            Array of shape (n_samples, n_classes)
+        """
+        if self.binary:
+            return self._predict_packed(self.pack_indices(rows))
+
+        X = np.zeros((len(rows), self.n_features), dtype=np.float32)
+        for row, indices in enumerate(rows):
+            X[row, indices] = 1
+        return self._predict_dense(X)
+
+    def _predict_packed(self, packed: np.ndarray) -> np.ndarray:
+        """Descend all trees level by level on bit-packed rows"""
+        n_samples = packed.shape[0]
+        sample = np.repeat(np.arange(n_samples), self.n_trees)
+        node = np.tile(self.roots, n_samples).astype(np.intp)
+        active = np.arange(len(node))
+
+        while active.size:
+            current = node[active]
+            # Byte offset and bit mask of each node's feature in the packed row
+            feature = self.feature[current]
+            present = packed[sample[active], feature >> 3] & (1 << (feature & 7)).astype(np.uint8)
+            node[active] = np.where(present != 0, self.right[current], self.left[current])
+            active = active[self.leaf_slot[node[active]] < 0]
+
+        return self._accumulate(sample, node, n_samples)
+
+    def _predict_dense(self, X: np.ndarray) -> np.ndarray:
+        """Descend all trees level by level comparing against thresholds"""
+        n_samples = X.shape[0]
+        sample = np.repeat(np.arange(n_samples), self.n_trees)
+        node = np.tile(self.roots, n_samples).astype(np.intp)
+        active = np.arange(len(node))
+
+        while active.size:
+            current = node[active]
+            go_left = X[sample[active], self.feature[current]] <= self.threshold[current]
+            node[active] = np.where(go_left, self.left[current], self.right[current])
+            active = active[self.leaf_slot[node[active]] < 0]
+
+        return self._accumulate(sample, node, n_samples)
+
+    def _accumulate(self, sample: np.ndarray, node: np.ndarray, n_samples: int) -> np.ndarray:
+        """Average the sparse leaf distributions reached by each sample"""
+        leaves = self.leaf_slot[node]
+        starts = self.leaf_ptr[leaves]
+        counts = self.leaf_ptr[leaves + 1] - starts
+
+        # Expand each leaf's [start, end) range into flat entry indices
+        total = int(counts.sum())
+        offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        entries = offsets + np.arange(total)
+
+        flat = np.repeat(sample, counts) * self.n_classes + self.leaf_class[entries]
+        probabilities = np.bincount(flat, weights=self.leaf_prob[entries], minlength=n_samples * self.n_classes)
+
+        return probabilities.reshape(n_samples, self.n_classes) / self.n_trees
+
+    def save(self, directory: str) -> str:
+        """
+        Save the compiled forest as uncompressed .npy arrays
+
+        Args:
+            directory: Target directory, created if missing
+
+        Returns:
+            Directory path
+        """
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+
+        for name in _ARRAY_NAMES:
+            array = self.classes_ if name == 'classes' else getattr(self, name)
+            np.save(path / f"{name}.npy", np.ascontiguousarray(array), allow_pickle=False)
+
+        with open(path / "meta.json", "w") as f:
+            json.dump({
+                'format_version': COMPILED_FORMAT_VERSION,
+                'n_features': self.n_features,
+                'n_classes': self.n_classes,
+                'n_trees': self.n_trees,
+                'binary': self.binary,
+            }, f, indent=2)
+
+        return str(path)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = None) -> "CompiledForest":
+        """
+        Load a compiled forest saved with save()
+
+        Args:
+            directory: Directory written by save()
+            mmap_mode: Passed to np.load, e.g. 'r' to memory-map the arrays
+
+        Returns:
+            CompiledForest instance
+        """
+        path = Path(directory)
+        with open(path / "meta.json") as f:
+            meta = json.load(f)
+
+        if meta.get('format_version') != COMPILED_FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled forest format: {meta.get('format_version')}")
+
+        arrays = {
+            name: np.load(path / f"{name}.npy", mmap_mode=mmap_mode, allow_pickle=False)
+            for name in _ARRAY_NAMES
+        }
+        return cls(arrays, n_features=meta['n_features'], binary=meta['binary'])
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        """Check whether a compiled forest is present in a directory"""
+        return (Path(directory) / "meta.json").exists()
@@ -0,0 +1,228 @@
+"""
+Symptom co-occurrence index
+Sparse disease x symptom and symptom x symptom count matrices, built once
+at training time and used to suggest which symptom to ask about next
+"""
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT = "cooccurrence-v1"
+CHUNK_ROWS = 50000
+# Laplace smoothing of P(symptom | disease)
+SMOOTHING = 1.0
+# Suggestions only weigh the most probable diseases; the rest of the
+# posterior mass is negligible once a symptom or two are known
+MAX_CANDIDATE_DISEASES = 64
+
+
+def _entropy(probabilities: np.ndarray, axis: int = 0) -> np.ndarray:
+    """Shannon entropy in bits along an axis, treating 0 log 0 as 0"""
+    safe = np.where(probabilities > 0, probabilities, 1.0)
+    return -(probabilities * np.log2(safe)).sum(axis=axis)
+
+
+class CooccurrenceIndex:
+    """
+    Symptom and disease counts over the training rows
+
+    disease_symptom[d, s] counts rows of disease d with symptom s and
+    cooccurrence[s, t] counts rows with both symptoms. Both are integer
+    CSR matrices; the counts are additive, so an index over new rows can
+    be merged into an existing one.
+
+    On construction the counts are expanded into dense probability tables
+    (diseases x symptoms floats, a few MB at most), so a suggestion is a
+    handful of NumPy operations instead of sparse slicing.
+    """
+
+    def __init__(self, n_rows: int, disease_counts: np.ndarray, symptom_counts: np.ndarray,
+                 disease_symptom: sparse.csr_matrix, cooccurrence: sparse.csr_matrix):
+        self.n_rows = n_rows
+        self.disease_counts = disease_counts
+        self.symptom_counts = symptom_counts
+        self.disease_symptom = disease_symptom.tocsr()
+        self.cooccurrence = cooccurrence.tocsr()
+
+        counts = self.disease_symptom.toarray()
+        self._seen = counts > 0
+        # Smoothed P(symptom | disease) and its log, one row per disease
+        self._present = ((counts + SMOOTHING) / (disease_counts + 2 * SMOOTHING)[:, None]).astype(np.float32)
+        self._log_present = np.log(self._present)
+        self._log_prior = np.log(disease_counts + SMOOTHING).astype(np.float32)
+        self._pairs = self.cooccurrence.toarray()
+
+    @property
+    def n_diseases(self) -> int:
+        return self.disease_symptom.shape[0]
+
+    @property
+    def n_symptoms(self) -> int:
+        return self.disease_symptom.shape[1]
+
+    @classmethod
+    def build(cls, features: np.ndarray, labels: np.ndarray, n_diseases: int,
+              chunk_rows: int = CHUNK_ROWS) -> "CooccurrenceIndex":
+        """
+        Count symptoms per disease and symptom pairs with sparse products
+
+        Args:
+            features: 0/1 feature rows, dense or memory-mapped
+            labels: Encoded disease of each row
+            n_diseases: Number of encoded diseases
+            chunk_rows: Rows densified at a time
+
+        Returns:
+            CooccurrenceIndex
+        """
+        started = time.perf_counter()
+        n_rows, n_symptoms = features.shape
+        disease_symptom = sparse.csr_matrix((n_diseases, n_symptoms), dtype=np.int64)
+        cooccurrence = sparse.csr_matrix((n_symptoms, n_symptoms), dtype=np.int64)
+
+        for start in range(0, n_rows, chunk_rows):
+            X = sparse.csr_matrix(np.asarray(features[start:start + chunk_rows]), dtype=np.int64)
+            chunk_labels = np.asarray(labels[start:start + chunk_rows])
+            Y = sparse.csr_matrix(
+                (np.ones(len(chunk_labels), dtype=np.int64), (np.arange(len(chunk_labels)), chunk_labels)),
+                shape=(len(chunk_labels), n_diseases)
+            )
+            disease_symptom = disease_symptom + Y.T @ X
+            cooccurrence = cooccurrence + X.T @ X
+
+        index = cls(
+            n_rows=n_rows,
+            disease_counts=np.bincount(np.asarray(labels), minlength=n_diseases).astype(np.int64),
+            symptom_counts=np.asarray(cooccurrence.diagonal(), dtype=np.int64),
+            disease_symptom=disease_symptom,
+            cooccurrence=cooccurrence,
+        )
+        logger.info(f"Built co-occurrence index over {n_rows} rows in {time.perf_counter() - started:.2f}s "
+                    f"({disease_symptom.nnz} disease-symptom, {cooccurrence.nnz} symptom-symptom pairs)")
+        return index
+
+    def merged(self, other: "CooccurrenceIndex") -> "CooccurrenceIndex":
+        """Index over the rows of both indexes"""
+        if other.disease_symptom.shape != self.disease_symptom.shape:
+            raise ValueError("Co-occurrence indexes cover different diseases or symptoms")
+        return CooccurrenceIndex(
+            n_rows=self.n_rows + other.n_rows,
+            disease_counts=self.disease_counts + other.disease_counts,
+            symptom_counts=self.symptom_counts + other.symptom_counts,
+            disease_symptom=self.disease_symptom + other.disease_symptom,
+            cooccurrence=self.cooccurrence + other.cooccurrence,
+        )
+
+    def posterior(self, indices: List[int]) -> np.ndarray:
+        """
+        P(disease | the given symptoms are present), naive Bayes on the counts
+
+        Only reported symptoms count as evidence; a symptom not mentioned is
+        unknown rather than absent.
+        """
+        log_posterior = self._log_prior.copy()
+        if len(indices):
+            log_posterior += self._log_present[:, indices].sum(axis=1)
+        log_posterior -= log_posterior.max()
+        posterior = np.exp(log_posterior)
+        return posterior / posterior.sum()
+
+    def suggest(self, indices: List[int], k: int = 5) -> List[Dict]:
+        """
+        Symptoms whose answer is expected to tell the most about the disease
+
+        For each candidate symptom s the expected information gain is
+        H(D) - P(s) H(D | s) - P(not s) H(D | not s) under the current
+        posterior, computed for all candidates at once over the most
+        probable diseases. Candidates are the symptoms seen with those
+        diseases, minus the ones already given.
+
+        Args:
+            indices: Feature indices of the symptoms already known
+            k: Number of suggestions
+
+        Returns:
+            Up to k dicts with symptom index, information_gain (bits),
+            probability (that the symptom is present) and cooccurrence
+            (rows sharing it with each given symptom, summed), best first
+        """
+        posterior = self.posterior(indices)
+        if len(posterior) > MAX_CANDIDATE_DISEASES:
+            diseases = np.argpartition(-posterior, MAX_CANDIDATE_DISEASES - 1)[:MAX_CANDIDATE_DISEASES]
+        else:
+            diseases = np.arange(len(posterior))
+        weights = posterior[diseases] / posterior[diseases].sum()
+
+        seen = self._seen[diseases].any(axis=0)
+        seen[indices] = False
+        candidates = np.flatnonzero(seen)
+        if len(candidates) == 0:
+            return []
+
+        present = self._present[np.ix_(diseases, candidates)]
+
+        p_present = weights @ present
+        posterior_present = weights[:, None] * present / p_present
+        posterior_absent = weights[:, None] * (1 - present) / (1 - p_present)
+        gain = (_entropy(weights)
+                - p_present * _entropy(posterior_present)
+                - (1 - p_present) * _entropy(posterior_absent))
+
+        if len(indices):
+            shared = self._pairs[np.ix_(indices, candidates)].sum(axis=0)
+        else:
+            shared = self.symptom_counts[candidates]
+
+        if len(gain) > k:
+            best = np.argpartition(-gain, k - 1)[:k]
+            best = best[np.argsort(-gain[best], kind='stable')]
+        else:
+            best = np.argsort(-gain, kind='stable')
+        return [
+            {
+                'index': int(candidates[position]),
+                'information_gain': float(gain[position]),
+                'probability': float(p_present[position]),
+                'cooccurrence': int(shared[position]),
+            }
+            for position in best
+        ]
+
+    def save(self, directory: Path):
+        """Write the counts as .npy/.npz files plus a small JSON header"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "disease_counts.npy", self.disease_counts)
+        np.save(directory / "symptom_counts.npy", self.symptom_counts)
+        sparse.save_npz(directory / "disease_symptom.npz", self.disease_symptom, compressed=False)
+        sparse.save_npz(directory / "cooccurrence.npz", self.cooccurrence, compressed=False)
+        with open(directory / "meta.json", "w") as f:
+            json.dump({'format': INDEX_FORMAT, 'n_rows': self.n_rows,
+                       'n_diseases': self.n_diseases, 'n_symptoms': self.n_symptoms}, f)
+
+    @classmethod
+    def load(cls, directory: Path) -> "CooccurrenceIndex":
+        """Load an index written by save()"""
+        directory = Path(directory)
+        with open(directory / "meta.json") as f:
+            meta = json.load(f)
+        if meta.get('format') != INDEX_FORMAT:
+            raise ValueError(f"Unsupported co-occurrence index format: {meta.get('format')}")
+        return cls(
+            n_rows=meta['n_rows'],
+            disease_counts=np.load(directory / "disease_counts.npy"),
+            symptom_counts=np.load(directory / "symptom_counts.npy"),
+            disease_symptom=sparse.load_npz(directory / "disease_symptom.npz"),
+            cooccurrence=sparse.load_npz(directory / "cooccurrence.npz"),
+        )
+
+    @staticmethod
+    def exists(directory: Path) -> bool:
+        return (Path(directory) / "meta.json").exists()
@@ -0,0 +1,201 @@
+"""
+Forest distillation
+A softmax-linear student over the binary symptom vector, trained to
+reproduce the forest's predict_proba. Scoring a request is a sum of one
+weight row per matched symptom, so it costs microseconds and about
+n_symptoms x n_diseases floats of memory.
+"""
+import json
+import logging
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+STUDENT_FORMAT = "linear-student-v1"
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    np.exp(logits, out=logits)
+    logits /= logits.sum(axis=1, keepdims=True)
+    return logits
+
+
+class LinearStudent:
+    """
+    Multinomial logistic regression on binary symptom features
+
+    Probability columns follow the teacher's classes_, so the student can
+    stand in for the forest anywhere predict_proba output is expected.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, classes: np.ndarray):
+        self.weights = weights
+        self.bias = bias
+        self.classes_ = classes
+
+    @property
+    def n_features(self) -> int:
+        return self.weights.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.weights.nbytes + self.bias.nbytes + self.classes_.nbytes
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities for a dense or sparse 0/1 feature matrix"""
+        logits = np.asarray(X @ self.weights, dtype=np.float32) + self.bias
+        return _softmax(logits)
+
+    def predict_proba_indices(self, rows: List[List[int]]) -> np.ndarray:
+        """Class probabilities for rows given as lists of active feature indices"""
+        logits = np.tile(self.bias, (len(rows), 1))
+        for row, indices in enumerate(rows):
+            if len(indices):
+                logits[row] += self.weights[indices].sum(axis=0)
+        return _softmax(logits)
+
+    @classmethod
+    def fit(cls, X, soft_targets: np.ndarray, classes: np.ndarray, epochs: int = 15,
+            learning_rate: float = 0.05, batch_size: int = 512, l2: float = 1e-6,
+            random_state: Optional[int] = None) -> "LinearStudent":
+        """
+        Fit the student to the teacher's probabilities
+
+        Minimizes cross-entropy against the soft targets with mini-batch
+        Adam. X is used as a sparse matrix, so each step costs
+        O(active symptoms x diseases) rather than O(symptoms x diseases).
+
+        Args:
+            X: 0/1 feature matrix, dense or sparse
+            soft_targets: Teacher probabilities, shape (n_rows, n_classes)
+            classes: Teacher classes_ matching the target columns
+            epochs: Passes over the data
+            learning_rate: Adam step size
+            batch_size: Rows per step
+            l2: Weight decay
+            random_state: Seed for the row order
+
+        Returns:
+            Fitted LinearStudent
+        """
+        X = sparse.csr_matrix(X, dtype=np.float32)
+        soft_targets = np.asarray(soft_targets, dtype=np.float32)
+        n_rows, n_features = X.shape
+        n_classes = soft_targets.shape[1]
+
+        weights = np.zeros((n_features, n_classes), dtype=np.float32)
+        # Start from the teacher's average output, i.e. the class prior
+        bias = np.log(np.clip(soft_targets.mean(axis=0), 1e-7, None)).astype(np.float32)
+        moments = [np.zeros_like(weights), np.zeros_like(weights), np.zeros_like(bias), np.zeros_like(bias)]
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+        rng = np.random.default_rng(random_state)
+        step = 0
+
+        started = time.perf_counter()
+        for epoch in range(epochs):
+            loss = 0.0
+            order = rng.permutation(n_rows)
+            for start in range(0, n_rows, batch_size):
+                batch = order[start:start + batch_size]
+                X_batch = X[batch]
+                targets = soft_targets[batch]
+
+                probabilities = _softmax(np.asarray(X_batch @ weights) + bias)
+                loss -= float((targets * np.log(probabilities + 1e-9)).sum())
+
+                error = (probabilities - targets) / len(batch)
+                grad_weights = np.asarray(X_batch.T @ error) + l2 * weights
+                grad_bias = error.sum(axis=0)
+
+                step += 1
+                correction1 = 1 - beta1 ** step
+                correction2 = 1 - beta2 ** step
+                for param, grad, m, v in ((weights, grad_weights, moments[0], moments[1]),
+                                          (bias, grad_bias, moments[2], moments[3])):
+                    m *= beta1
+                    m += (1 - beta1) * grad
+                    v *= beta2
+                    v += (1 - beta2) * grad * grad
+                    param -= learning_rate * (m / correction1) / (np.sqrt(v / correction2) + eps)
+
+            logger.debug(f"Distillation epoch {epoch + 1}/{epochs}: loss {loss / n_rows:.4f}")
+
+        logger.info(f"Distilled linear student: {n_features} x {n_classes} weights, "
+                    f"{epochs} epochs on {n_rows} rows in {time.perf_counter() - started:.1f}s")
+        return cls(weights, bias, np.asarray(classes))
+
+    def save(self, directory: Path):
+        """Write the weights as .npy files plus a small JSON header"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "weights.npy", self.weights)
+        np.save(directory / "bias.npy", self.bias)
+        np.save(directory / "classes.npy", self.classes_)
+        with open(directory / "meta.json", "w") as f:
+            json.dump({'format': STUDENT_FORMAT, 'n_features': self.n_features,
+                       'n_classes': int(self.bias.shape[0])}, f)
+
+    @classmethod
+    def load(cls, directory: Path, mmap_mode: Optional[str] = None) -> "LinearStudent":
+        """Load a student written by save(), optionally memory-mapping the weights"""
+        directory = Path(directory)
+        with open(directory / "meta.json") as f:
+            meta = json.load(f)
+        if meta.get('format') != STUDENT_FORMAT:
+            raise ValueError(f"Unsupported student format: {meta.get('format')}")
+        return cls(
+            np.load(directory / "weights.npy", mmap_mode=mmap_mode),
+            np.load(directory / "bias.npy"),
+            np.load(directory / "classes.npy"),
+        )
+
+    @staticmethod
+    def exists(directory: Path) -> bool:
+        return (Path(directory) / "meta.json").exists()
+
+
+def symptom_dropout(X: np.ndarray, keep: float = 0.5, random_state: Optional[int] = None) -> np.ndarray:
+    """
+    Copy of X with each present symptom kept with probability keep
+
+    Requests usually list fewer symptoms than a dataset row, so the student
+    also learns the teacher's behaviour on partial symptom sets. Rows left
+    empty keep one of their symptoms.
+    """
+    rng = np.random.default_rng(random_state)
+    X = np.asarray(X)
+    dropped = (X & (rng.random(X.shape) < keep)).astype(X.dtype)
+    empty = (dropped.sum(axis=1) == 0) & (X.sum(axis=1) > 0)
+    for row in np.flatnonzero(empty):
+        dropped[row, rng.choice(np.flatnonzero(X[row]))] = 1
+    return dropped
+
+
+def distill(teacher, X: np.ndarray, epochs: int = 15, learning_rate: float = 0.05,
+            chunk_rows: int = 4096, random_state: Optional[int] = None) -> LinearStudent:
+    """
+    Train a LinearStudent on the teacher's soft predictions
+
+    Args:
+        teacher: Fitted forest exposing predict_proba and classes_
+        X: uint8 feature rows from the training distribution
+        epochs: Student training passes
+        learning_rate: Student step size
+        chunk_rows: Rows per teacher predict_proba call, bounding memory
+        random_state: Seed for dropout and row order
+
+    Returns:
+        Fitted LinearStudent
+    """
+    X = np.vstack([np.asarray(X), symptom_dropout(X, random_state=random_state)])
+    soft_targets = np.empty((len(X), len(teacher.classes_)), dtype=np.float32)
+    for start in range(0, len(X), chunk_rows):
+        soft_targets[start:start + chunk_rows] = teacher.predict_proba(X[start:start + chunk_rows])
+    return LinearStudent.fit(X, soft_targets, teacher.classes_, epochs=epochs,
+                             learning_rate=learning_rate, random_state=random_state)
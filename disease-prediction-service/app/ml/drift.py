@@ -0,0 +1,324 @@
+"""
+Input drift monitoring
+Running counts of what /predict/ receives and predicts, kept in fixed-size
+arrays and compared against the training profile saved with the model
+"""
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import Gauge
+from app.ml.model import DiseasePredictor, predictor
+from app.ml.profiles import SYMPTOM_COUNT_BINS
+from app.ml.registry import ModelBundle
+
+logger = logging.getLogger(__name__)
+
+DISTRIBUTIONS = ("symptom_frequency", "symptoms_per_row", "predicted_disease")
+
+
+class CountMinSketch:
+    """
+    Approximate counts of an unbounded set of strings in fixed memory
+
+    Each string increments one counter in each of depth rows. Its estimate
+    is the smallest of those counters: never an undercount, and with
+    probability 1 - e^-depth at most e * total / width too high.
+    """
+
+    def __init__(self, width: int, depth: int):
+        if not 1 <= depth <= 8:
+            raise ValueError("Count-min sketch depth must be between 1 and 8")
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+        # Scalar updates through a flat view; fancy indexing costs more for a handful of cells
+        self._flat = self.table.reshape(-1)
+
+    def _cells(self, key: str) -> List[int]:
+        """Flat table position of key in each row, from one 64-bit hash per row"""
+        digest = hashlib.blake2b(key.encode(), digest_size=8 * self.depth).digest()
+        return [row * self.width + int.from_bytes(digest[8 * row:8 * row + 8], 'little') % self.width
+                for row in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Count key and return its new estimate"""
+        flat = self._flat
+        estimate = None
+        for cell in self._cells(key):
+            flat[cell] += count
+            value = int(flat[cell])
+            if estimate is None or value < estimate:
+                estimate = value
+        self.total += count
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        return min(int(self._flat[cell]) for cell in self._cells(key))
+
+
+def js_divergence(observed: np.ndarray, expected: np.ndarray) -> Optional[float]:
+    """
+    Jensen-Shannon divergence of two count vectors, in bits
+
+    0 for identical distributions, 1 for disjoint ones. None when either
+    vector has no counts.
+    """
+    observed_total = observed.sum()
+    expected_total = expected.sum()
+    if observed_total == 0 or expected_total == 0:
+        return None
+    p = observed / observed_total
+    q = expected / expected_total
+    m = (p + q) / 2
+
+    def kl(a: np.ndarray) -> float:
+        mask = a > 0
+        return float(np.sum(a[mask] * np.log2(a[mask] / m[mask])))
+
+    return max(0.0, (kl(p) + kl(q)) / 2)
+
+
+class DriftMonitor:
+    """
+    Streaming profile of prediction inputs and outputs
+
+    Keeps, since the served model was loaded (or the last reset):
+    - how many rows mentioned each known symptom;
+    - a histogram of matched symptoms per row;
+    - how often each disease was predicted;
+    - a count-min sketch of unmatched symptom strings, plus the most
+      frequent ones.
+
+    All of it is fixed-size, so memory stays constant. Each observation
+    costs a dictionary lookup and an increment per symptom. Divergence
+    from the training profile is computed only when a report is asked for.
+    """
+
+    def __init__(self, sketch_width: int = None, sketch_depth: int = None, top_unmatched: int = None):
+        self.enabled = settings.DRIFT_MONITOR_ENABLED
+        self.sketch_width = sketch_width or settings.DRIFT_SKETCH_WIDTH
+        self.sketch_depth = sketch_depth or settings.DRIFT_SKETCH_DEPTH
+        self.top_unmatched = top_unmatched or settings.DRIFT_TOP_UNMATCHED
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, bundle: Optional[ModelBundle]):
+        """Start counting from zero against this bundle's vocabulary and training profile"""
+        self._token = bundle.token if bundle is not None else None
+        self._version = bundle.version if bundle is not None else None
+        self._started_at = time.time()
+        symptoms = bundle.symptoms if bundle is not None else []
+        diseases = [str(name) for name in bundle.encoder.classes_] if bundle is not None else []
+        self._symptoms = symptoms
+        self._diseases = diseases
+        self._symptom_index = bundle.symptom_index if bundle is not None else {}
+        self._disease_index = {name: position for position, name in enumerate(diseases)}
+
+        self._rows = 0
+        self._rejected = 0
+        self._matched = 0
+        self._unmatched = 0
+        self._symptom_counts = np.zeros(len(symptoms), dtype=np.int64)
+        self._per_row = np.zeros(SYMPTOM_COUNT_BINS, dtype=np.int64)
+        self._disease_counts = np.zeros(len(diseases), dtype=np.int64)
+        self._sketch = CountMinSketch(self.sketch_width, self.sketch_depth)
+        self._top: Dict[str, int] = {}
+        self._expected = self._training_profile(bundle)
+
+    def _training_profile(self, bundle: Optional[ModelBundle]) -> Optional[Dict]:
+        """Training counts aligned with the bundle's symptom and disease order"""
+        profiles = bundle.profiles if bundle is not None else None
+        if profiles is None:
+            return None
+        symptom_positions = {str(name): position for position, name in enumerate(profiles.symptoms)}
+        disease_positions = {str(name): position for position, name in enumerate(profiles.diseases)}
+        overall = np.asarray(profiles.symptom_counts).sum(axis=0)
+        return {
+            'rows': int(profiles.disease_counts.sum()),
+            'symptom_frequency': np.array([overall[symptom_positions[name]] if name in symptom_positions else 0
+                                           for name in self._symptoms], dtype=np.int64),
+            'predicted_disease': np.array([profiles.disease_counts[disease_positions[name]]
+                                           if name in disease_positions else 0
+                                           for name in self._diseases], dtype=np.int64),
+            'symptoms_per_row': profiles.symptoms_per_row,
+        }
+
+    def _current(self) -> Optional[ModelBundle]:
+        """The served bundle, restarting the counts when it changed; call under the lock"""
+        bundle = predictor.bundle
+        if bundle is not None and bundle.token != self._token:
+            self._reset(bundle)
+        return bundle
+
+    def _add_unmatched(self, symptom: str):
+        """Count an unmatched string and keep the most frequent ones; call under the lock"""
+        self._unmatched += 1
+        estimate = self._sketch.add(symptom)
+        if symptom in self._top or len(self._top) < self.top_unmatched:
+            self._top[symptom] = estimate
+            return
+        smallest = min(self._top, key=self._top.get)
+        if estimate > self._top[smallest]:
+            del self._top[smallest]
+            self._top[symptom] = estimate
+
+    def observe(self, result: Dict):
+        """
+        Count one successful prediction
+
+        Args:
+            result: Prediction payload with matched and unmatched symptoms
+                and the predicted disease
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._current() is None:
+                return
+            symptom_index = self._symptom_index
+            columns = {symptom_index[symptom] for symptom in result['matched_symptoms'] if symptom in symptom_index}
+            for column in columns:
+                self._symptom_counts[column] += 1
+            self._per_row[min(len(columns), SYMPTOM_COUNT_BINS - 1)] += 1
+            self._matched += len(columns)
+            position = self._disease_index.get(result['disease'])
+            if position is not None:
+                self._disease_counts[position] += 1
+            self._rows += 1
+            for symptom in result['unmatched_symptoms']:
+                self._add_unmatched(symptom)
+
+    def observe_rejected(self, input_symptoms: List[str]):
+        """
+        Count a symptom list rejected because none of it was recognized
+
+        Args:
+            input_symptoms: Symptoms as submitted
+        """
+        if not self.enabled or not input_symptoms:
+            return
+        with self._lock:
+            if self._current() is None:
+                return
+            self._rejected += 1
+            for symptom in DiseasePredictor._normalize(input_symptoms):
+                self._add_unmatched(symptom)
+
+    def reset(self):
+        """Discard everything counted so far"""
+        with self._lock:
+            self._reset(predictor.bundle)
+
+    @property
+    def rows(self) -> int:
+        """Successful predictions counted since the last reset"""
+        return self._rows
+
+    def _observed(self) -> Dict[str, np.ndarray]:
+        """Copies of the observed distributions; call under the lock"""
+        return {
+            'symptom_frequency': self._symptom_counts.copy(),
+            'symptoms_per_row': self._per_row.copy(),
+            'predicted_disease': self._disease_counts.copy(),
+        }
+
+    @staticmethod
+    def _divergences(observed: Dict[str, np.ndarray], expected: Optional[Dict]) -> Dict[str, Optional[float]]:
+        if expected is None:
+            return {name: None for name in DISTRIBUTIONS}
+        return {
+            name: (js_divergence(observed[name].astype(float), np.asarray(expected[name], dtype=float))
+                   if expected[name] is not None else None)
+            for name in DISTRIBUTIONS
+        }
+
+    def divergences(self) -> Dict[str, Optional[float]]:
+        """Jensen-Shannon divergence from the training profile per distribution"""
+        with self._lock:
+            observed = self._observed()
+            expected = self._expected
+        return self._divergences(observed, expected)
+
+    def report(self, top_n: int = 10) -> Dict:
+        """
+        Observed distributions compared against the training profile
+
+        Args:
+            top_n: Symptoms listed among the largest rate shifts
+
+        Returns:
+            Divergence per distribution, whether drift is detected, the
+            symptoms whose per-row rate moved most and the most frequent
+            unmatched strings
+        """
+        with self._lock:
+            expected = self._expected
+            rows = self._rows
+            symptoms = self._symptoms
+            observed = self._observed()
+            report = {
+                'enabled': self.enabled,
+                'model_version': self._version,
+                'since': datetime.fromtimestamp(self._started_at, tz=timezone.utc),
+                'rows': rows,
+                'rejected_rows': self._rejected,
+                'matched_symptoms': self._matched,
+                'unmatched_symptoms': self._unmatched,
+                'unmatched_rate': (round(self._unmatched / (self._matched + self._unmatched), 4)
+                                   if self._matched + self._unmatched else 0.0),
+                'top_unmatched': [{'symptom': symptom, 'count': count} for symptom, count in
+                                  sorted(self._top.items(), key=lambda item: -item[1])],
+            }
+        divergences = self._divergences(observed, expected)
+        symptom_counts = observed['symptom_frequency']
+        per_row = observed['symptoms_per_row']
+        report['training_profile'] = expected is not None
+        report['divergence'] = {name: (round(value, 4) if value is not None else None)
+                                for name, value in divergences.items()}
+        drifted = [name for name, value in divergences.items()
+                   if value is not None and value > settings.DRIFT_ALERT_THRESHOLD]
+        report['drift_detected'] = rows >= settings.DRIFT_MIN_ROWS and bool(drifted)
+        report['drifted'] = drifted if rows >= settings.DRIFT_MIN_ROWS else []
+
+        bins = np.arange(SYMPTOM_COUNT_BINS)
+        report['mean_symptoms_per_row'] = round(float(per_row @ bins / rows), 3) if rows else 0.0
+        report['training_mean_symptoms_per_row'] = None
+        report['top_shifted_symptoms'] = []
+        if expected is not None and expected['rows']:
+            if expected['symptoms_per_row'] is not None:
+                report['training_mean_symptoms_per_row'] = round(
+                    float(expected['symptoms_per_row'] @ bins / expected['rows']), 3
+                )
+            if rows:
+                observed_rate = symptom_counts / rows
+                training_rate = expected['symptom_frequency'] / expected['rows']
+                shift = np.abs(observed_rate - training_rate)
+                top_n = min(top_n, len(shift))
+                columns = np.argsort(-shift, kind='stable')[:top_n]
+                report['top_shifted_symptoms'] = [
+                    {
+                        'symptom': symptoms[column],
+                        'observed_rate': round(float(observed_rate[column]), 4),
+                        'training_rate': round(float(training_rate[column]), 4),
+                    }
+                    for column in columns if shift[column] > 0
+                ]
+        return report
+
+
+# Global drift monitor
+drift_monitor = DriftMonitor()
+
+Gauge("drift_divergence", "Jensen-Shannon divergence (bits) of live inputs and predictions from the training profile",
+      ("distribution",),
+      function=lambda: {(name,): value for name, value in drift_monitor.divergences().items() if value is not None})
+Gauge("drift_observed_rows", "Successful predictions counted by the drift monitor since the model changed",
+      function=lambda: drift_monitor.rows)
@@ -0,0 +1,206 @@
+"""
+Inference execution layer
+Runs CPU-bound prediction work off the event loop with bounded concurrency
+"""
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+import logging
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_QUEUE_WAIT_SECONDS = Histogram(
+    "inference_queue_wait_seconds", "Time predictions waited for an inference worker"
+)
+
+
+class QueueFullError(Exception):
+    """Raised when the inference queue cannot accept more work"""
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__("Prediction queue is full. Please retry shortly.")
+
+
+def _timed_call(fn: Callable, args: Tuple) -> Tuple[Any, float]:
+    """Run fn in a worker and report when it actually started"""
+    started_at = time.time()
+    return fn(*args), started_at
+
+
+def _timed_worker_call(fn: Callable, args: Tuple) -> Tuple[Any, float, Dict]:
+    """
+    _timed_call in a worker process, also returning the counters it recorded
+
+    Metrics, cache hits and student answers happen in the worker; the
+    parent merges them so /metrics and /predict/stats cover that work.
+    Counters from a failed call stay in the worker until its next success.
+    """
+    from app.ml.model import predictor
+    result, started_at = _timed_call(fn, args)
+    return result, started_at, predictor.drain_stats()
+
+
+def _load_worker_model():
+    """Process pool initializer: give each worker its own loaded model"""
+    from app.ml.model import predictor
+    predictor.load_model()
+
+
+def _occupy_worker():
+    """Warm-up task; holding the worker briefly makes the pool start the next one"""
+    time.sleep(0.05)
+
+
+class InferenceExecutor:
+    """
+    Bounded thread or process pool for prediction work
+
+    At most max_workers calls run at once and at most max_queue more wait
+    for a worker. Anything beyond that is rejected with QueueFullError so
+    the caller can shed load instead of letting latency grow unbounded.
+    """
+
+    def __init__(self, mode: str = None, max_workers: int = None, max_queue: int = None):
+        self.mode = mode or settings.INFERENCE_EXECUTOR
+        self.max_workers = max_workers or settings.INFERENCE_WORKERS
+        self.max_queue = max_queue if max_queue is not None else settings.INFERENCE_QUEUE_SIZE
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._max_wait = 0.0
+        self._recent_waits = deque(maxlen=1000)
+
+        if self.mode not in ("thread", "process"):
+            raise ValueError(f"Unknown inference executor mode: {self.mode}")
+
+    def _pool(self) -> Executor:
+        """Create the worker pool on first use"""
+        if self._executor is None:
+            if self.mode == "process":
+                # fork would copy the server's threads and held locks into the workers
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_load_worker_model
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="inference"
+                )
+        return self._executor
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) in the pool
+
+        In process mode fn must be a picklable module-level function.
+
+        Raises:
+            QueueFullError: If the pool and its queue are saturated
+        """
+        if self._in_flight >= self.max_workers + self.max_queue:
+            self._rejected += 1
+            raise QueueFullError(settings.INFERENCE_RETRY_AFTER)
+
+        loop = asyncio.get_running_loop()
+        submitted_at = time.time()
+        self._in_flight += 1
+        self._submitted += 1
+        try:
+            if self.mode == "process":
+                result, started_at, worker_stats = await loop.run_in_executor(
+                    self._pool(), _timed_worker_call, fn, args
+                )
+                from app.ml.model import predictor
+                predictor.merge_stats(worker_stats)
+            else:
+                result, started_at = await loop.run_in_executor(self._pool(), _timed_call, fn, args)
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+        wait = max(0.0, started_at - submitted_at)
+        INFERENCE_QUEUE_WAIT_SECONDS.observe(wait)
+        self._completed += 1
+        self._recent_waits.append(wait)
+        self._max_wait = max(self._max_wait, wait)
+        return result
+
+    async def warm_up(self):
+        """
+        Start every worker now instead of on the first requests
+
+        Process workers load their model copy when they start, so this is
+        where that cost is paid in process mode.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._pool()
+        await asyncio.gather(*(loop.run_in_executor(pool, _occupy_worker) for _ in range(self.max_workers)))
+
+    def stats(self) -> Dict:
+        """Queue depth and wait-time statistics"""
+        waits = np.fromiter(self._recent_waits, dtype=float)
+        if waits.size:
+            p50, p95, p99 = np.percentile(waits, [50, 95, 99]) * 1000
+        else:
+            p50 = p95 = p99 = 0.0
+
+        return {
+            'mode': self.mode,
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'in_flight': self._in_flight,
+            'queue_depth': max(0, self._in_flight - self.max_workers),
+            'submitted': self._submitted,
+            'completed': self._completed,
+            'failed': self._failed,
+            'rejected': self._rejected,
+            'wait_ms': {
+                'p50': round(float(p50), 3),
+                'p95': round(float(p95), 3),
+                'p99': round(float(p99), 3),
+                'max': round(self._max_wait * 1000, 3),
+            }
+        }
+
+    def reset(self):
+        """
+        Recycle the pool
+
+        Process workers hold their own model copy, so they are replaced
+        after a reload. Thread workers share the global predictor.
+        """
+        if self.mode == "process" and self._executor is not None:
+            old, self._executor = self._executor, None
+            old.shutdown(wait=False)
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global inference executor
+inference_executor = InferenceExecutor()
+
+Gauge("inference_in_flight", "Predictions running or queued in the inference executor",
+      function=lambda: inference_executor._in_flight)
+Gauge("inference_workers", "Inference worker pool size", function=lambda: inference_executor.max_workers)
+Counter("inference_rejected_total", "Predictions rejected because the inference queue was full",
+        function=lambda: inference_executor._rejected)
@@ -0,0 +1,286 @@
+"""
+Background training jobs
+Runs model training in a worker process so the API keeps serving predictions
+"""
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import logging
+
+from app.core.config import settings, ensure_directories
+from app.core.metrics import DURATION_BUCKETS, Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+TRAINING_JOBS = Counter("training_jobs_total", "Finished training jobs by kind and status", ("kind", "status"))
+TRAINING_JOB_SECONDS = Histogram(
+    "training_job_duration_seconds", "Wall time of finished training jobs, queueing excluded",
+    ("kind",), buckets=DURATION_BUCKETS
+)
+
+
+class JobStore:
+    """
+    Training job records, one JSON file per job
+
+    Every API worker and every training process reads and writes the same
+    directory, so a job submitted through one API worker can be followed
+    through any of them. Files are replaced atomically, readers never see
+    a partial record.
+    """
+
+    _JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+    def __init__(self, root: str = None):
+        self.root = Path(root or Path(settings.MODEL_REGISTRY_PATH) / "jobs")
+
+    def path(self, job_id: str) -> Path:
+        return self.root / f"{job_id}.json"
+
+    def read(self, job_id: str) -> Optional[Dict]:
+        """A job's record, or None if unknown"""
+        # Job ids arrive in URLs; anything but a uuid4 hex never names a file
+        if not self._JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            with open(self.path(job_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def write(self, job: Dict):
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".job-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(job, f)
+        os.replace(tmp_path, self.path(job['job_id']))
+
+    def update(self, job_id: str, **changes) -> Optional[Dict]:
+        """Apply changes to a job's record and return it, None if unknown"""
+        job = self.read(job_id)
+        if job is None:
+            return None
+        job.update(changes)
+        self.write(job)
+        return job
+
+    def delete(self, job_id: str):
+        self.path(job_id).unlink(missing_ok=True)
+
+    def list(self) -> List[Dict]:
+        """All job records, newest first"""
+        if not self.root.exists():
+            return []
+        jobs = [self.read(path.stem) for path in self.root.glob("*.json")]
+        return sorted((job for job in jobs if job is not None), key=lambda job: job['submitted_at'], reverse=True)
+
+
+def _run_training_job(job_id: str, store_root: str, data_path: Optional[str] = None,
+                      increment: Optional[Dict] = None, activate: bool = True) -> Dict:
+    """
+    Train and save a model inside a worker process
+
+    Args:
+        job_id: Job identifier
+        store_root: JobStore directory, where progress is recorded
+        data_path: Optional dataset override
+        increment: Options for DiseasePredictor.train_increment; runs an
+            incremental update of the active model instead of a full train
+        activate: Mark the new version active; otherwise it is only published
+
+    Returns:
+        Dictionary with metrics, seconds per phase and saved artifact paths
+    """
+    from app.ml.model import DiseasePredictor
+
+    ensure_directories()
+    store = JobStore(store_root)
+
+    def report(phase: str):
+        store.update(job_id, status='running', phase=phase, started_at=started_at)
+
+    started_at = time.time()
+    report('starting')
+
+    job_predictor = DiseasePredictor()
+    if increment is not None:
+        metrics = job_predictor.train_increment(data_path, progress_callback=report, **increment)
+    else:
+        metrics = job_predictor.train(data_path, progress_callback=report)
+
+    report('saving')
+    timings = dict(job_predictor.bundle.metadata.get('timings', {}))
+    save_started = time.perf_counter()
+    saved_paths = job_predictor.save_model(activate=activate)
+    timings['saving'] = round(time.perf_counter() - save_started, 4)
+
+    return {
+        'metrics': {key: float(value) for key, value in metrics.items()},
+        'timings': timings,
+        'paths': saved_paths
+    }
+
+
+class TrainingJobRegistry:
+    """
+    Tracks training jobs submitted to a dedicated process pool
+
+    Job state lives in a JobStore, so with WORKERS > 1 every API worker
+    reports every job. Completion callbacks run in the worker that
+    submitted the job; the others pick up a new active version through
+    the model version sync.
+    """
+
+    def __init__(self, max_workers: int = None, history: int = None, store: JobStore = None):
+        self.max_workers = max_workers or settings.TRAINING_WORKERS
+        self.history = history or settings.TRAINING_JOB_HISTORY
+        self.store = store or JobStore()
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._on_complete: List[Callable[[Dict], None]] = []
+
+    def _ensure_pool(self):
+        """Start the worker pool on first use"""
+        if self._executor is None:
+            # spawn keeps the worker free of the API process' threads and locks
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+
+    def _prune(self):
+        """Delete the oldest finished jobs beyond the history limit"""
+        jobs = self.store.list()
+        excess = len(jobs) - self.history
+        finished = [job for job in reversed(jobs) if job['status'] in ('completed', 'failed')]
+        for job in finished[:max(0, excess)]:
+            self.store.delete(job['job_id'])
+
+    def on_complete(self, callback: Callable[[Dict], None]):
+        """Register a callback invoked with the job record after a successful run"""
+        self._on_complete.append(callback)
+
+    def submit(self, data_path: Optional[str] = None, increment: Optional[Dict] = None,
+               activate: bool = True) -> Dict:
+        """
+        Queue a training run
+
+        Args:
+            data_path: Optional dataset override
+            increment: Incremental update options, None for a full train
+            activate: Mark the new version active when the job saves it
+
+        Returns:
+            Snapshot of the new job
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._ensure_pool()
+            job = {
+                'job_id': job_id,
+                'kind': 'increment' if increment is not None else 'full',
+                'status': 'queued',
+                'phase': 'queued',
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'metrics': None,
+                'timings': None,
+                'model_path': None,
+                'model_version': None,
+                'activate': activate,
+                'error': None,
+            }
+            self.store.write(job)
+            self._prune()
+
+            future = self._executor.submit(_run_training_job, job_id, str(self.store.root), data_path,
+                                           increment, activate)
+
+        future.add_done_callback(lambda done: self._finish(job_id, done))
+        logger.info(f"Training job {job_id} queued")
+        return self.get(job_id)
+
+    def _finish(self, job_id: str, future: Future):
+        """Record the outcome of a finished job"""
+        with self._lock:
+            job = self.store.read(job_id)
+            if job is None:
+                return
+            job['finished_at'] = time.time()
+            try:
+                result = future.result()
+                job['status'] = 'completed'
+                job['phase'] = 'completed'
+                job['metrics'] = result['metrics']
+                job['timings'] = result['timings']
+                job['model_path'] = result['paths']['model_path']
+                job['model_version'] = result['paths']['version']
+            except Exception as e:
+                # phase stays where the worker last reported it
+                job['status'] = 'failed'
+                job['error'] = str(e)
+            self.store.write(job)
+            snapshot = dict(job)
+
+        TRAINING_JOBS.labels(snapshot['kind'], snapshot['status']).inc()
+        if snapshot['started_at'] is not None:
+            TRAINING_JOB_SECONDS.labels(snapshot['kind']).observe(snapshot['finished_at'] - snapshot['started_at'])
+
+        if snapshot['status'] == 'failed':
+            logger.error(f"Training job {job_id} failed: {snapshot['error']}")
+            return
+
+        logger.info(f"Training job {job_id} completed")
+        for callback in self._on_complete:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.error(f"Training job callback failed: {str(e)}")
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return a snapshot of a job, or None if unknown"""
+        job = self.store.read(job_id)
+        return self._format(job) if job is not None else None
+
+    def list(self) -> List[Dict]:
+        """Return snapshots of all tracked jobs, newest first"""
+        return [self._format(job) for job in self.store.list()[:self.history]]
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @staticmethod
+    def _format(job: Dict) -> Dict:
+        """Convert timestamps and compute elapsed time"""
+        started_at = job['started_at']
+        finished_at = job['finished_at']
+        if started_at is None:
+            elapsed = None
+        else:
+            elapsed = (finished_at or time.time()) - started_at
+
+        def as_datetime(timestamp: Optional[float]) -> Optional[datetime]:
+            return datetime.fromtimestamp(timestamp, tz=timezone.utc) if timestamp else None
+
+        return {
+            **job,
+            'submitted_at': as_datetime(job['submitted_at']),
+            'started_at': as_datetime(started_at),
+            'finished_at': as_datetime(finished_at),
+            'elapsed_seconds': round(elapsed, 3) if elapsed is not None else None,
+        }
+
+
+# Global training job registry
+training_jobs = TrainingJobRegistry()
@@ -0,0 +1,302 @@
+"""
+Fuzzy symptom matching
+Maps free-text symptoms onto the model's symptom names through a synonym
+table and a character trigram inverted index built when a model is loaded
+"""
+import bisect
+import json
+import logging
+import re
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Colloquial phrasings -> dataset symptom names. Entries whose target is
+# not a symptom of the loaded model are ignored.
+SYNONYMS: Dict[str, str] = {
+    "head ache": "headache",
+    "head pain": "headache",
+    "migraine": "headache",
+    "temperature": "fever",
+    "high temperature": "fever",
+    "feverish": "fever",
+    "pyrexia": "fever",
+    "chills": "chills",
+    "shivering": "chills",
+    "tired": "fatigue",
+    "tiredness": "fatigue",
+    "exhaustion": "fatigue",
+    "breathlessness": "shortness of breath",
+    "short of breath": "shortness of breath",
+    "difficulty breathing": "shortness of breath",
+    "trouble breathing": "shortness of breath",
+    "dyspnea": "shortness of breath",
+    "throwing up": "vomiting",
+    "puking": "vomiting",
+    "emesis": "vomiting",
+    "feeling sick": "nausea",
+    "queasy": "nausea",
+    "runny nose": "coryza",
+    "stuffy nose": "nasal congestion",
+    "blocked nose": "nasal congestion",
+    "sore throat": "sore throat",
+    "throat pain": "sore throat",
+    "stomach ache": "sharp abdominal pain",
+    "stomachache": "sharp abdominal pain",
+    "tummy ache": "sharp abdominal pain",
+    "belly pain": "sharp abdominal pain",
+    "abdominal pain": "sharp abdominal pain",
+    "chest pain": "sharp chest pain",
+    "loose stools": "diarrhea",
+    "diarrhoea": "diarrhea",
+    "lightheaded": "dizziness",
+    "light headed": "dizziness",
+    "vertigo": "dizziness",
+    "itchy skin": "itching of skin",
+    "itchiness": "itching of skin",
+    "rash": "skin rash",
+    "back ache": "back pain",
+    "backache": "back pain",
+    "joint ache": "joint pain",
+    "muscle ache": "muscle pain",
+    "myalgia": "muscle pain",
+    "sleeplessness": "insomnia",
+    "can't sleep": "insomnia",
+    "anxiety": "anxiety and nervousness",
+    "nervousness": "anxiety and nervousness",
+    "depressed": "depression",
+    "low mood": "depression",
+    "coughing": "cough",
+    "sneezing": "sneezing",
+    "weight gain": "weight gain",
+    "losing weight": "recent weight loss",
+    "weight loss": "recent weight loss",
+    "palpitations": "palpitations",
+    "racing heart": "increased heart rate",
+    "fast heartbeat": "increased heart rate",
+    "blurry vision": "diminished vision",
+    "blurred vision": "diminished vision",
+    "painful urination": "painful urination",
+    "burning urination": "painful urination",
+    "peeing often": "frequent urination",
+    "ear ache": "ear pain",
+    "earache": "ear pain",
+    "toothache": "toothache",
+    "tooth ache": "toothache",
+}
+
+# Candidates re-scored per lookup after the trigram overlap pass
+RESCORE_CANDIDATES = 5
+
+_NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse punctuation and whitespace to single spaces"""
+    return _NON_ALPHANUMERIC.sub(" ", text.lower()).strip()
+
+
+def _compact(text: str) -> str:
+    """Normalized text without spaces, so "head ache" and "headache" agree"""
+    return text.replace(" ", "")
+
+
+def _trigrams(compact: str) -> List[str]:
+    """Distinct character trigrams of a compact string, padded at both ends"""
+    padded = f"$${compact}$"
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+def load_synonyms(path: Optional[str] = None) -> Dict[str, str]:
+    """Built-in synonym table, extended or overridden by a JSON file"""
+    synonyms = dict(SYNONYMS)
+    if path:
+        with open(Path(path)) as f:
+            synonyms.update(json.load(f))
+    return synonyms
+
+
+class SymptomMatcher:
+    """
+    Resolve free text to known symptoms
+
+    Every symptom name and synonym is an entry in a trigram inverted index.
+    A lookup counts shared trigrams for all entries at once with one
+    bincount over the posting lists, then re-scores the best few by edit
+    similarity. Confidence is the higher of the trigram Dice coefficient
+    (robust to word order) and the sequence similarity (robust to typos).
+    """
+
+    def __init__(self, symptoms: List[str], synonyms: Dict[str, str] = None):
+        self.symptoms = list(symptoms)
+        self._names = [normalize(symptom) for symptom in self.symptoms]
+        self._name_compacts = [_compact(name) for name in self._names]
+        # Sorted word-start suffixes ("of breath", "breath") and compact
+        # names, so prefix lookups are a binary search
+        prefix_keys = set()
+        for position, name in enumerate(self._names):
+            words = name.split(" ")
+            for start in range(len(words)):
+                prefix_keys.add((" ".join(words[start:]), position))
+            prefix_keys.add((self._name_compacts[position], position))
+        self._prefix_keys = sorted(prefix_keys)
+        # Columns such as "Back pain" and "back-pain" normalize alike; each
+        # keeps its own entry and a synonym for them reaches all of them
+        symptom_ids: Dict[str, List[int]] = {}
+        for position, name in enumerate(self._names):
+            symptom_ids.setdefault(name, []).append(position)
+
+        entries: List[Tuple[str, int, bool]] = [(name, position, False) for position, name in enumerate(self._names)]
+        ignored = 0
+        for alias, target in (synonyms or {}).items():
+            alias, target = normalize(alias), normalize(target)
+            if target not in symptom_ids:
+                ignored += 1
+            elif alias not in symptom_ids:
+                entries.extend((alias, position, True) for position in symptom_ids[target])
+
+        self._compacts = [_compact(name) for name, _, _ in entries]
+        self._targets = np.array([target for _, target, _ in entries], dtype=np.int32)
+        self._is_synonym = np.array([synonym for _, _, synonym in entries], dtype=bool)
+        # Exact lookups ignore spacing; symptom names come first, so they
+        # win over a synonym that compacts to the same string
+        self._exact: Dict[str, List[int]] = {}
+        for entry, compact in enumerate(self._compacts):
+            found = self._exact.setdefault(compact, [])
+            if not found or self._is_synonym[found[0]] == self._is_synonym[entry]:
+                found.append(entry)
+
+        postings: Dict[str, List[int]] = {}
+        gram_counts = []
+        for entry, compact in enumerate(self._compacts):
+            grams = _trigrams(compact)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(entry)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._gram_counts = np.array(gram_counts, dtype=np.float32)
+
+        logger.debug(f"Symptom matcher: {len(self.symptoms)} symptoms, {int(self._is_synonym.sum())} synonyms "
+                     f"({ignored} ignored), {len(self._postings)} trigrams")
+
+    def _score(self, compact: str, limit: int) -> List[Tuple[int, float]]:
+        """(entry, confidence) for the best-scoring index entries"""
+        grams = _trigrams(compact)
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists:
+            return []
+
+        shared = np.bincount(np.concatenate(lists), minlength=len(self._compacts))
+        dice = 2 * shared / (len(grams) + self._gram_counts)
+        n_candidates = min(max(limit, RESCORE_CANDIDATES), len(dice))
+        candidates = np.argpartition(-dice, n_candidates - 1)[:n_candidates]
+        candidates = candidates[np.argsort(-dice[candidates], kind='stable')]
+
+        # The matcher indexes its second sequence, so the query goes there
+        # once and each candidate is swapped in as the first
+        sequence = SequenceMatcher(None, b=compact, autojunk=False)
+        scored = []
+        for entry in candidates:
+            if shared[entry] == 0:
+                break
+            sequence.set_seq1(self._compacts[entry])
+            confidence = float(dice[entry])
+            # ratio() is the slow part: skip it when its cheap upper bounds
+            # cannot beat the Dice score or get into the top limit
+            floor = max(confidence, sorted(score for _, score in scored)[-limit] if len(scored) >= limit else 0.0)
+            if sequence.real_quick_ratio() > floor and sequence.quick_ratio() > floor:
+                confidence = max(confidence, sequence.ratio())
+            scored.append((int(entry), confidence))
+        return sorted(scored, key=lambda item: -item[1])
+
+    def match(self, text: str, limit: int = 5) -> List[Dict]:
+        """
+        Closest known symptoms for a piece of free text
+
+        Args:
+            text: Symptom as typed by a user
+            limit: Most symptoms to return
+
+        Returns:
+            Up to limit dicts with symptom, confidence (0-1) and what it
+            matched, best first: 'exact' or 'fuzzy' for a symptom name,
+            'synonym' for a synonym, exactly when confidence is 1
+        """
+        compact = _compact(normalize(text))
+        if not compact:
+            return []
+
+        exact = self._exact.get(compact)
+        scored = [(entry, 1.0) for entry in exact] if exact is not None else self._score(compact, limit)
+
+        results = []
+        seen = set()
+        for entry, confidence in scored:
+            target = self._targets[entry]
+            if target not in seen:
+                seen.add(target)
+                results.append(self._result(entry, confidence, fuzzy=exact is None))
+        return results[:limit]
+
+    def resolve(self, text: str) -> Optional[Tuple[int, float]]:
+        """Feature index and confidence of the closest symptom, or None"""
+        matches = self.match(text, 1)
+        if not matches:
+            return None
+        return matches[0]['index'], matches[0]['confidence']
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Autocomplete: symptoms starting with the query first, then fuzzy matches
+
+        Args:
+            query: Partial symptom text
+            limit: Most symptoms to return
+
+        Returns:
+            Same dicts as match(), prefix matches marked 'prefix'
+        """
+        normalized = normalize(query)
+        if not normalized:
+            return []
+
+        compact = _compact(normalized)
+        results = []
+        seen = set()
+        for prefix in dict.fromkeys((normalized, compact)):
+            start = bisect.bisect_left(self._prefix_keys, (prefix, -1))
+            for key, position in self._prefix_keys[start:]:
+                if not key.startswith(prefix):
+                    break
+                if position not in seen:
+                    seen.add(position)
+                    results.append({
+                        'index': position,
+                        'symptom': self.symptoms[position],
+                        'confidence': round(len(compact) / len(self._name_compacts[position]), 4),
+                        'match': 'prefix',
+                    })
+        results.sort(key=lambda result: -result['confidence'])
+
+        for result in self.match(query, limit):
+            if result['index'] not in seen:
+                seen.add(result['index'])
+                results.append(result)
+        return results[:limit]
+
+    def _result(self, entry: int, confidence: float, fuzzy: bool = False) -> Dict:
+        position = int(self._targets[entry])
+        if self._is_synonym[entry]:
+            kind = 'synonym'
+        else:
+            kind = 'fuzzy' if fuzzy else 'exact'
+        return {
+            'index': position,
+            'symptom': self.symptoms[position],
+            'confidence': round(confidence, 4),
+            'match': kind,
+        }
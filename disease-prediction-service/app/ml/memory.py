@@ -0,0 +1,151 @@
+"""
+Per-process memory reporting
+Reads /proc to show how much of each worker's memory is private and how
+much is shared, including the memory-mapped model artifacts
+"""
+import os
+import re
+import resource
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+PROC = Path("/proc")
+
+
+def _read_kb_fields(path: Path) -> Dict[str, int]:
+    """Parse "Key:   123 kB" lines into a dict of byte counts"""
+    fields = {}
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return fields
+
+
+def _mb(n_bytes: int) -> float:
+    return round(n_bytes / (1024 * 1024), 2)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return _mb(peak if sys.platform == "darwin" else peak * 1024)
+
+
+def _command_signature(pid: int) -> Optional[bytes]:
+    """Command line with digits removed, so pipe handles and fds don't matter"""
+    try:
+        return re.sub(rb"\d+", b"", (PROC / str(pid) / "cmdline").read_bytes())
+    except OSError:
+        return None
+
+
+def worker_pids() -> List[int]:
+    """
+    PIDs of the API worker processes on this host
+
+    With WORKERS > 1 uvicorn starts the workers as children of one
+    supervisor, so they are this process and its siblings running the same
+    command. Otherwise only this process is reported.
+    """
+    pid = os.getpid()
+    if settings.WORKERS <= 1 or not PROC.exists():
+        return [pid]
+
+    parent = os.getppid()
+    signature = _command_signature(pid)
+    pids = []
+    for entry in PROC.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            # The command name in /proc/<pid>/stat may contain spaces, ppid follows it
+            stat = (entry / "stat").read_text()
+            ppid = int(stat[stat.rindex(")") + 2:].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        if ppid == parent and _command_signature(int(entry.name)) == signature:
+            pids.append(int(entry.name))
+    return sorted(pids) or [pid]
+
+
+def mapped_bytes(pid: int, root: Path) -> Dict[str, int]:
+    """Resident and proportional size of file mappings under a directory"""
+    root = str(root.resolve())
+    totals = {'Rss': 0, 'Pss': 0}
+    current = None
+    with open(PROC / str(pid) / "smaps") as f:
+        for line in f:
+            parts = line.split(None, 5)
+            if "-" in parts[0] and ":" not in parts[0]:
+                # Mapping header: address perms offset dev inode [path]
+                current = parts[5].strip() if len(parts) > 5 else None
+            elif current is not None and current.startswith(root) and parts[0] in ('Rss:', 'Pss:'):
+                totals[parts[0].rstrip(":")] += int(parts[1]) * 1024
+    return totals
+
+
+def process_memory(pid: int, model_root: Path = None) -> Dict:
+    """
+    Memory breakdown of one process
+
+    Args:
+        pid: Process to inspect
+        model_root: Directory whose mapped files count as model memory
+
+    Returns:
+        Dictionary with RSS, PSS and shared/private sizes in MB
+    """
+    rollup = PROC / str(pid) / "smaps_rollup"
+    if not rollup.exists():
+        # No /proc (e.g. macOS): only the peak RSS of this process is known
+        return {'pid': pid, 'peak_rss_mb': peak_rss_mb()}
+
+    fields = _read_kb_fields(rollup)
+    report = {
+        'pid': pid,
+        'rss_mb': _mb(fields.get('Rss', 0)),
+        'pss_mb': _mb(fields.get('Pss', 0)),
+        'shared_mb': _mb(fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)),
+        'private_mb': _mb(fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)),
+        'anonymous_mb': _mb(fields.get('Anonymous', 0)),
+    }
+    if model_root is not None and model_root.exists():
+        model = mapped_bytes(pid, model_root)
+        report['model_mapped_rss_mb'] = _mb(model['Rss'])
+        report['model_mapped_pss_mb'] = _mb(model['Pss'])
+    return report
+
+
+def memory_report() -> Dict:
+    """
+    Memory breakdown of every API worker on this host
+
+    PSS splits shared pages evenly between the processes mapping them, so
+    the PSS total is the real footprint of the whole service; the RSS total
+    counts memory-mapped model arrays once per worker.
+    """
+    model_root = Path(settings.MODEL_REGISTRY_PATH)
+    workers = []
+    for pid in worker_pids():
+        try:
+            workers.append(process_memory(pid, model_root))
+        except OSError:
+            # Worker exited while we were reading it
+            continue
+
+    totals = {}
+    for key in ('rss_mb', 'pss_mb', 'private_mb'):
+        if all(key in worker for worker in workers):
+            totals[key] = round(sum(worker[key] for worker in workers), 2)
+
+    return {
+        'pid': os.getpid(),
+        'workers': workers,
+        'totals': totals,
+    }
@@ -1,130 +1,214 @@
 """
 Disease Prediction Model
 Random Forest Classifier for disease prediction from symptoms
+
+Training-only dependencies (pandas, sklearn's model selection and metrics,
+app.ml.training) are imported inside the methods that need them, so a
+serving process starts without loading them.
 """
-import pandas as pd
 import numpy as np
-import joblib
-from pathlib import Path
-from typing import Dict, List, Tuple, Optional
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+import math
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple, Optional
 import logging
 
 from app.core.config import settings
+from app.core.metrics import DURATION_BUCKETS, REGISTRY, Counter, Gauge, Histogram
+from app.ml.compiled import CompiledForest
+from app.ml.cooccurrence import CooccurrenceIndex
+from app.ml.distill import LinearStudent
+from app.ml.cache import PredictionCache
+from app.ml.registry import ModelBundle, ModelRegistry
+from app.ml.memory import peak_rss_mb
+
+if TYPE_CHECKING:
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import LabelEncoder
+    from app.ml.training import EncodedDataset
 
 logger = logging.getLogger(__name__)
 
+PREDICTION_STAGE_SECONDS = Histogram(
+    "prediction_stage_seconds", "Time spent in each stage of a prediction", ("stage",)
+)
+_NORMALIZE_SECONDS = PREDICTION_STAGE_SECONDS.labels("normalize")
+_VECTORIZE_SECONDS = PREDICTION_STAGE_SECONDS.labels("vectorize")
+_PREDICT_PROBA_SECONDS = PREDICTION_STAGE_SECONDS.labels("predict_proba")
+_TOP_K_SECONDS = PREDICTION_STAGE_SECONDS.labels("top_k")
+_SERIALIZE_SECONDS = PREDICTION_STAGE_SECONDS.labels("serialize")
+PREDICTIONS = Counter("predictions_total", "Symptom lists predicted or rejected", ("outcome",))
+_PREDICTED = PREDICTIONS.labels("predicted")
+_REJECTED = PREDICTIONS.labels("rejected")
+PREDICTION_ROWS = Counter("prediction_rows_total", "Predicted rows by what answered them", ("source",))
+_CACHE_ROWS = PREDICTION_ROWS.labels("cache")
+_STUDENT_ROWS = PREDICTION_ROWS.labels("student")
+_FOREST_ROWS = PREDICTION_ROWS.labels("forest")
+PREDICTION_SYMPTOMS = Counter(
+    "prediction_symptoms_total", "Submitted symptoms: matched exactly, corrected by fuzzy matching or unmatched",
+    ("result",)
+)
+_MATCHED_SYMPTOMS = PREDICTION_SYMPTOMS.labels("matched")
+_CORRECTED_SYMPTOMS = PREDICTION_SYMPTOMS.labels("corrected")
+_UNMATCHED_SYMPTOMS = PREDICTION_SYMPTOMS.labels("unmatched")
+MODEL_LOAD_SECONDS = Histogram(
+    "model_load_duration_seconds", "Model version loads; reload replaces a model already being served",
+    ("kind",), buckets=DURATION_BUCKETS
+)
+MODEL_LOAD_FAILURES = Counter("model_load_failures_total", "Model version loads that failed")
+
 
 class DiseasePredictor:
     """Disease prediction model using Random Forest"""
     
-    def __init__(self):
-        self.model: Optional[RandomForestClassifier] = None
-        self.encoder: Optional[LabelEncoder] = None
-        self.symptom_index: Optional[Dict[str, int]] = None
-        self.symptoms: Optional[List[str]] = None
-        self.is_trained: bool = False
-        
-    def load_data(self, file_path: str = None) -> pd.DataFrame:
-        """Load dataset from CSV"""
-        if file_path is None:
-            file_path = settings.DATA_FILE
-        
-        logger.info(f"Loading data from {file_path}")
-        data = pd.read_csv(file_path)
-        logger.info(f"Data loaded: {data.shape[0]} rows, {data.shape[1]} columns")
-        return data
-    
-    def encode_labels(self, data: pd.DataFrame) -> Tuple[pd.DataFrame, LabelEncoder]:
-        """Encode disease labels"""
-        encoder = LabelEncoder()
-        data["diseases"] = encoder.fit_transform(data["diseases"])
-        logger.info(f"Encoded {len(encoder.classes_)} unique diseases")
-        return data, encoder
-    
-    def prepare_features_targets(self, data: pd.DataFrame, n_rows: int = None) -> Tuple[pd.DataFrame, pd.Series]:
-        """Extract features (symptoms) and target (disease)"""
-        if n_rows is None:
-            n_rows = settings.N_ROWS
-        
-        # Limit rows if dataset is large
-        n_rows = min(n_rows, len(data))
-        
-        # First column is disease, rest are symptoms
-        X = data.iloc[:n_rows, 1:]
-        y = data.iloc[:n_rows, 0]
-        
-        logger.info(f"Using {n_rows} rows for training")
-        logger.info(f"Features: {X.shape[1]} symptoms")
-        
-        return X, y
+    def __init__(self, registry: ModelRegistry = None):
+        self.registry = registry or ModelRegistry()
+        self._bundle: Optional[ModelBundle] = None
+        # Registry's ACTIVE pointer as of the last load, save or sync, so
+        # request handlers can report it without reading the file
+        self.active_version: Optional[str] = None
+        self._load_lock = threading.RLock()
+        self._local = threading.local()
+        self.cache = PredictionCache()
+        self._student_lock = threading.Lock()
+        self.student_answers = 0
+        self.student_fallbacks = 0
     
-    def train(self, data_path: str = None) -> Dict[str, float]:
+    @property
+    def bundle(self) -> Optional[ModelBundle]:
+        """The model bundle currently being served"""
+        return self._bundle
+    
+    @property
+    def is_trained(self) -> bool:
+        return self._bundle is not None
+    
+    @property
+    def model(self) -> Optional["RandomForestClassifier"]:
+        return self._bundle.model if self._bundle is not None else None
+    
+    @property
+    def encoder(self) -> Optional["LabelEncoder"]:
+        return self._bundle.encoder if self._bundle is not None else None
+    
+    @property
+    def symptom_index(self) -> Optional[Dict[str, int]]:
+        return self._bundle.symptom_index if self._bundle is not None else None
+    
+    @property
+    def symptoms(self) -> Optional[List[str]]:
+        return self._bundle.symptoms if self._bundle is not None else None
+    
+    @property
+    def compiled(self) -> Optional[CompiledForest]:
+        return self._bundle.compiled if self._bundle is not None else None
+    
+    def _install(self, bundle: ModelBundle):
+        """Atomically switch predictions over to a new bundle"""
+        self._bundle = bundle
+        # Cache keys carry the bundle token, clearing just frees the memory
+        self.cache.clear()
+        logger.info(f"Serving model version {bundle.version} ({bundle.backend} backend)")
+        
+    def train(self, data_path: str = None,
+              progress_callback: Optional[Callable[[str], None]] = None) -> Dict[str, float]:
         """
         Train the Random Forest model
         
         Args:
             data_path: Path to training data CSV
+            progress_callback: Optional callable receiving the current phase name
             
         Returns:
             Dictionary with training metrics
         """
+        from app.ml.training import PhaseTimer, build_disease_profiles, classification_metrics, load_encoded_dataset
+        
+        report = PhaseTimer(progress_callback)
+        
+        if settings.TRAINING_MODE not in ("in_memory", "out_of_core"):
+            raise ValueError(f"Unknown training mode: {settings.TRAINING_MODE}")
+        
         try:
+            started = time.perf_counter()
+            
             # Load and prepare data
-            data = self.load_data(data_path)
-            data, self.encoder = self.encode_labels(data)
-            X, y = self.prepare_features_targets(data)
+            report('loading')
+            dataset = load_encoded_dataset(data_path)
+            report('encoding')
+            encoder = dataset.label_encoder()
+            logger.info(f"Encoded {len(encoder.classes_)} unique diseases")
             
             # Store symptom information
-            self.symptoms = X.columns.values.tolist()
-            self.symptom_index = {symptom: idx for idx, symptom in enumerate(self.symptoms)}
-            
-            # Split data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, 
-                test_size=settings.TEST_SIZE, 
-                random_state=settings.RANDOM_STATE
-            )
+            symptoms = list(dataset.symptoms)
+            symptom_index = {symptom: idx for idx, symptom in enumerate(symptoms)}
+            logger.info(f"Features: {len(symptoms)} symptoms")
             
-            logger.info(f"Training set: {len(X_train)} samples")
-            logger.info(f"Test set: {len(X_test)} samples")
+            if settings.TRAINING_MODE == "out_of_core":
+                fitted = self._fit_out_of_core(dataset, report)
+            else:
+                fitted = self._fit_in_memory(dataset, report)
+            model, train_rows, test_rows, test_pred, n_samples, fit_metrics = fitted
+            y_test = dataset.labels[test_rows]
             
-            # Train Random Forest model
-            logger.info(f"Training Random Forest with {settings.N_ESTIMATORS} estimators...")
-            self.model = RandomForestClassifier(
-                n_estimators=settings.N_ESTIMATORS,
-                random_state=settings.RANDOM_STATE,
-                n_jobs=-1,
-                verbose=1
-            )
-            self.model.fit(X_train, y_train)
+            student = None
+            if settings.DISTILL_STUDENT:
+                report('distilling')
+                # Sorted rows read the memory-mapped dataset sequentially
+                distill_rows = np.sort(np.random.default_rng(settings.RANDOM_STATE).choice(
+                    train_rows, size=min(settings.DISTILL_ROWS, len(train_rows)), replace=False
+                ))
+                student, student_metrics = self._distill(
+                    model, dataset.features[distill_rows], dataset.features[np.sort(test_rows)],
+                    y_test[np.argsort(test_rows)], test_pred[np.argsort(test_rows)]
+                )
+                fit_metrics.update(student_metrics)
+            
+            report('indexing')
+            cooccurrence = CooccurrenceIndex.build(dataset.features, dataset.labels, len(encoder.classes_))
             
-            # Evaluate
-            train_pred = self.model.predict(X_train)
-            test_pred = self.model.predict(X_test)
+            report('profiling')
+            profiles = build_disease_profiles(dataset.features, dataset.labels, dataset.diseases,
+                                              dataset.symptoms, model.feature_importances_)
             
             metrics = {
-                'train_accuracy': accuracy_score(y_train, train_pred),
-                'test_accuracy': accuracy_score(y_test, test_pred),
-                'precision': precision_score(y_test, test_pred, average='weighted', zero_division=0),
-                'recall': recall_score(y_test, test_pred, average='weighted', zero_division=0),
-                'f1_score': f1_score(y_test, test_pred, average='weighted', zero_division=0),
-                'n_diseases': len(self.encoder.classes_),
-                'n_symptoms': len(self.symptoms),
-                'n_samples': len(X)
+                **fit_metrics,
+                **classification_metrics(y_test, test_pred, len(encoder.classes_)),
+                'n_diseases': len(encoder.classes_),
+                'n_symptoms': len(symptoms),
+                'n_samples': n_samples,
+                'training_seconds': time.perf_counter() - started,
+                'peak_rss_mb': peak_rss_mb()
             }
             
+            timings = report.stop()
+            
             logger.info(f"Training completed!")
-            logger.info(f"Train Accuracy: {metrics['train_accuracy']*100:.2f}%")
+            if 'train_accuracy' in metrics:
+                logger.info(f"Train Accuracy: {metrics['train_accuracy']*100:.2f}%")
+            if 'oob_accuracy' in metrics:
+                logger.info(f"OOB Accuracy: {metrics['oob_accuracy']*100:.2f}%")
+            if 'student_accuracy' in metrics:
+                logger.info(f"Student Accuracy: {metrics['student_accuracy']*100:.2f}% "
+                            f"(answers {metrics['student_coverage']*100:.1f}% of test rows, "
+                            f"served accuracy {metrics['served_accuracy']*100:.2f}%)")
             logger.info(f"Test Accuracy: {metrics['test_accuracy']*100:.2f}%")
             logger.info(f"Precision: {metrics['precision']*100:.2f}%")
             logger.info(f"Recall: {metrics['recall']*100:.2f}%")
             logger.info(f"F1 Score: {metrics['f1_score']*100:.2f}%")
+            logger.info(f"Wall time: {metrics['training_seconds']:.1f}s, peak RSS: {metrics['peak_rss_mb']:.0f} MB")
+            logger.info(f"Phase timings: {report.summary()}")
             
-            self.is_trained = True
+            self._install(ModelBundle.build(
+                "unsaved", model, encoder, symptom_index,
+                metadata={
+                    'metrics': {key: float(value) for key, value in metrics.items()},
+                    'timings': timings,
+                },
+                student=student,
+                cooccurrence=cooccurrence,
+                profiles=profiles
+            ))
             
             return metrics
             
@@ -132,136 +216,907 @@ class DiseasePredictor:
             logger.error(f"Training failed: {str(e)}")
             raise
     
-    def save_model(self, model_path: str = None, encoder_path: str = None, 
-                   symptom_index_path: str = None):
-        """Save trained model and supporting files"""
-        if not self.is_trained or self.model is None:
-            raise ValueError("Model must be trained before saving")
+    def train_increment(self, data_path: str, n_estimators: int = None, retire_oldest: int = 0,
+                        replay_rows: int = None,
+                        progress_callback: Optional[Callable[[str], None]] = None) -> Dict[str, float]:
+        """
+        Grow the active model with trees fitted on new rows
+        
+        The active version's forest is reloaded and n_estimators trees are
+        added through warm_start, fitted on the new rows plus a stratified
+        replay sample of the original dataset. The replay keeps every
+        disease in the fit, so the new trees share the forest's classes.
+        
+        Args:
+            data_path: CSV with new labeled rows, same columns as the dataset
+            n_estimators: Trees to add
+            retire_oldest: Oldest trees to drop afterwards
+            replay_rows: Rows sampled from settings.DATA_FILE, 0 to disable
+            progress_callback: Optional callable receiving the current phase name
+            
+        Returns:
+            Dictionary with training metrics, evaluated on held-out new rows
+        """
+        from sklearn.model_selection import train_test_split
+        from app.ml.training import (
+            PhaseTimer,
+            align_dataset,
+            build_disease_profiles,
+            classification_metrics,
+            load_encoded_dataset,
+            stratified_shards,
+        )
+        
+        report = PhaseTimer(progress_callback)
+        
+        if n_estimators is None:
+            n_estimators = settings.INCREMENT_N_ESTIMATORS
+        if replay_rows is None:
+            replay_rows = settings.INCREMENT_REPLAY_ROWS
+        if n_estimators < 1:
+            raise ValueError("At least one tree must be added")
+        
+        started = time.perf_counter()
+        report('loading')
+        if not self.ensure_loaded():
+            raise ValueError("No trained model to update, train one first")
+        base = self._bundle
+        # Always a fresh copy from disk: warm_start mutates the estimator
+        model = self.registry.load_estimator(None if base.metadata.get('legacy') else base.version)
+        n_before = len(model.estimators_)
+        if retire_oldest < 0 or retire_oldest >= n_before + n_estimators:
+            raise ValueError(f"Cannot retire {retire_oldest} of {n_before + n_estimators} trees")
+        
+        diseases = list(base.encoder.classes_)
+        new_X, new_y = align_dataset(load_encoded_dataset(data_path), base.symptoms, diseases)
+        if len(new_y) < 2:
+            raise ValueError("At least two new rows are needed")
+        
+        report('splitting')
+        X_new_train, X_test, y_new_train, y_test = train_test_split(
+            new_X, new_y,
+            test_size=settings.TEST_SIZE,
+            random_state=settings.RANDOM_STATE
+        )
+        X_fit, y_fit = [X_new_train], [y_new_train]
+        if replay_rows > 0:
+            replay_X, replay_y = align_dataset(load_encoded_dataset(settings.DATA_FILE), base.symptoms, diseases)
+            n_shards = max(1, math.ceil(len(replay_y) / replay_rows))
+            rows = stratified_shards(replay_y, n_shards, settings.RANDOM_STATE)[0]
+            X_fit.append(replay_X[rows])
+            y_fit.append(replay_y[rows])
+        X_fit, y_fit = np.concatenate(X_fit), np.concatenate(y_fit)
+        
+        # warm_start requires exactly the forest's classes in every fit
+        fitted_classes = np.unique(y_fit)
+        if not np.array_equal(fitted_classes, model.classes_):
+            missing = len(np.setdiff1d(model.classes_, fitted_classes))
+            unseen = len(np.setdiff1d(fitted_classes, model.classes_))
+            raise ValueError(f"Rows cover {missing} fewer and {unseen} new diseases than the model; "
+                             f"increase replay_rows or run a full retrain")
+        
+        report('fitting')
+        logger.info(f"Adding {n_estimators} trees to model version {base.version} "
+                    f"on {len(y_new_train)} new and {len(y_fit) - len(y_new_train)} replayed rows...")
+        model.set_params(warm_start=True, n_estimators=n_before + n_estimators, n_jobs=-1, verbose=0)
+        model.fit(X_fit, y_fit)
+        if retire_oldest:
+            model.estimators_ = model.estimators_[retire_oldest:]
+            model.n_estimators = len(model.estimators_)
+            logger.info(f"Retired the {retire_oldest} oldest trees")
+        model.set_params(warm_start=False)
+        
+        report('evaluating')
+        # warm_start trees were bootstrapped from different data, so OOB
+        # scores are meaningless here; fast evaluation just skips the fit set
+        fit_metrics = {}
+        if not settings.FAST_EVALUATION:
+            fit_metrics['train_accuracy'] = float(np.mean(model.predict(X_fit) == y_fit))
+        test_pred = model.predict(X_test)
+        
+        student = None
+        if settings.DISTILL_STUDENT:
+            # The old student mimics the old forest; distill a new one
+            report('distilling')
+            distill_rows = np.random.default_rng(settings.RANDOM_STATE).choice(
+                len(y_fit), size=min(settings.DISTILL_ROWS, len(y_fit)), replace=False
+            )
+            student, student_metrics = self._distill(model, X_fit[distill_rows], X_test, y_test, test_pred)
+            fit_metrics.update(student_metrics)
+        
+        cooccurrence = None
+        if base.cooccurrence is not None:
+            # Counts are additive: fold the new rows into the base index
+            report('indexing')
+            cooccurrence = base.cooccurrence.merged(CooccurrenceIndex.build(new_X, new_y, len(diseases)))
+        
+        profiles = None
+        if base.profiles is not None:
+            report('profiling')
+            profiles = base.profiles.merged(
+                build_disease_profiles(new_X, new_y, diseases, base.symptoms),
+                feature_importances=model.feature_importances_
+            )
+        
+        metrics = {
+            **fit_metrics,
+            **classification_metrics(y_test, test_pred, len(diseases)),
+            'n_diseases': len(diseases),
+            'n_symptoms': len(base.symptoms),
+            'n_samples': len(y_fit),
+            'trees_added': n_estimators,
+            'trees_retired': retire_oldest,
+            'training_seconds': time.perf_counter() - started,
+            'peak_rss_mb': peak_rss_mb()
+        }
+        timings = report.stop()
+        logger.info(f"Incremental update completed: {model.n_estimators} trees, "
+                    f"test accuracy on new rows {metrics['test_accuracy']*100:.2f}%")
+        logger.info(f"Phase timings: {report.summary()}")
+        
+        self._install(ModelBundle.build(
+            "unsaved", model, base.encoder, base.symptom_index,
+            metadata={
+                'metrics': {key: float(value) for key, value in metrics.items()},
+                'timings': timings,
+                'base_version': base.version,
+            },
+            student=student,
+            cooccurrence=cooccurrence,
+            profiles=profiles
+        ))
+        
+        return metrics
+    
+    def _distill(self, model: "RandomForestClassifier", X_train: np.ndarray, X_test: np.ndarray,
+                 y_test: np.ndarray, test_pred: np.ndarray) -> Tuple[LinearStudent, Dict[str, float]]:
+        """
+        Distill the forest into a LinearStudent and measure it on the test rows
+        
+        Returns:
+            The student and its metrics: accuracy, top-1 agreement with the
+            forest, the share of rows it answers at the confidence threshold
+            and the accuracy of student-with-fallback serving
+        """
+        from scipy import sparse
+        from app.ml.distill import distill
+        
+        student = distill(
+            model, np.asarray(X_train),
+            epochs=settings.DISTILL_EPOCHS,
+            learning_rate=settings.DISTILL_LEARNING_RATE,
+            random_state=settings.RANDOM_STATE
+        )
+        
+        student_pred = np.empty(len(y_test), dtype=np.int64)
+        confident = np.empty(len(y_test), dtype=bool)
+        for start in range(0, len(y_test), 8192):
+            probabilities = student.predict_proba(sparse.csr_matrix(np.asarray(X_test[start:start + 8192])))
+            student_pred[start:start + 8192] = student.classes_[probabilities.argmax(axis=1)]
+            confident[start:start + 8192] = probabilities.max(axis=1) >= settings.STUDENT_CONFIDENCE_THRESHOLD
+        served_pred = np.where(confident, student_pred, test_pred)
+        
+        return student, {
+            'student_accuracy': float(np.mean(student_pred == y_test)),
+            'student_agreement': float(np.mean(student_pred == test_pred)),
+            'student_coverage': float(np.mean(confident)),
+            'served_accuracy': float(np.mean(served_pred == y_test)),
+            'student_memory_mb': student.nbytes / (1024 * 1024),
+        }
+    
+    def _fit_in_memory(self, dataset: "EncodedDataset", report: Callable[[str], None]) -> Tuple:
+        """
+        Fit one forest on the first N_ROWS rows held in memory
+        
+        With FAST_EVALUATION the training set is scored from the forest's
+        out-of-bag predictions, gathered during fit, instead of predicting
+        every training row again.
+        
+        Returns:
+            (model, train rows, test rows, test predictions, rows used, training-set metrics)
+        """
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.model_selection import train_test_split
+        from app.ml.training import forest_params
+        
+        # Limit rows if dataset is large
+        n_rows = min(settings.N_ROWS, dataset.n_rows)
+        X = np.asarray(dataset.features[:n_rows])
+        y = dataset.labels[:n_rows]
+        logger.info(f"Using {n_rows} rows for training")
+        
+        # Split data (row indices, so the same rows can be reused for distillation)
+        report('splitting')
+        train_rows, test_rows = train_test_split(
+            np.arange(n_rows), 
+            test_size=settings.TEST_SIZE, 
+            random_state=settings.RANDOM_STATE
+        )
+        X_train, X_test, y_train = X[train_rows], X[test_rows], y[train_rows]
+        
+        logger.info(f"Training set: {len(X_train)} samples")
+        logger.info(f"Test set: {len(X_test)} samples")
         
-        if model_path is None:
-            model_path = settings.MODEL_PATH
-        if encoder_path is None:
-            encoder_path = settings.ENCODER_PATH
-        if symptom_index_path is None:
-            symptom_index_path = settings.SYMPTOM_INDEX_PATH
+        # Train Random Forest model
+        report('fitting')
+        logger.info(f"Training Random Forest with {settings.N_ESTIMATORS} estimators...")
+        model = RandomForestClassifier(
+            **forest_params(),
+            random_state=settings.RANDOM_STATE,
+            oob_score=settings.FAST_EVALUATION,
+            n_jobs=-1,
+            verbose=1
+        )
+        model.fit(X_train, y_train)
         
-        Path(model_path).parent.mkdir(parents=True, exist_ok=True)
+        # Evaluate
+        report('evaluating')
+        if settings.FAST_EVALUATION:
+            fit_metrics = {'oob_accuracy': model.oob_score_}
+            # Only needed for the score; it holds a float row per sample
+            del model.oob_decision_function_
+        else:
+            fit_metrics = {'train_accuracy': float(np.mean(model.predict(X_train) == y_train))}
+        test_pred = model.predict(X_test)
         
-        logger.info(f"Saving model to {model_path}")
-        joblib.dump(self.model, model_path, compress=3)
+        return model, train_rows, test_rows, test_pred, n_rows, fit_metrics
+    
+    def _fit_out_of_core(self, dataset: "EncodedDataset", report: Callable[[str], None]) -> Tuple:
+        """
+        Fit a forest on every row without exceeding TRAINING_MEMORY_BUDGET_MB
+        
+        The training rows are dealt into stratified shards small enough for
+        the budget, and each shard grows its share of the trees through
+        warm_start. Only one shard is materialized at a time; the rest of
+        the dataset stays in the memory-mapped cache. The budget covers the
+        training data, the trees themselves come on top of it.
+        
+        Out-of-bag scores are not available across warm-started shards, so
+        FAST_EVALUATION skips scoring the training rows.
+        
+        Returns:
+            (model, train rows, test rows, test predictions, rows used, training-set metrics)
+        """
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.model_selection import train_test_split
+        from app.ml.training import (
+            forest_params,
+            predict_in_chunks,
+            rows_per_prediction_chunk,
+            rows_per_shard,
+            stratified_shards,
+        )
+        
+        report('splitting')
+        train_rows, test_rows = train_test_split(
+            np.arange(dataset.n_rows),
+            test_size=settings.TEST_SIZE,
+            random_state=settings.RANDOM_STATE
+        )
+        logger.info(f"Training set: {len(train_rows)} samples")
+        logger.info(f"Test set: {len(test_rows)} samples")
+        
+        shard_rows = rows_per_shard(len(dataset.symptoms), settings.TRAINING_MEMORY_BUDGET_MB)
+        n_shards = math.ceil(len(train_rows) / shard_rows)
+        shards = stratified_shards(dataset.labels[train_rows], n_shards, settings.RANDOM_STATE)
+        if n_shards > settings.N_ESTIMATORS:
+            # Each shard needs at least one tree: subsample instead of blowing the budget
+            logger.warning(f"Memory budget needs {n_shards} shards but only {settings.N_ESTIMATORS} trees "
+                           f"are trained; using {settings.N_ESTIMATORS} stratified shards")
+            shards = shards[:settings.N_ESTIMATORS]
+        trees_per_shard = [len(part) for part in np.array_split(np.arange(settings.N_ESTIMATORS), len(shards))]
         
-        logger.info(f"Saving encoder to {encoder_path}")
-        joblib.dump(self.encoder, encoder_path, compress=3)
+        report('fitting')
+        logger.info(f"Training Random Forest with {settings.N_ESTIMATORS} estimators "
+                    f"on {len(shards)} shards of up to {shard_rows} rows...")
+        model = RandomForestClassifier(
+            **forest_params(n_estimators=0),
+            warm_start=True,
+            random_state=settings.RANDOM_STATE,
+            n_jobs=-1
+        )
+        for shard, (positions, n_trees) in enumerate(zip(shards, trees_per_shard)):
+            rows = train_rows[positions]
+            rows.sort()
+            model.set_params(n_estimators=model.n_estimators + n_trees)
+            model.fit(np.asarray(dataset.features[rows]), dataset.labels[rows])
+            logger.info(f"Shard {shard + 1}/{len(shards)}: {len(rows)} rows, {model.n_estimators} trees, "
+                        f"peak RSS {peak_rss_mb():.0f} MB")
+        
+        report('evaluating')
+        chunk_rows = rows_per_prediction_chunk(
+            len(dataset.symptoms), len(dataset.diseases), settings.TRAINING_MEMORY_BUDGET_MB
+        )
+        fit_metrics = {}
+        if not settings.FAST_EVALUATION:
+            train_pred = predict_in_chunks(model, dataset.features, train_rows, chunk_rows)
+            fit_metrics['train_accuracy'] = float(np.mean(train_pred == dataset.labels[train_rows]))
+        test_pred = predict_in_chunks(model, dataset.features, test_rows, chunk_rows)
+        
+        return model, train_rows, test_rows, test_pred, dataset.n_rows, fit_metrics
+    
+    def save_model(self, activate: bool = True) -> Dict[str, str]:
+        """
+        Publish the trained model as a new registry version
+        
+        Args:
+            activate: Mark the new version as the one to serve
+            
+        Returns:
+            Dictionary with the new version and its artifact directory
+        """
+        bundle = self._bundle
+        if bundle is None or bundle.model is None:
+            raise ValueError("Model must be trained before saving")
         
-        logger.info(f"Saving symptom index to {symptom_index_path}")
-        joblib.dump(self.symptom_index, symptom_index_path, compress=3)
+        version = self.registry.publish(bundle, activate=activate)
+        self._install(bundle.with_version(version, self.registry.read_metadata(version)))
+        self.active_version = self.registry.active_version()
         
         logger.info("Model saved successfully!")
         
         return {
-            'model_path': str(model_path),
-            'encoder_path': str(encoder_path),
-            'symptom_index_path': str(symptom_index_path)
+            'version': version,
+            'model_path': str(self.registry.path(version))
         }
     
-    def load_model(self, model_path: str = None, encoder_path: str = None,
-                   symptom_index_path: str = None) -> bool:
-        """Load trained model from disk"""
-        try:
-            if model_path is None:
-                model_path = settings.MODEL_PATH
-            if encoder_path is None:
-                encoder_path = settings.ENCODER_PATH
-            if symptom_index_path is None:
-                symptom_index_path = settings.SYMPTOM_INDEX_PATH
-            
-            if not Path(model_path).exists():
-                logger.warning(f"Model file not found: {model_path}")
-                return False
+    def load_model(self, version: str = None) -> bool:
+        """
+        Load a model version from the registry and swap it in atomically
+        
+        Args:
+            version: Version to load; defaults to the active version
             
-            logger.info(f"Loading model from {model_path}")
-            self.model = joblib.load(model_path)
+        Returns:
+            True if a model was loaded
+        """
+        with self._load_lock:
+            started = time.perf_counter()
+            kind = "reload" if self._bundle is not None else "load"
+            try:
+                bundle = self.registry.load(version)
+                if bundle is None:
+                    return False
+                
+                self._install(bundle)
+                self.active_version = self.registry.active_version()
+                MODEL_LOAD_SECONDS.labels(kind).observe(time.perf_counter() - started)
+                logger.info(f"Model loaded successfully!")
+                logger.info(f"Diseases: {len(bundle.encoder.classes_)}")
+                logger.info(f"Symptoms: {len(bundle.symptoms)}")
+                
+                return True
+                
+            except Exception as e:
+                MODEL_LOAD_FAILURES.inc()
+                logger.error(f"Failed to load model: {str(e)}")
+                return False
+    
+    def ensure_loaded(self) -> bool:
+        """
+        Load the active model unless one is already being served
+        
+        Concurrent callers share a single load: the first one loads while
+        the others wait on the lock and then find the model in place.
+        """
+        if self._bundle is not None:
+            return True
+        with self._load_lock:
+            if self._bundle is not None:
+                return True
+            return self.load_model()
+    
+    def warm_up(self, n_predictions: int = None) -> int:
+        """
+        Run throwaway predictions so the first request pays no first-call costs
+        
+        Exercises the student, the forest on the single-row and batch paths,
+        top-k ranking and the symptom matcher. The prediction cache, metrics
+        and student counters are left untouched.
+        
+        Args:
+            n_predictions: Rows to predict; defaults to MODEL_WARMUP_PREDICTIONS
             
-            logger.info(f"Loading encoder from {encoder_path}")
-            self.encoder = joblib.load(encoder_path)
+        Returns:
+            Number of rows predicted, 0 without a model
+        """
+        bundle = self._bundle
+        if n_predictions is None:
+            n_predictions = settings.MODEL_WARMUP_PREDICTIONS
+        if bundle is None or n_predictions <= 0:
+            return 0
+        
+        # Deterministic rows of three symptoms spread over the feature space
+        n_symptoms = len(bundle.symptoms)
+        rows = [sorted({(row * 7 + column * 13) % n_symptoms for column in range(3)})
+                for row in range(n_predictions)]
+        
+        if bundle.student is not None:
+            bundle.student.predict_proba_indices(rows)
+        for row in rows:
+            self._top_k(bundle, self._forest_proba(bundle, [row]))
+        self._top_k(bundle, self._forest_proba(bundle, rows))
+        bundle.matcher.match(bundle.symptoms[0][::-1])
+        
+        return n_predictions
+    
+    def sync_active_version(self) -> bool:
+        """
+        Follow the registry's active version when another process changed it
+        
+        With several API workers a training job or rollback only swaps the
+        model in the worker that handled the request; the others call this
+        periodically to pick up the new ACTIVE pointer, which is also kept
+        in active_version.
+        
+        Returns:
+            True if a different version was loaded
+        """
+        bundle = self._bundle
+        if bundle is None:
+            # Nothing served yet, ensure_loaded() will pick the active version
+            return False
+        active = self.active_version = self.registry.active_version()
+        if active is None or active == bundle.version:
+            return False
+        logger.info(f"Active model version changed to {active}, reloading")
+        return self.load_model(active)
+    
+    def rollback(self, version: str = None) -> str:
+        """
+        Re-activate an earlier model version and serve it
+        
+        Args:
+            version: Version to restore; defaults to the previously active one
             
-            logger.info(f"Loading symptom index from {symptom_index_path}")
-            self.symptom_index = joblib.load(symptom_index_path)
+        Returns:
+            The version now being served
+        """
+        with self._load_lock:
+            version = self.registry.rollback(version)
+            if not self.load_model(version):
+                raise ValueError(f"Failed to load model version {version}")
+            return version
+    
+    def activate(self, version: str):
+        """
+        Mark a version active in the registry and serve it
+        
+        Args:
+            version: Version to activate
+        """
+        with self._load_lock:
+            self.registry.activate(version)
+            if not self.load_model(version):
+                raise ValueError(f"Failed to load model version {version}")
+    
+    def _predict_proba_indices(self, bundle: ModelBundle, rows: List[List[int]],
+                               count: bool = True) -> np.ndarray:
+        """
+        Run the bundle's inference backend on rows of matched feature indices
+        
+        When the bundle has a distilled student it answers first; rows where
+        its top probability is below STUDENT_CONFIDENCE_THRESHOLD fall back
+        to the forest.
+        
+        Args:
+            bundle: Model bundle to evaluate
+            rows: One list of symptom indices per prediction
+            count: Record rows in the student and row-source counters
             
-            self.symptoms = sorted(self.symptom_index.keys(), key=lambda x: self.symptom_index[x])
+        Returns:
+            Array of shape (len(rows), n_classes)
+        """
+        if bundle.student is None or not settings.STUDENT_ENABLED:
+            if count:
+                _FOREST_ROWS.inc(len(rows))
+            return self._forest_proba(bundle, rows)
+        
+        probabilities = bundle.student.predict_proba_indices(rows)
+        uncertain = np.flatnonzero(probabilities.max(axis=1) < settings.STUDENT_CONFIDENCE_THRESHOLD)
+        if len(uncertain):
+            probabilities[uncertain] = self._forest_proba(bundle, [rows[row] for row in uncertain])
+        if not count:
+            return probabilities
+        
+        with self._student_lock:
+            self.student_answers += len(rows) - len(uncertain)
+            self.student_fallbacks += len(uncertain)
+        _STUDENT_ROWS.inc(len(rows) - len(uncertain))
+        _FOREST_ROWS.inc(len(uncertain))
+        return probabilities
+    
+    def _forest_proba(self, bundle: ModelBundle, rows: List[List[int]]) -> np.ndarray:
+        """Evaluate the forest (compiled or sklearn) on rows of feature indices"""
+        if bundle.compiled is not None:
+            return bundle.compiled.predict_proba_indices(rows)
+        
+        n_features = len(bundle.symptom_index)
+        if len(rows) == 1:
+            input_vector = self._input_buffer(n_features)
+            input_vector[0, rows[0]] = 1
+            try:
+                return bundle.model.predict_proba(input_vector)
+            finally:
+                input_vector[0, rows[0]] = 0
+        
+        input_matrix = np.zeros((len(rows), n_features), dtype=np.float32)
+        for row, indices in enumerate(rows):
+            input_matrix[row, indices] = 1
+        return bundle.model.predict_proba(input_matrix)
+    
+    def _input_buffer(self, n_features: int) -> np.ndarray:
+        """Return this thread's preallocated single-row input buffer"""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or buffer.shape[1] != n_features:
+            # float32 is the dtype the forest converts to, so no copy is made
+            buffer = np.zeros((1, n_features), dtype=np.float32)
+            self._local.buffer = buffer
+        return buffer
+    
+    def _top_k(self, bundle: ModelBundle, probabilities: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rank the top-k classes of each row
+        
+        Args:
+            bundle: Model bundle that produced the probabilities
+            probabilities: Array of shape (n_rows, n_classes)
             
-            self.is_trained = True
-            logger.info(f"Model loaded successfully!")
-            logger.info(f"Diseases: {len(self.encoder.classes_)}")
-            logger.info(f"Symptoms: {len(self.symptoms)}")
+        Returns:
+            Tuple of (disease names, probabilities), both of shape (n_rows, k)
+        """
+        k = min(settings.TOP_K_PREDICTIONS, probabilities.shape[1])
+        if k < probabilities.shape[1]:
+            candidates = np.argpartition(-probabilities, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(probabilities.shape[1]), probabilities.shape)
+        
+        candidate_probabilities = np.take_along_axis(probabilities, candidates, axis=1)
+        order = np.argsort(-candidate_probabilities, axis=1, kind='stable')
+        top_indices = np.take_along_axis(candidates, order, axis=1)
+        
+        return bundle.class_names[top_indices], np.take_along_axis(probabilities, top_indices, axis=1)
+    
+    def _rank(self, bundle: ModelBundle, rows: List[List[int]]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Top-k diseases for rows of matched feature indices, using the cache
+        
+        Rows are keyed on the model version plus the sorted, de-duplicated
+        symptom indices, so any spelling or ordering of the same symptom
+        set hits the same entry. Only cache misses reach the model, as one
+        stacked predict_proba call.
+        
+        Args:
+            bundle: Model bundle to evaluate
+            rows: One list of symptom indices per prediction
             
-            return True
+        Returns:
+            One (disease names, probabilities) pair per row
+        """
+        model_key = (bundle.version, bundle.token)
+        keys = [(model_key, tuple(sorted(set(indices)))) for indices in rows]
+        if self.cache.enabled:
+            ranked = [self.cache.get(key) for key in keys]
+        else:
+            ranked = [None] * len(rows)
+        
+        missing = [position for position, entry in enumerate(ranked) if entry is None]
+        if len(missing) < len(rows):
+            _CACHE_ROWS.inc(len(rows) - len(missing))
+        if missing:
+            started = time.perf_counter()
+            probabilities = self._predict_proba_indices(bundle, [list(keys[position][1]) for position in missing])
+            predicted = time.perf_counter()
+            top_names, top_probabilities = self._top_k(bundle, probabilities)
+            _PREDICT_PROBA_SECONDS.observe(predicted - started)
+            _TOP_K_SECONDS.observe(time.perf_counter() - predicted)
             
-        except Exception as e:
-            logger.error(f"Failed to load model: {str(e)}")
-            return False
-    
-    def predict(self, input_symptoms: List[str]) -> Dict:
-        """Predict disease from input symptoms"""
-        if not self.is_trained or self.model is None:
-            raise ValueError("Model not loaded. Please train or load a model first.")
+            for row, position in enumerate(missing):
+                ranked[position] = (top_names[row].copy(), top_probabilities[row].copy())
+                self.cache.put(keys[position], ranked[position])
         
-        if not input_symptoms:
-            raise ValueError("Please provide at least one symptom")
+        return ranked
+    
+    def _vectorize(self, bundle: ModelBundle, input_symptoms: List[str],
+                   count: bool = True) -> Tuple[List[int], List[str], List[str], Dict[str, str]]:
+        """
+        Map normalized symptom strings onto feature indices
         
-        input_vector = [0] * len(self.symptom_index)
+        Exact names are looked up directly. With FUZZY_MATCHING_ENABLED the
+        rest go through the bundle's symptom matcher and are accepted when
+        its confidence reaches FUZZY_MATCH_THRESHOLD.
+
+        Args:
+            bundle: Model bundle whose symptom index is used
+            input_symptoms: Symptom names from _normalize()
+            count: Record the outcome in the symptom match counters
+
+        Returns:
+            Tuple of (feature indices, matched symptoms, unmatched symptoms,
+            corrections mapping submitted text to the matched symptom)
+        """
+        indices = []
         matched_symptoms = []
         unmatched_symptoms = []
+        corrections = {}
         
         for symptom in input_symptoms:
-            symptom = symptom.strip().lower()
-            if symptom in self.symptom_index:
-                input_vector[self.symptom_index[symptom]] = 1
+            if symptom in bundle.symptom_index:
+                indices.append(bundle.symptom_index[symptom])
                 matched_symptoms.append(symptom)
+                continue
+            
+            resolved = bundle.matcher.resolve(symptom) if settings.FUZZY_MATCHING_ENABLED else None
+            if resolved is not None and resolved[1] >= settings.FUZZY_MATCH_THRESHOLD:
+                indices.append(resolved[0])
+                matched_symptoms.append(bundle.symptoms[resolved[0]])
+                corrections[symptom] = bundle.symptoms[resolved[0]]
             else:
                 unmatched_symptoms.append(symptom)
         
-        if not matched_symptoms:
-            raise ValueError("None of the provided symptoms are recognized")
-        
-        input_df = pd.DataFrame([input_vector], columns=self.symptoms)
-        
-        prediction = self.model.predict(input_df)[0]
-        disease_name = self.encoder.inverse_transform([prediction])[0]
-        
-        probabilities = self.model.predict_proba(input_df)[0]
-        
-        top_indices = np.argsort(probabilities)[-3:][::-1]
+        if not count:
+            return indices, matched_symptoms, unmatched_symptoms, corrections
+        _MATCHED_SYMPTOMS.inc(len(matched_symptoms) - len(corrections))
+        if corrections:
+            _CORRECTED_SYMPTOMS.inc(len(corrections))
+        if unmatched_symptoms:
+            _UNMATCHED_SYMPTOMS.inc(len(unmatched_symptoms))
+        return indices, matched_symptoms, unmatched_symptoms, corrections
+    
+    @staticmethod
+    def _normalize(input_symptoms: List[str]) -> List[str]:
+        """Symptoms as submitted, trimmed and lowercased"""
+        return [symptom.strip().lower() for symptom in input_symptoms]
+    
+    def _build_result(self, top_names: List[str], top_probabilities: np.ndarray,
+                      matched_symptoms: List[str], unmatched_symptoms: List[str],
+                      corrections: Dict[str, str]) -> Dict:
+        """Assemble the prediction payload from the ranked top-k diseases"""
         top_predictions = [
             {
-                'disease': self.encoder.inverse_transform([idx])[0],
-                'confidence': float(probabilities[idx])
+                'disease': str(name),
+                'confidence': float(probability)
             }
-            for idx in top_indices
+            for name, probability in zip(top_names, top_probabilities)
         ]
         
-        result = {
-            'disease': disease_name,
-            'confidence': float(max(probabilities)),
+        return {
+            'disease': top_predictions[0]['disease'],
+            'confidence': top_predictions[0]['confidence'],
             'alternative_diseases': top_predictions[1:] if len(top_predictions) > 1 else [],
             'matched_symptoms': matched_symptoms,
             'unmatched_symptoms': unmatched_symptoms,
+            'corrected_symptoms': corrections,
             'total_symptoms': len(matched_symptoms)
         }
+    
+    def predict(self, input_symptoms: List[str]) -> Dict:
+        """Predict disease from input symptoms"""
+        # Read the bundle once so a concurrent reload cannot mix versions
+        bundle = self._bundle
+        if bundle is None:
+            raise ValueError("Model not loaded. Please train or load a model first.")
         
-        logger.info(f"Prediction: {disease_name} (confidence: {result['confidence']:.2%})")
+        if not input_symptoms:
+            _REJECTED.inc()
+            raise ValueError("Please provide at least one symptom")
+        
+        started = time.perf_counter()
+        symptoms = self._normalize(input_symptoms)
+        normalized = time.perf_counter()
+        indices, matched_symptoms, unmatched_symptoms, corrections = self._vectorize(bundle, symptoms)
+        _NORMALIZE_SECONDS.observe(normalized - started)
+        _VECTORIZE_SECONDS.observe(time.perf_counter() - normalized)
+        
+        if not matched_symptoms:
+            _REJECTED.inc()
+            raise ValueError("None of the provided symptoms are recognized")
+        
+        top_names, top_probabilities = self._rank(bundle, [indices])[0]
+        
+        started = time.perf_counter()
+        result = self._build_result(top_names, top_probabilities, matched_symptoms, unmatched_symptoms, corrections)
+        _SERIALIZE_SECONDS.observe(time.perf_counter() - started)
+        _PREDICTED.inc()
         
         return result
     
+    def predict_batch(self, symptom_sets: List[List[str]]) -> List[Dict]:
+        """
+        Predict diseases for many symptom lists with a single model call
+        
+        All valid rows are stacked into one matrix so the forest is evaluated
+        once per batch instead of once per symptom list.
+        
+        Args:
+            symptom_sets: List of symptom lists
+            
+        Returns:
+            One entry per input list, in order. Rows that cannot be predicted
+            contain only an 'error' key.
+        """
+        # Read the bundle once so a concurrent reload cannot mix versions
+        bundle = self._bundle
+        if bundle is None:
+            raise ValueError("Model not loaded. Please train or load a model first.")
+        
+        results: List[Optional[Dict]] = [None] * len(symptom_sets)
+        rows = []
+        # Stages are observed once per batch, like the single model call
+        normalize_seconds = vectorize_seconds = 0.0
+        
+        for position, input_symptoms in enumerate(symptom_sets):
+            if not input_symptoms:
+                results[position] = {'error': "Please provide at least one symptom"}
+                continue
+            
+            started = time.perf_counter()
+            symptoms = self._normalize(input_symptoms)
+            normalized = time.perf_counter()
+            indices, matched_symptoms, unmatched_symptoms, corrections = self._vectorize(bundle, symptoms)
+            normalize_seconds += normalized - started
+            vectorize_seconds += time.perf_counter() - normalized
+            if not matched_symptoms:
+                results[position] = {'error': "None of the provided symptoms are recognized"}
+                continue
+            
+            rows.append((position, indices, matched_symptoms, unmatched_symptoms, corrections))
+        
+        _NORMALIZE_SECONDS.observe(normalize_seconds)
+        _VECTORIZE_SECONDS.observe(vectorize_seconds)
+        
+        if rows:
+            ranked = self._rank(bundle, [indices for _, indices, _, _, _ in rows])
+            
+            started = time.perf_counter()
+            for (position, _, matched_symptoms, unmatched_symptoms, corrections), (top_names, top_probabilities) in zip(rows, ranked):
+                results[position] = self._build_result(
+                    top_names, top_probabilities, matched_symptoms, unmatched_symptoms, corrections
+                )
+            _SERIALIZE_SECONDS.observe(time.perf_counter() - started)
+        
+        _PREDICTED.inc(len(rows))
+        if len(rows) < len(symptom_sets):
+            _REJECTED.inc(len(symptom_sets) - len(rows))
+        logger.debug(f"Batch prediction: {len(rows)} predicted, {len(symptom_sets) - len(rows)} rejected")
+        
+        return results
+    
+    def student_stats(self) -> Dict:
+        """How often the distilled student answered and how often it fell back to the forest"""
+        bundle = self._bundle
+        with self._student_lock:
+            answers, fallbacks = self.student_answers, self.student_fallbacks
+        total = answers + fallbacks
+        return {
+            'enabled': settings.STUDENT_ENABLED,
+            'loaded': bundle is not None and bundle.student is not None,
+            'confidence_threshold': settings.STUDENT_CONFIDENCE_THRESHOLD,
+            'answers': answers,
+            'fallbacks': fallbacks,
+            'answer_rate': round(answers / total, 4) if total else 0.0,
+        }
+    
+    def drain_stats(self) -> Dict:
+        """
+        Take the metrics, cache and student counters recorded since the last call
+
+        Inference worker processes return this with every result so the
+        API process can merge_stats() it; their own counters are never
+        served.
+        """
+        with self._student_lock:
+            student = (self.student_answers, self.student_fallbacks)
+            self.student_answers = self.student_fallbacks = 0
+        return {'metrics': REGISTRY.drain(), 'cache': self.cache.drain_counts(), 'student': student}
+    
+    def merge_stats(self, stats: Dict):
+        """Add counters drain_stats()ed in an inference worker process"""
+        REGISTRY.merge(stats['metrics'])
+        self.cache.merge_counts(stats['cache'])
+        answers, fallbacks = stats['student']
+        with self._student_lock:
+            self.student_answers += answers
+            self.student_fallbacks += fallbacks
+    
+    def related_symptoms(self, input_symptoms: List[str], limit: int = 5) -> Dict:
+        """
+        Suggest the symptoms worth asking about next
+        
+        Ranks unreported symptoms by expected information gain about the
+        disease, using the co-occurrence index built at training time.
+        
+        Args:
+            input_symptoms: Symptoms reported so far
+            limit: Number of suggestions
+            
+        Returns:
+            Dictionary with matched/unmatched symptoms and the suggestions
+        """
+        bundle = self._bundle
+        if bundle is None:
+            raise ValueError("Model not loaded. Please train or load a model first.")
+        if bundle.cooccurrence is None:
+            raise ValueError("This model version has no co-occurrence index, retrain to build one")
+        
+        if not input_symptoms:
+            raise ValueError("Please provide at least one symptom")
+        
+        indices, matched_symptoms, unmatched_symptoms, _ = self._vectorize(bundle, self._normalize(input_symptoms))
+        if not matched_symptoms:
+            raise ValueError("None of the provided symptoms are recognized")
+        
+        suggestions = bundle.cooccurrence.suggest(sorted(set(indices)), limit)
+        for suggestion in suggestions:
+            suggestion['symptom'] = bundle.symptoms[suggestion.pop('index')]
+        
+        return {
+            'matched_symptoms': matched_symptoms,
+            'unmatched_symptoms': unmatched_symptoms,
+            'suggestions': suggestions
+        }
+    
+    def disease_profile(self, disease: str, top_k: int = None) -> Dict:
+        """
+        Symptom profile of a disease from the training data
+        
+        Args:
+            disease: Disease name, case-insensitive
+            top_k: Characteristic symptoms to include
+            
+        Returns:
+            Dictionary with the disease's share of the training rows and its
+            most prevalent symptoms with prevalence, lift and importance
+            
+        Raises:
+            KeyError: If the disease is unknown
+        """
+        bundle = self._bundle
+        if bundle is None:
+            raise ValueError("Model not loaded. Please train or load a model first.")
+        if bundle.profiles is None:
+            raise ValueError("This model version has no disease profiles, retrain to build them")
+        return bundle.profiles.profile(disease, top_k)
+    
+    def search_symptoms(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Autocomplete and fuzzy search over the known symptoms
+        
+        Args:
+            query: Partial or misspelled symptom text
+            limit: Most symptoms to return
+            
+        Returns:
+            Matches with symptom, confidence and match type, best first
+        """
+        bundle = self._bundle
+        if bundle is None:
+            raise ValueError("Model not loaded. Please train or load a model first.")
+        
+        matches = bundle.matcher.search(query, limit)
+        for match in matches:
+            del match['index']
+        return matches
+    
     def get_all_symptoms(self) -> List[str]:
         """Get list of all available symptoms"""
         if self.symptoms is None:
             raise ValueError("Model not loaded")
         return self.symptoms
     
-    def get_model_info(self) -> Dict:
-        """Get model information"""
-        if not self.is_trained:
+    def get_model_info(self, bundle: ModelBundle = None) -> Dict:
+        """
+        Get model information
+        
+        Args:
+            bundle: Bundle to describe; defaults to the one being served
+            
+        Returns:
+            Model statistics and configuration
+        """
+        if bundle is None:
+            bundle = self._bundle
+        if bundle is None:
             return {
                 'is_trained': False,
                 'message': 'Model not loaded'
@@ -269,13 +1124,58 @@ class DiseasePredictor:
         
         return {
             'is_trained': True,
-            'n_diseases': len(self.encoder.classes_),
-            'n_symptoms': len(self.symptoms),
+            'n_diseases': len(bundle.encoder.classes_),
+            'n_symptoms': len(bundle.symptoms),
             'model_type': 'Random Forest',
-            'n_estimators': settings.N_ESTIMATORS,
-            'model_version': settings.MODEL_VERSION
+            'n_estimators': bundle.n_estimators,
+            'inference_backend': bundle.backend,
+            'student': bundle.student is not None and settings.STUDENT_ENABLED,
+            'model_version': bundle.version,
+            'created_at': bundle.metadata.get('created_at'),
+            'active_version': self.active_version
         }
 
 
 # Global predictor instance
 predictor = DiseasePredictor()
+
+
+def _served_model() -> Dict:
+    bundle = predictor.bundle
+    return {(bundle.version, bundle.backend): 1} if bundle is not None else {}
+
+
+def _symptom_match_ratio() -> float:
+    matched = _MATCHED_SYMPTOMS.value + _CORRECTED_SYMPTOMS.value
+    total = matched + _UNMATCHED_SYMPTOMS.value
+    return matched / total if total else 0.0
+
+
+Gauge("model_info", "Model version and backend being served, always 1", ("version", "backend"),
+      function=_served_model)
+Gauge("model_loaded", "1 while a model is being served", function=lambda: predictor.is_trained)
+Gauge("prediction_symptom_match_ratio", "Share of submitted symptoms matched, exactly or corrected",
+      function=_symptom_match_ratio)
+Gauge("prediction_cache_entries", "Entries in the prediction cache", function=lambda: predictor.cache.stats()['size'])
+Counter("prediction_cache_hits_total", "Prediction cache hits", function=lambda: predictor.cache.hits)
+Counter("prediction_cache_misses_total", "Prediction cache misses", function=lambda: predictor.cache.misses)
+
+
+def predict_symptoms(input_symptoms: List[str]) -> Dict:
+    """Predict with the global predictor (picklable entry point for worker pools)"""
+    return predictor.predict(input_symptoms)
+
+
+def predict_symptom_sets(symptom_sets: List[List[str]]) -> List[Dict]:
+    """Batch predict with the global predictor (picklable entry point for worker pools)"""
+    return predictor.predict_batch(symptom_sets)
+
+
+def search_symptom_names(query: str, limit: int) -> List[Dict]:
+    """Symptom autocomplete with the global predictor (picklable entry point for worker pools)"""
+    return predictor.search_symptoms(query, limit)
+
+
+def related_symptom_suggestions(input_symptoms: List[str], limit: int) -> Dict:
+    """Next-symptom suggestions with the global predictor (picklable entry point for worker pools)"""
+    return predictor.related_symptoms(input_symptoms, limit)
@@ -0,0 +1,185 @@
+"""
+Disease profiles
+Per-disease symptom prevalence, characteristic symptoms and forest feature
+importances, derived once at training time and served from the registry
+"""
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+PROFILES_FORMAT = "profiles-v1"
+# Rows with this many symptoms or more share the last symptoms-per-row bin
+SYMPTOM_COUNT_BINS = 32
+
+
+@dataclass(frozen=True)
+class DiseaseProfiles:
+    """
+    Symptom statistics of every disease
+
+    symptom_counts[d, s] counts training rows of disease d with symptom s;
+    prevalence is that count over the disease's rows. top_symptoms holds,
+    per disease, the column indices of its most prevalent symptoms, best
+    first. Counts are kept so profiles over new rows can be merged in.
+    symptoms_per_row[k] counts rows with k symptoms (the last bin holds
+    SYMPTOM_COUNT_BINS - 1 or more); it is None for profiles saved before
+    the histogram was recorded.
+    """
+    diseases: np.ndarray
+    symptoms: np.ndarray
+    disease_counts: np.ndarray
+    symptom_counts: np.ndarray
+    prevalence: np.ndarray
+    top_symptoms: np.ndarray
+    symptoms_per_row: Optional[np.ndarray] = None
+    feature_importances: Optional[np.ndarray] = None
+
+    def __post_init__(self):
+        # Lookup tables for profile(), kept outside the (frozen) fields
+        n_rows = max(int(self.disease_counts.sum()), 1)
+        object.__setattr__(self, '_positions', {str(name).lower(): position
+                                                for position, name in enumerate(self.diseases)})
+        object.__setattr__(self, '_overall', np.asarray(self.symptom_counts.sum(axis=0)) / n_rows)
+        object.__setattr__(self, '_n_rows', n_rows)
+
+    @classmethod
+    def from_counts(cls, diseases, symptoms, disease_counts: np.ndarray, symptom_counts: np.ndarray,
+                    symptoms_per_row: Optional[np.ndarray], feature_importances: Optional[np.ndarray] = None,
+                    top_k: int = 10) -> "DiseaseProfiles":
+        """
+        Derive prevalence and top-k symptoms for all diseases at once
+
+        Args:
+            diseases: Disease names, one per count row
+            symptoms: Symptom names, one per count column
+            disease_counts: Rows per disease
+            symptom_counts: Rows per disease with each symptom
+            symptoms_per_row: Rows per number of symptoms, SYMPTOM_COUNT_BINS bins, if known
+            feature_importances: Forest importance of each symptom, if known
+            top_k: Characteristic symptoms kept per disease
+
+        Returns:
+            DiseaseProfiles
+        """
+        disease_counts = np.asarray(disease_counts, dtype=np.int64)
+        symptom_counts = np.asarray(symptom_counts, dtype=np.int64)
+        prevalence = (symptom_counts / np.maximum(disease_counts, 1)[:, None]).astype(np.float32)
+
+        top_k = min(top_k, prevalence.shape[1])
+        top = np.argpartition(-prevalence, top_k - 1, axis=1)[:, :top_k]
+        order = np.argsort(-np.take_along_axis(prevalence, top, axis=1), axis=1, kind='stable')
+
+        return cls(
+            diseases=np.asarray(diseases, dtype=object),
+            symptoms=np.asarray(symptoms, dtype=object),
+            disease_counts=disease_counts,
+            symptom_counts=symptom_counts,
+            prevalence=prevalence,
+            top_symptoms=np.take_along_axis(top, order, axis=1).astype(np.int32),
+            symptoms_per_row=(None if symptoms_per_row is None
+                              else np.asarray(symptoms_per_row, dtype=np.int64)),
+            feature_importances=(None if feature_importances is None
+                                 else np.asarray(feature_importances, dtype=np.float32)),
+        )
+
+    def merged(self, other: "DiseaseProfiles",
+               feature_importances: Optional[np.ndarray] = None) -> "DiseaseProfiles":
+        """Profiles over the rows of both, with the given (newer) importances"""
+        # A histogram over only part of the rows would misstate the training profile
+        per_row = (None if self.symptoms_per_row is None or other.symptoms_per_row is None
+                   else self.symptoms_per_row + other.symptoms_per_row)
+        if other.symptom_counts.shape != self.symptom_counts.shape:
+            raise ValueError("Disease profiles cover different diseases or symptoms")
+        return DiseaseProfiles.from_counts(
+            self.diseases, self.symptoms,
+            self.disease_counts + other.disease_counts,
+            self.symptom_counts + other.symptom_counts,
+            per_row,
+            feature_importances if feature_importances is not None else self.feature_importances,
+            top_k=self.top_symptoms.shape[1],
+        )
+
+    def profile(self, disease: str, top_k: int = None) -> Dict:
+        """
+        Profile of one disease
+
+        Args:
+            disease: Disease name, case-insensitive
+            top_k: Characteristic symptoms to include, at most the stored number
+
+        Returns:
+            Dictionary with row counts and the top symptoms with their
+            prevalence, lift over the overall prevalence and importance
+
+        Raises:
+            KeyError: If the disease is unknown
+        """
+        position = self._positions.get(disease.strip().lower())
+        if position is None:
+            raise KeyError(f"Unknown disease: {disease}")
+
+        columns = self.top_symptoms[position][:top_k]
+        top_symptoms = []
+        for column in columns:
+            prevalence = float(self.prevalence[position, column])
+            if prevalence == 0:
+                break
+            top_symptoms.append({
+                'symptom': str(self.symptoms[column]),
+                'prevalence': prevalence,
+                'lift': prevalence / float(self._overall[column]),
+                'importance': (float(self.feature_importances[column])
+                               if self.feature_importances is not None else None),
+            })
+
+        return {
+            'disease': str(self.diseases[position]),
+            'n_rows': int(self.disease_counts[position]),
+            'share': int(self.disease_counts[position]) / self._n_rows,
+            'n_symptoms_seen': int(np.count_nonzero(self.symptom_counts[position])),
+            'top_symptoms': top_symptoms,
+        }
+
+    def save(self, directory: Path):
+        """Write the arrays as .npy files plus a JSON header with the names"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "disease_counts.npy", self.disease_counts)
+        np.save(directory / "symptom_counts.npy", self.symptom_counts)
+        np.save(directory / "prevalence.npy", self.prevalence)
+        np.save(directory / "top_symptoms.npy", self.top_symptoms)
+        if self.symptoms_per_row is not None:
+            np.save(directory / "symptoms_per_row.npy", self.symptoms_per_row)
+        if self.feature_importances is not None:
+            np.save(directory / "feature_importances.npy", self.feature_importances)
+        with open(directory / "meta.json", "w") as f:
+            json.dump({'format': PROFILES_FORMAT, 'diseases': [str(name) for name in self.diseases],
+                       'symptoms': [str(name) for name in self.symptoms]}, f)
+
+    @classmethod
+    def load(cls, directory: Path, mmap_mode: Optional[str] = None) -> "DiseaseProfiles":
+        """Load profiles written by save(), optionally memory-mapping the matrices"""
+        directory = Path(directory)
+        with open(directory / "meta.json") as f:
+            meta = json.load(f)
+        if meta.get('format') != PROFILES_FORMAT:
+            raise ValueError(f"Unsupported disease profiles format: {meta.get('format')}")
+        importances = directory / "feature_importances.npy"
+        per_row = directory / "symptoms_per_row.npy"
+        return cls(
+            diseases=np.asarray(meta['diseases'], dtype=object),
+            symptoms=np.asarray(meta['symptoms'], dtype=object),
+            disease_counts=np.load(directory / "disease_counts.npy"),
+            symptom_counts=np.load(directory / "symptom_counts.npy", mmap_mode=mmap_mode),
+            prevalence=np.load(directory / "prevalence.npy", mmap_mode=mmap_mode),
+            top_symptoms=np.load(directory / "top_symptoms.npy"),
+            symptoms_per_row=np.load(per_row) if per_row.exists() else None,
+            feature_importances=np.load(importances) if importances.exists() else None,
+        )
+
+    @staticmethod
+    def exists(directory: Path) -> bool:
+        return (Path(directory) / "meta.json").exists()
@@ -0,0 +1,511 @@
+"""
+Model Registry
+Versioned model artifacts and immutable, atomically swappable model bundles
+"""
+import hashlib
+import itertools
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import logging
+
+import joblib
+import numpy as np
+
+from app.core.config import settings
+from app.ml.compiled import CompiledForest
+from app.ml.cooccurrence import CooccurrenceIndex
+from app.ml.distill import LinearStudent
+from app.ml.matcher import SymptomMatcher, load_synonyms
+from app.ml.profiles import DiseaseProfiles
+
+logger = logging.getLogger(__name__)
+
+_bundle_tokens = itertools.count(1)
+
+ARTIFACT_FORMAT = "bundle-v1"
+
+# Version directories are "v" plus a number, zero-padded to four digits until v9999
+VERSION_PATTERN = re.compile(r"v\d+")
+
+
+class VersionPrunedError(ValueError):
+    """Raised when a rollback target was published but its artifacts have been pruned"""
+
+    def __init__(self, version: str):
+        self.version = version
+        super().__init__(
+            f"Model version {version} was pruned from the registry and cannot be restored; "
+            f"roll back to a version listed by /api/v1/train/versions"
+        )
+
+
+def _array_estimator(model):
+    """
+    Drop the feature names of an estimator fitted on a DataFrame
+
+    Inference passes NumPy rows whose column order comes from the symptom
+    index. Without this, sklearn warns on every call that X has no
+    feature names. Only the baseline pickles were fitted on DataFrames.
+    """
+    if hasattr(model, 'feature_names_in_'):
+        del model.feature_names_in_
+    return model
+
+
+def _sha256(path: Path) -> str:
+    """Hex SHA-256 of a file, read in 1 MB chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """
+    Everything needed to serve one model version
+
+    Bundles are never mutated. A prediction reads the current bundle once
+    and uses it throughout, so a concurrent reload can never pair a new
+    model with an old encoder or symptom index.
+    """
+    version: str
+    encoder: Any
+    symptom_index: Dict[str, int]
+    symptoms: List[str]
+    class_names: np.ndarray
+    model: Any = None
+    compiled: Optional[CompiledForest] = None
+    student: Optional[LinearStudent] = None
+    cooccurrence: Optional[CooccurrenceIndex] = None
+    matcher: Optional[SymptomMatcher] = None
+    profiles: Optional[DiseaseProfiles] = None
+    metadata: Dict = field(default_factory=dict)
+    token: int = field(default_factory=lambda: next(_bundle_tokens), compare=False)
+
+    @classmethod
+    def build(cls, version: str, model, encoder, symptom_index: Dict[str, int],
+              compiled: Optional[CompiledForest] = None, metadata: Dict = None,
+              student: Optional[LinearStudent] = None,
+              cooccurrence: Optional[CooccurrenceIndex] = None,
+              profiles: Optional[DiseaseProfiles] = None) -> "ModelBundle":
+        """
+        Assemble a bundle ready for inference with the configured backend
+
+        Probability columns follow the estimator's classes_ (encoded
+        labels), so disease names are resolved here once instead of per
+        prediction. The fuzzy symptom matcher is built here too.
+        """
+        if settings.INFERENCE_BACKEND == "compiled":
+            if compiled is None:
+                compiled = CompiledForest.from_sklearn(model, binary_inputs=True)
+        elif model is None:
+            raise ValueError("The sklearn inference backend requires the fitted estimator")
+        else:
+            compiled = None
+
+        if model is not None:
+            # Single-row calls are dominated by joblib dispatch when n_jobs != 1
+            model.set_params(n_jobs=settings.INFERENCE_N_JOBS, verbose=0)
+
+        classes = compiled.classes_ if compiled is not None else model.classes_
+        symptoms = sorted(symptom_index.keys(), key=lambda x: symptom_index[x])
+
+        return cls(
+            version=version,
+            encoder=encoder,
+            symptom_index=symptom_index,
+            symptoms=symptoms,
+            class_names=encoder.classes_[np.asarray(classes, dtype=np.intp)],
+            model=model,
+            compiled=compiled,
+            student=student,
+            cooccurrence=cooccurrence,
+            matcher=SymptomMatcher(symptoms, load_synonyms(settings.SYMPTOM_SYNONYMS_FILE)),
+            profiles=profiles,
+            metadata=dict(metadata or {}),
+        )
+
+    def with_version(self, version: str, metadata: Dict = None) -> "ModelBundle":
+        """Copy of this bundle under a new version (and a new cache token)"""
+        return replace(
+            self,
+            version=version,
+            metadata=dict(metadata if metadata is not None else self.metadata),
+            token=next(_bundle_tokens)
+        )
+
+    @property
+    def backend(self) -> str:
+        return 'compiled' if self.compiled is not None else 'sklearn'
+
+    @property
+    def n_estimators(self) -> int:
+        if self.compiled is not None:
+            return self.compiled.n_trees
+        return len(self.model.estimators_)
+
+
+class ModelRegistry:
+    """
+    Versioned model artifacts on disk
+
+    Each version lives in its own directory under the registry root. The
+    ACTIVE file names the version to serve plus the activation history
+    used for rollback, and is replaced atomically on every change. Old
+    versions are pruned, except the active one, the previously active one
+    (the default rollback target) and any version pinned in this process.
+
+    Versions are written in the bundle-v1 format: uncompressed artifacts
+    plus a manifest with a SHA-256 per file. The compiled forest's .npy
+    arrays are memory-mapped on load, so startup skips decompression and
+    unpickling, and every process serving the same version shares the
+    pages through the OS page cache.
+    """
+
+    ACTIVE_FILE = "ACTIVE"
+    METADATA_FILE = "metadata.json"
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(self, root: str = None):
+        self.root = Path(root or settings.MODEL_REGISTRY_PATH)
+        self._lock = threading.Lock()
+        self._pinned: Dict[str, int] = {}
+
+    def path(self, version: str) -> Path:
+        """Directory holding a version's artifacts"""
+        return self.root / version
+
+    def versions(self) -> List[str]:
+        """All complete versions, oldest first"""
+        if not self.root.exists():
+            return []
+        return sorted(
+            (entry.name for entry in self.root.iterdir()
+             if VERSION_PATTERN.fullmatch(entry.name) and entry.is_dir()
+             and (entry / self.METADATA_FILE).exists()),
+            key=lambda version: int(version[1:])
+        )
+
+    def list_versions(self) -> List[Dict]:
+        """Metadata of all versions, newest first, with the active one flagged"""
+        active = self.active_version()
+        listing = []
+        for version in reversed(self.versions()):
+            metadata = self.read_metadata(version)
+            metadata['active'] = version == active
+            listing.append(metadata)
+        return listing
+
+    def read_metadata(self, version: str) -> Dict:
+        """Read a version's metadata.json"""
+        with open(self.path(version) / self.METADATA_FILE) as f:
+            return json.load(f)
+
+    def _read_pointer(self) -> Dict:
+        pointer = self.root / self.ACTIVE_FILE
+        if not pointer.exists():
+            return {'version': None, 'history': []}
+        with open(pointer) as f:
+            return json.load(f)
+
+    def _write_pointer(self, state: Dict):
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".active-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.root / self.ACTIVE_FILE)
+
+    def _was_published(self, version: str) -> bool:
+        """Whether a missing version once existed; numbers are never reused"""
+        existing = self.versions()
+        if not existing or not VERSION_PATTERN.fullmatch(version):
+            return False
+        return 1 <= int(version[1:]) <= int(existing[-1][1:])
+
+    def pin(self, version: str):
+        """Keep a version from being pruned until unpin() is called as often"""
+        with self._lock:
+            self._pinned[version] = self._pinned.get(version, 0) + 1
+
+    def unpin(self, version: str):
+        """Release one pin() of a version"""
+        with self._lock:
+            remaining = self._pinned.get(version, 0) - 1
+            if remaining > 0:
+                self._pinned[version] = remaining
+            else:
+                self._pinned.pop(version, None)
+
+    def active_version(self) -> Optional[str]:
+        """Version currently marked active, if any"""
+        return self._read_pointer()['version']
+
+    def activate(self, version: str):
+        """Mark a version active, remembering the previous one for rollback"""
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version: {version}")
+
+        with self._lock:
+            state = self._read_pointer()
+            if state['version'] == version:
+                return
+            if state['version'] is not None:
+                state['history'].append(state['version'])
+            state['version'] = version
+            self._write_pointer(state)
+        logger.info(f"Activated model version {version}")
+
+    def rollback(self, version: str = None) -> str:
+        """
+        Re-activate an earlier version
+
+        Args:
+            version: Version to restore; defaults to the previously active one
+
+        Returns:
+            The version that is now active
+
+        Raises:
+            VersionPrunedError: If the target's artifacts were pruned
+            ValueError: If there is nothing to roll back to or the version
+                never existed
+        """
+        with self._lock:
+            state = self._read_pointer()
+            available = set(self.versions())
+
+            if version is None:
+                if not state['history']:
+                    raise ValueError("No previous model version to roll back to")
+                if state['history'][-1] not in available:
+                    raise VersionPrunedError(state['history'][-1])
+                version = state['history'].pop()
+            elif version not in available:
+                if version in state['history'] or self._was_published(version):
+                    raise VersionPrunedError(version)
+                raise ValueError(f"Unknown model version: {version}")
+            else:
+                if state['version'] is not None:
+                    state['history'].append(state['version'])
+
+            state['version'] = version
+            self._write_pointer(state)
+
+        logger.info(f"Rolled back to model version {version}")
+        return version
+
+    def publish(self, bundle: ModelBundle, activate: bool = True) -> str:
+        """
+        Write a bundle as a new version
+
+        Artifacts are written to a temporary directory and renamed into
+        place, so readers never see a half-written version.
+
+        Returns:
+            The new version id
+        """
+        if bundle.model is None:
+            raise ValueError("Only bundles holding the fitted estimator can be published")
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(dir=self.root, prefix=".staging-"))
+        try:
+            compiled = bundle.compiled
+            if compiled is None:
+                compiled = CompiledForest.from_sklearn(bundle.model, binary_inputs=True)
+            joblib.dump(bundle.model, staging / "model.joblib")
+            joblib.dump(bundle.encoder, staging / "encoder.joblib")
+            with open(staging / "symptom_index.json", "w") as f:
+                json.dump(bundle.symptom_index, f)
+            compiled.save(staging / "compiled")
+            if bundle.student is not None:
+                bundle.student.save(staging / "student")
+            if bundle.cooccurrence is not None:
+                bundle.cooccurrence.save(staging / "cooccurrence")
+            if bundle.profiles is not None:
+                bundle.profiles.save(staging / "profiles")
+
+            # Claim the next free version number; rename fails if taken
+            existing = self.versions()
+            number = int(existing[-1][1:]) + 1 if existing else 1
+            while True:
+                version = f"v{number:04d}"
+                metadata = {
+                    **bundle.metadata,
+                    'version': version,
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'n_estimators': len(bundle.model.estimators_),
+                    'n_diseases': len(bundle.encoder.classes_),
+                    'n_symptoms': len(bundle.symptoms),
+                }
+                with open(staging / self.METADATA_FILE, "w") as f:
+                    json.dump(metadata, f, indent=2, default=float)
+                self._write_manifest(staging, version)
+                try:
+                    os.rename(staging, self.path(version))
+                    break
+                except OSError:
+                    number += 1
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        logger.info(f"Published model version {version} to {self.path(version)}")
+
+        if activate:
+            self.activate(version)
+        self.prune()
+        return version
+
+    def _write_manifest(self, directory: Path, version: str):
+        """Record format, size and checksum of every artifact file"""
+        files = {}
+        for path in sorted(directory.rglob("*")):
+            if path.is_file() and path.name != self.MANIFEST_FILE:
+                files[path.relative_to(directory).as_posix()] = {
+                    'bytes': path.stat().st_size,
+                    'sha256': _sha256(path),
+                }
+        with open(directory / self.MANIFEST_FILE, "w") as f:
+            json.dump({'format': ARTIFACT_FORMAT, 'version': version, 'files': files}, f, indent=2)
+
+    def _verify(self, directory: Path, manifest: Dict, prefixes: List[str]):
+        """
+        Check sizes and checksums of the manifest entries about to be loaded
+
+        Raises:
+            ValueError: If a file is missing or does not match the manifest
+        """
+        for name, entry in manifest['files'].items():
+            if not any(name == prefix or name.startswith(prefix + "/") for prefix in prefixes):
+                continue
+            path = directory / name
+            if not path.exists() or path.stat().st_size != entry['bytes']:
+                raise ValueError(f"Artifact {path} is missing or has the wrong size")
+            if settings.ARTIFACT_VERIFY_CHECKSUM and _sha256(path) != entry['sha256']:
+                raise ValueError(f"Checksum mismatch for {path}")
+
+    def prune(self, keep: int = None):
+        """
+        Delete the oldest versions beyond the retention limit
+
+        The active version, the previously active one and pinned versions
+        are never deleted, even when that leaves more than keep on disk.
+        """
+        keep = keep if keep is not None else settings.MODEL_REGISTRY_KEEP
+        if keep <= 0:
+            return
+        with self._lock:
+            state = self._read_pointer()
+            protected = {state['version'], *state['history'][-1:], *self._pinned}
+            versions = self.versions()
+            for version in versions[:max(0, len(versions) - keep)]:
+                if version not in protected:
+                    shutil.rmtree(self.path(version), ignore_errors=True)
+                    logger.info(f"Pruned model version {version}")
+
+    def load(self, version: str = None) -> Optional[ModelBundle]:
+        """
+        Load a version (the active one by default) as a ModelBundle
+
+        Falls back to the legacy flat artifact files when the registry is
+        empty, so models trained before the registry existed keep working.
+
+        Returns:
+            ModelBundle, or None if nothing is available
+        """
+        if version is None:
+            version = self.active_version()
+        if version is None:
+            return self._load_legacy()
+
+        path = self.path(version)
+        if not path.exists():
+            raise ValueError(f"Model version not found: {version}")
+
+        started = time.perf_counter()
+        metadata = self.read_metadata(version)
+        manifest_path = path / self.MANIFEST_FILE
+        if not manifest_path.exists():
+            raise ValueError(f"Model version {version} has no {self.MANIFEST_FILE}; it is incomplete or was "
+                             f"not written by this registry")
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get('format') != ARTIFACT_FORMAT:
+            raise ValueError(f"Unsupported artifact format: {manifest.get('format')}")
+
+        use_compiled = settings.INFERENCE_BACKEND == "compiled"
+        use_student = settings.STUDENT_ENABLED and LinearStudent.exists(path / "student")
+        has_cooccurrence = CooccurrenceIndex.exists(path / "cooccurrence")
+        has_profiles = DiseaseProfiles.exists(path / "profiles")
+        self._verify(path, manifest, [
+            "compiled" if use_compiled else "model.joblib",
+            "encoder.joblib",
+            "symptom_index.json",
+        ] + (["student"] if use_student else [])
+          + (["cooccurrence"] if has_cooccurrence else [])
+          + (["profiles"] if has_profiles else []))
+
+        mmap_mode = 'r' if settings.ARTIFACT_MMAP else None
+        compiled = None
+        model = None
+        if use_compiled:
+            compiled = CompiledForest.load(path / "compiled", mmap_mode=mmap_mode)
+        else:
+            model = joblib.load(path / "model.joblib", mmap_mode=mmap_mode)
+        student = LinearStudent.load(path / "student", mmap_mode=mmap_mode) if use_student else None
+        cooccurrence = CooccurrenceIndex.load(path / "cooccurrence") if has_cooccurrence else None
+        profiles = DiseaseProfiles.load(path / "profiles", mmap_mode=mmap_mode) if has_profiles else None
+
+        encoder = joblib.load(path / "encoder.joblib")
+        with open(path / "symptom_index.json") as f:
+            symptom_index = json.load(f)
+
+        bundle = ModelBundle.build(version, model, encoder, symptom_index, compiled=compiled,
+                                   metadata=metadata, student=student, cooccurrence=cooccurrence,
+                                   profiles=profiles)
+
+        logger.info(f"Loaded model version {version} in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return bundle
+
+    def load_estimator(self, version: str = None):
+        """Load only the fitted sklearn estimator of a version"""
+        version = version or self.active_version()
+        if version is None:
+            return _array_estimator(joblib.load(settings.MODEL_PATH))
+        path = self.path(version)
+        return joblib.load(path / "model.joblib")
+
+    def _load_legacy(self) -> Optional[ModelBundle]:
+        """Load the pre-registry flat artifact files"""
+        if not Path(settings.MODEL_PATH).exists():
+            logger.warning(f"No registered model versions and no model file at {settings.MODEL_PATH}")
+            return None
+
+        compiled = None
+        model = None
+        if settings.INFERENCE_BACKEND == "compiled" and CompiledForest.exists(settings.COMPILED_MODEL_PATH):
+            logger.info(f"Loading compiled forest from {settings.COMPILED_MODEL_PATH}")
+            compiled = CompiledForest.load(settings.COMPILED_MODEL_PATH)
+        else:
+            logger.info(f"Loading model from {settings.MODEL_PATH}")
+            model = _array_estimator(joblib.load(settings.MODEL_PATH))
+
+        encoder = joblib.load(settings.ENCODER_PATH)
+        symptom_index = joblib.load(settings.SYMPTOM_INDEX_PATH)
+
+        return ModelBundle.build(
+            settings.MODEL_VERSION, model, encoder, symptom_index,
+            compiled=compiled, metadata={'version': settings.MODEL_VERSION, 'legacy': True}
+        )
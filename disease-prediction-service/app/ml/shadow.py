@@ -0,0 +1,302 @@
+"""
+Shadow model evaluation
+Replays a sample of live predictions against a candidate model version,
+off the request path, and tracks how closely it agrees with the served one
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram
+from app.ml.model import DiseasePredictor, predictor
+from app.ml.registry import ModelBundle
+
+logger = logging.getLogger(__name__)
+
+SHADOW_COMPARISONS = Counter(
+    "shadow_comparisons_total",
+    "Sampled predictions replayed against the shadow model: top-1 agree, disagree, or error "
+    "when the shadow could not predict",
+    ("result",)
+)
+_AGREED = SHADOW_COMPARISONS.labels("agree")
+_DISAGREED = SHADOW_COMPARISONS.labels("disagree")
+_FAILED = SHADOW_COMPARISONS.labels("error")
+SHADOW_DROPPED = Counter("shadow_dropped_total", "Sampled predictions skipped because the shadow queue was full")
+SHADOW_PREDICT_SECONDS = Histogram(
+    "shadow_predict_seconds", "Uncached prediction time of the served and shadow models on the same sampled rows",
+    ("model",)
+)
+_SERVED_SECONDS = SHADOW_PREDICT_SECONDS.labels("served")
+_SHADOW_SECONDS = SHADOW_PREDICT_SECONDS.labels("shadow")
+
+
+class ShadowEvaluator:
+    """
+    Compares a shadow model version with the one being served
+
+    observe() is called after a /predict/ response is computed. A sampled
+    fraction of calls is queued to a single background thread, which runs
+    both models uncached on the same symptoms, so latencies are measured
+    under the same conditions. Once the queue holds max_queue comparisons
+    further samples are dropped; the request path never waits on the
+    shadow. Statistics restart whenever either model changes.
+    """
+
+    def __init__(self, sample_rate: float = None, max_queue: int = None, history: int = 1000):
+        self.sample_rate = settings.SHADOW_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.max_queue = settings.SHADOW_QUEUE_SIZE if max_queue is None else max_queue
+        self.history = history
+        self._bundle: Optional[ModelBundle] = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._reset(None)
+
+    @property
+    def bundle(self) -> Optional[ModelBundle]:
+        """The shadow model bundle, if one is loaded"""
+        return self._bundle
+
+    def _reset(self, served_token: Optional[int]):
+        """Start statistics over against the given served bundle"""
+        self._served_token = served_token
+        self._started_at = time.time()
+        self._compared = 0
+        self._agreements = 0
+        self._top_k_agreements = 0
+        self._errors = 0
+        self._dropped = 0
+        self._delta_sum = 0.0
+        self._abs_delta_sum = 0.0
+        self._served_seconds = deque(maxlen=self.history)
+        self._shadow_seconds = deque(maxlen=self.history)
+
+    def load(self, version: str = None) -> str:
+        """
+        Load a registry version as the shadow model
+
+        Args:
+            version: Version to load; defaults to the newest version that
+                is not being served
+
+        Returns:
+            The version now loaded as shadow
+        """
+        served = predictor.bundle
+        served_version = served.version if served is not None else None
+        if version is None:
+            candidates = [name for name in predictor.registry.versions() if name != served_version]
+            if not candidates:
+                raise ValueError("No model version other than the served one to shadow")
+            version = candidates[-1]
+
+        bundle = predictor.registry.load(version)
+        if bundle is None:
+            raise ValueError(f"Model version not found: {version}")
+
+        # Keep the shadow's artifacts on disk so it can still be promoted
+        predictor.registry.pin(version)
+        with self._lock:
+            previous, self._bundle = self._bundle, bundle
+            self._reset(served.token if served is not None else None)
+        if previous is not None:
+            predictor.registry.unpin(previous.version)
+        logger.info(f"Shadowing model version {version} at sample rate {self.sample_rate}")
+        return version
+
+    def unload(self) -> Optional[str]:
+        """Stop shadowing; returns the version that was loaded"""
+        with self._lock:
+            bundle, self._bundle = self._bundle, None
+        if bundle is not None:
+            predictor.registry.unpin(bundle.version)
+            logger.info(f"Stopped shadowing model version {bundle.version}")
+        return bundle.version if bundle is not None else None
+
+    def observe(self, input_symptoms: List[str]) -> bool:
+        """
+        Maybe queue a served prediction for comparison
+
+        Args:
+            input_symptoms: Symptoms of a successful /predict/ call
+
+        Returns:
+            True if the call was sampled and queued
+        """
+        if self._bundle is None or random.random() >= self.sample_rate:
+            return False
+
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self._dropped += 1
+                SHADOW_DROPPED.inc()
+                return False
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+            executor = self._executor
+
+        executor.submit(self._compare, list(input_symptoms)).add_done_callback(self._done)
+        return True
+
+    def _done(self, future: Future):
+        with self._lock:
+            self._pending -= 1
+        if future.exception() is not None:
+            logger.error(f"Shadow comparison failed: {str(future.exception())}")
+
+    @staticmethod
+    def _predict(bundle: ModelBundle, symptoms: List[str]) -> Optional[Tuple[np.ndarray, np.ndarray, float]]:
+        """Top-k names, probabilities and seconds for one row, or None if no symptom matched"""
+        started = time.perf_counter()
+        indices = predictor._vectorize(bundle, symptoms, count=False)[0]
+        if not indices:
+            return None
+        probabilities = predictor._predict_proba_indices(bundle, [indices], count=False)
+        names, top_probabilities = predictor._top_k(bundle, probabilities)
+        return names[0], top_probabilities[0], time.perf_counter() - started
+
+    def _compare(self, input_symptoms: List[str]):
+        """Run both models on one symptom list and record how they differ"""
+        served, shadow = predictor.bundle, self._bundle
+        if served is None or shadow is None:
+            return
+
+        symptoms = DiseasePredictor._normalize(input_symptoms)
+        served_result = self._predict(served, symptoms)
+        if served_result is None:
+            return
+        shadow_result = self._predict(shadow, symptoms)
+
+        with self._lock:
+            if shadow is not self._bundle:
+                return
+            if served.token != self._served_token:
+                self._reset(served.token)
+
+            self._compared += 1
+            self._served_seconds.append(served_result[2])
+            _SERVED_SECONDS.observe(served_result[2])
+            if shadow_result is None:
+                self._errors += 1
+                _FAILED.inc()
+                return
+
+            served_names, served_probabilities, _ = served_result
+            shadow_names, shadow_probabilities, shadow_seconds = shadow_result
+            self._shadow_seconds.append(shadow_seconds)
+            _SHADOW_SECONDS.observe(shadow_seconds)
+            delta = float(shadow_probabilities[0] - served_probabilities[0])
+            self._delta_sum += delta
+            self._abs_delta_sum += abs(delta)
+            if shadow_names[0] in served_names:
+                self._top_k_agreements += 1
+            if shadow_names[0] == served_names[0]:
+                self._agreements += 1
+                _AGREED.inc()
+            else:
+                _DISAGREED.inc()
+
+    @staticmethod
+    def _percentiles(seconds: deque) -> Dict[str, float]:
+        values = np.fromiter(seconds, dtype=float)
+        if not values.size:
+            return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+        p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+        return {'p50': round(float(p50), 3), 'p95': round(float(p95), 3), 'p99': round(float(p99), 3)}
+
+    def report(self) -> Dict:
+        """
+        Agreement, confidence and latency of the shadow versus the served model
+
+        Returns:
+            Statistics since the current pair of models was compared, with
+            safe_to_promote and the reasons it is not when it is False
+        """
+        served = predictor.bundle
+        with self._lock:
+            shadow = self._bundle
+            compared = self._compared
+            predicted = compared - self._errors
+            agreement = self._agreements / compared if compared else 0.0
+            mean_delta = self._delta_sum / predicted if predicted else 0.0
+            report = {
+                'shadow_version': shadow.version if shadow is not None else None,
+                'serving_version': served.version if served is not None else None,
+                'sample_rate': self.sample_rate,
+                'since': datetime.fromtimestamp(self._started_at, tz=timezone.utc),
+                'compared': compared,
+                'pending': self._pending,
+                'dropped': self._dropped,
+                'errors': self._errors,
+                'agreement_rate': round(agreement, 4),
+                'top_k_agreement_rate': round(self._top_k_agreements / compared, 4) if compared else 0.0,
+                'confidence_delta': {
+                    'mean': round(mean_delta, 4),
+                    'mean_abs': round(self._abs_delta_sum / predicted, 4) if predicted else 0.0,
+                },
+                'latency_ms': {
+                    'served': self._percentiles(self._served_seconds),
+                    'shadow': self._percentiles(self._shadow_seconds),
+                },
+            }
+
+        served_p95 = report['latency_ms']['served']['p95']
+        shadow_p95 = report['latency_ms']['shadow']['p95']
+        latency_ratio = shadow_p95 / served_p95 if served_p95 else 0.0
+        report['latency_ratio_p95'] = round(latency_ratio, 3)
+
+        reasons = []
+        if shadow is None:
+            reasons.append("No shadow model loaded")
+        elif compared < settings.SHADOW_MIN_SAMPLES:
+            reasons.append(f"Only {compared} of {settings.SHADOW_MIN_SAMPLES} comparisons collected")
+        else:
+            if agreement < settings.SHADOW_MIN_AGREEMENT:
+                reasons.append(f"Top-1 agreement {agreement:.3f} is below {settings.SHADOW_MIN_AGREEMENT}")
+            if -mean_delta > settings.SHADOW_MAX_CONFIDENCE_DROP:
+                reasons.append(f"Mean confidence dropped by {-mean_delta:.3f}, "
+                               f"more than {settings.SHADOW_MAX_CONFIDENCE_DROP}")
+            if latency_ratio > settings.SHADOW_MAX_LATENCY_RATIO:
+                reasons.append(f"p95 latency is {latency_ratio:.2f}x the served model's, "
+                               f"more than {settings.SHADOW_MAX_LATENCY_RATIO}x")
+        report['safe_to_promote'] = not reasons
+        report['reasons'] = reasons
+        return report
+
+    def shutdown(self):
+        """Stop the comparison thread"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global shadow evaluator
+shadow_evaluator = ShadowEvaluator()
+
+
+def _shadow_model() -> Dict:
+    bundle = shadow_evaluator.bundle
+    return {(bundle.version,): 1} if bundle is not None else {}
+
+
+def _shadow_safe_to_promote() -> float:
+    return 1.0 if shadow_evaluator.bundle is not None and shadow_evaluator.report()['safe_to_promote'] else 0.0
+
+
+Gauge("shadow_model_info", "Model version loaded as shadow, always 1", ("version",), function=_shadow_model)
+Gauge("shadow_agreement_ratio", "Top-1 agreement of the shadow with the served model since the pair changed",
+      function=lambda: shadow_evaluator.report()['agreement_rate'])
+Gauge("shadow_confidence_delta_mean", "Mean shadow minus served top-1 confidence since the pair changed",
+      function=lambda: shadow_evaluator.report()['confidence_delta']['mean'])
+Gauge("shadow_safe_to_promote", "1 when the shadow meets every SHADOW_* promotion threshold",
+      function=_shadow_safe_to_promote)
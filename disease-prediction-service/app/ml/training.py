@@ -3,12 +3,520 @@ Training utilities and data preprocessing
 """
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import MultiLabelBinarizer
-from typing import Dict, List, Tuple
+from scipy import sparse
+from sklearn.preprocessing import LabelEncoder, MultiLabelBinarizer
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
 import logging
 
+from app.core.config import settings
+from app.ml.profiles import SYMPTOM_COUNT_BINS, DiseaseProfiles
+
 logger = logging.getLogger(__name__)
 
+DATASET_CACHE_FORMAT = "dataset-v1"
+CSV_CHUNK_ROWS = 50000
+FINGERPRINT_SAMPLE_BYTES = 1 << 20
+
+
+@dataclass(frozen=True)
+class EncodedDataset:
+    """
+    Disease/symptom dataset as compact NumPy arrays
+    
+    features holds one uint8 0/1 column per symptom and labels holds the
+    index of each row's disease in diseases, which is sorted the same way
+    LabelEncoder sorts its classes.
+    """
+    features: np.ndarray
+    labels: np.ndarray
+    diseases: List[str]
+    symptoms: List[str]
+    label_column: str = "diseases"
+    fingerprint: Optional[str] = None
+    
+    @property
+    def n_rows(self) -> int:
+        return self.features.shape[0]
+    
+    def label_encoder(self) -> LabelEncoder:
+        """A fitted LabelEncoder equivalent to fitting on the disease column"""
+        encoder = LabelEncoder()
+        encoder.classes_ = np.array(self.diseases, dtype=object)
+        return encoder
+    
+    def to_frame(self) -> pd.DataFrame:
+        """Rebuild the original CSV layout: disease name column, then symptoms"""
+        frame = pd.DataFrame(np.asarray(self.features), columns=self.symptoms)
+        frame.insert(0, self.label_column, np.asarray(self.diseases, dtype=object)[self.labels])
+        return frame
+
+
+def fingerprint_file(file_path: str) -> str:
+    """
+    Cheap fingerprint of a source file
+    
+    Combines size and modification time with a hash of the first and last
+    megabyte, so an edited or replaced CSV gets a new cache entry without
+    hashing the whole file on every run.
+    """
+    stat = os.stat(file_path)
+    digest = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(file_path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+        if stat.st_size > FINGERPRINT_SAMPLE_BYTES:
+            f.seek(max(FINGERPRINT_SAMPLE_BYTES, stat.st_size - FINGERPRINT_SAMPLE_BYTES))
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def iter_csv_chunks(file_path: str, chunk_rows: int = CSV_CHUNK_ROWS):
+    """
+    Parse the CSV chunk by chunk into uint8 symptom arrays
+    
+    Args:
+        file_path: Path to CSV file (disease column first, then symptoms)
+        chunk_rows: Rows parsed per chunk
+    
+    Yields:
+        (label_column, symptoms, disease names, uint8 features) per chunk
+    """
+    header = pd.read_csv(file_path, nrows=0).columns.tolist()
+    label_column, symptoms = header[0], header[1:]
+    dtypes = {column: np.float32 for column in symptoms}
+    dtypes[label_column] = str
+    
+    for chunk in pd.read_csv(file_path, dtype=dtypes, chunksize=chunk_rows):
+        values = chunk[symptoms].to_numpy()
+        # Same binarization as preprocess_symptoms: missing -> 0, non-zero -> 1
+        features = np.nan_to_num(values, nan=0.0) != 0
+        yield label_column, symptoms, chunk[label_column].to_numpy(dtype=object), features.astype(np.uint8)
+
+
+def parse_dataset(file_path: str) -> EncodedDataset:
+    """Parse the CSV into an EncodedDataset without touching the cache"""
+    started = time.perf_counter()
+    label_column, symptoms = None, None
+    feature_chunks, label_chunks = [], []
+    for label_column, symptoms, labels, features in iter_csv_chunks(file_path):
+        feature_chunks.append(features)
+        label_chunks.append(labels)
+    if symptoms is None:
+        raise ValueError(f"Dataset is empty: {file_path}")
+    
+    features = np.concatenate(feature_chunks)
+    del feature_chunks
+    diseases, labels = np.unique(np.concatenate(label_chunks), return_inverse=True)
+    
+    logger.info(f"Parsed {file_path}: {features.shape[0]} rows, {features.shape[1]} symptoms "
+                f"in {time.perf_counter() - started:.2f}s")
+    return EncodedDataset(
+        features=features,
+        labels=labels.astype(np.int32),
+        diseases=diseases.tolist(),
+        symptoms=symptoms,
+        label_column=label_column,
+    )
+
+
+def _cache_prefix(file_path: str) -> str:
+    """Cache entry name prefix of a source file; files sharing a name in different directories differ"""
+    source = str(Path(file_path).resolve())
+    return f"{Path(file_path).stem}-{hashlib.sha256(source.encode()).hexdigest()[:12]}-"
+
+
+def _cache_dir(file_path: str, fingerprint: str) -> Path:
+    return Path(settings.DATASET_CACHE_PATH) / f"{_cache_prefix(file_path)}{fingerprint[:16]}"
+
+
+def _write_cache(directory: Path, dataset: EncodedDataset, file_path: str):
+    """Write the cache entry atomically and drop stale entries for the same file"""
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=directory.parent, prefix=".staging-"))
+    try:
+        np.save(staging / "features.npy", dataset.features)
+        np.save(staging / "labels.npy", dataset.labels)
+        with open(staging / "meta.json", "w") as f:
+            json.dump({
+                'format': DATASET_CACHE_FORMAT,
+                'source': str(Path(file_path).resolve()),
+                'fingerprint': dataset.fingerprint,
+                'n_rows': dataset.n_rows,
+                'label_column': dataset.label_column,
+                'diseases': dataset.diseases,
+                'symptoms': dataset.symptoms,
+            }, f)
+        os.replace(staging, directory)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        if not directory.exists():
+            raise
+        # Another process wrote the same entry first
+        return
+    
+    prefix = _cache_prefix(file_path)
+    for stale in directory.parent.iterdir():
+        if stale != directory and stale.name.startswith(prefix):
+            shutil.rmtree(stale, ignore_errors=True)
+
+
+def _read_cache(directory: Path, fingerprint: str) -> Optional[EncodedDataset]:
+    meta_path = directory / "meta.json"
+    if not meta_path.exists():
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get('format') != DATASET_CACHE_FORMAT or meta.get('fingerprint') != fingerprint:
+        return None
+    return EncodedDataset(
+        features=np.load(directory / "features.npy", mmap_mode='r'),
+        labels=np.load(directory / "labels.npy"),
+        diseases=meta['diseases'],
+        symptoms=meta['symptoms'],
+        label_column=meta['label_column'],
+        fingerprint=fingerprint,
+    )
+
+
+def load_encoded_dataset(file_path: str = None, use_cache: bool = None) -> EncodedDataset:
+    """
+    Load the dataset as uint8 arrays, reusing the binary cache when possible
+    
+    The first load parses the CSV and writes features.npy/labels.npy under
+    DATASET_CACHE_PATH, keyed by the source file's fingerprint. Later loads
+    memory-map the cached arrays for as long as the CSV is unchanged.
+    
+    Args:
+        file_path: Path to CSV file; defaults to settings.DATA_FILE
+        use_cache: Override settings.DATASET_CACHE_ENABLED
+    
+    Returns:
+        EncodedDataset
+    """
+    if file_path is None:
+        file_path = settings.DATA_FILE
+    if use_cache is None:
+        use_cache = settings.DATASET_CACHE_ENABLED
+    if not use_cache:
+        return parse_dataset(file_path)
+    
+    started = time.perf_counter()
+    fingerprint = fingerprint_file(file_path)
+    directory = _cache_dir(file_path, fingerprint)
+    try:
+        dataset = _read_cache(directory, fingerprint)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable dataset cache {directory}: {e}")
+        dataset = None
+    
+    if dataset is not None:
+        logger.info(f"Dataset cache hit for {file_path}: {dataset.n_rows} rows "
+                    f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return dataset
+    
+    dataset = parse_dataset(file_path)
+    dataset = EncodedDataset(**{**dataset.__dict__, 'fingerprint': fingerprint})
+    try:
+        _write_cache(directory, dataset, file_path)
+        logger.info(f"Dataset cache written to {directory}")
+    except OSError as e:
+        logger.warning(f"Could not write dataset cache: {e}")
+    return dataset
+
+
+def align_dataset(dataset: EncodedDataset, symptoms: List[str],
+                  diseases: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Express a dataset in an existing model's feature and label order
+    
+    Args:
+        dataset: Dataset to align
+        symptoms: Feature order the model was trained with
+        diseases: Class names of the model's LabelEncoder
+    
+    Returns:
+        (uint8 feature matrix, label codes into diseases)
+    """
+    columns = {symptom: idx for idx, symptom in enumerate(dataset.symptoms)}
+    missing = [symptom for symptom in symptoms if symptom not in columns]
+    extra = sorted(set(columns) - set(symptoms))
+    if missing or extra:
+        raise ValueError(f"Dataset symptoms do not match the model: missing {missing[:5]}, unexpected {extra[:5]}")
+    
+    class_index = {disease: idx for idx, disease in enumerate(diseases)}
+    unknown = [disease for disease in dataset.diseases if disease not in class_index]
+    if unknown:
+        raise ValueError(f"Diseases unknown to the model need a full retrain: {unknown[:5]}")
+    
+    features = np.asarray(dataset.features)
+    if list(dataset.symptoms) != list(symptoms):
+        features = features[:, [columns[symptom] for symptom in symptoms]]
+    label_map = np.array([class_index[disease] for disease in dataset.diseases], dtype=np.int32)
+    return features, label_map[dataset.labels]
+
+
+def parse_max_features(value):
+    """Turn the MAX_FEATURES string into what RandomForestClassifier expects"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    value = str(value).strip().lower()
+    if value in ("sqrt", "log2"):
+        return value
+    if value in ("none", "all", ""):
+        return None
+    return float(value) if "." in value else int(value)
+
+
+def forest_params(**overrides) -> Dict:
+    """
+    Hyperparameters for RandomForestClassifier from settings
+    
+    Args:
+        **overrides: Values replacing the configured ones, e.g. while tuning
+    
+    Returns:
+        Keyword arguments for RandomForestClassifier
+    """
+    params = {
+        'n_estimators': settings.N_ESTIMATORS,
+        'max_depth': settings.MAX_DEPTH,
+        'min_samples_leaf': settings.MIN_SAMPLES_LEAF,
+        'max_features': settings.MAX_FEATURES,
+        **overrides,
+    }
+    params['max_features'] = parse_max_features(params['max_features'])
+    return params
+
+
+def rows_per_shard(n_features: int, budget_mb: float) -> int:
+    """
+    Number of training rows that fit a memory budget
+    
+    Per row a shard costs its uint8 copy, the float32 copy RandomForest
+    makes of X, and roughly 64 bytes of sample weights and index buffers
+    per tree built in parallel.
+    """
+    bytes_per_row = n_features * (1 + 4) + 64 * (os.cpu_count() or 1)
+    return max(1, int(budget_mb * 1024 * 1024 // bytes_per_row))
+
+
+def stratified_shards(labels: np.ndarray, n_shards: int, random_state: int = None) -> List[np.ndarray]:
+    """
+    Split row positions into shards that each contain every class
+    
+    Rows are shuffled, then dealt round-robin per class, so every shard
+    gets the same class mix. Classes with fewer rows than shards have their
+    rows repeated into the shards they would otherwise miss, which keeps
+    classes_ identical across warm-started fits.
+    
+    Args:
+        labels: Integer class label per row
+        n_shards: Number of shards
+        random_state: Seed for the shuffle
+    
+    Returns:
+        List of sorted row position arrays, one per shard
+    """
+    rng = np.random.default_rng(random_state)
+    order = rng.permutation(len(labels))
+    # Stable sort groups rows by class while keeping them shuffled within it
+    order = order[np.argsort(labels[order], kind='stable')]
+    sorted_labels = labels[order]
+    starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+    counts = np.diff(np.r_[starts, len(order)])
+    rank = np.arange(len(order)) - np.repeat(starts, counts)
+    shard_of = rank % n_shards
+    
+    shards = [[order[shard_of == shard]] for shard in range(n_shards)]
+    for start, count in zip(starts, counts):
+        for shard in range(count, n_shards):
+            shards[shard].append(order[start + shard % count:start + shard % count + 1])
+    return [np.sort(np.concatenate(parts)) for parts in shards]
+
+
+def rows_per_prediction_chunk(n_features: int, n_classes: int, budget_mb: float) -> int:
+    """
+    Number of rows to predict at once within a memory budget
+    
+    predict_proba holds a float64 probability row per sample for the
+    running total and for each tree being evaluated in parallel, which
+    outweighs the features when there are hundreds of diseases.
+    """
+    bytes_per_row = n_features * (1 + 4) + n_classes * 8 * (1 + (os.cpu_count() or 1))
+    return max(1, int(budget_mb * 1024 * 1024 // bytes_per_row))
+
+
+def predict_in_chunks(model, features: np.ndarray, rows: np.ndarray, chunk_rows: int) -> np.ndarray:
+    """Predict selected rows of a (possibly memory-mapped) matrix chunk by chunk"""
+    predictions = np.empty(len(rows), dtype=np.int64)
+    for start in range(0, len(rows), chunk_rows):
+        # Sorted row order reads a memory-mapped matrix sequentially
+        order = np.argsort(rows[start:start + chunk_rows], kind='stable')
+        chunk = rows[start:start + chunk_rows][order]
+        predictions[start + order] = model.predict(np.asarray(features[chunk]))
+    return predictions
+
+
+def classification_metrics(y_true: np.ndarray, y_pred: np.ndarray, n_classes: int) -> Dict[str, float]:
+    """
+    Accuracy and weighted precision/recall/F1 from one confusion matrix
+    
+    Gives the same numbers as sklearn's accuracy_score and the weighted
+    precision/recall/f1 scores with zero_division=0, in a single pass.
+    
+    Args:
+        y_true: True class codes
+        y_pred: Predicted class codes
+        n_classes: Number of classes
+    
+    Returns:
+        Dictionary with test_accuracy, precision, recall and f1_score
+    """
+    y_true = np.asarray(y_true, dtype=np.int64)
+    y_pred = np.asarray(y_pred, dtype=np.int64)
+    confusion = np.bincount(y_true * n_classes + y_pred, minlength=n_classes * n_classes)
+    confusion = confusion.reshape(n_classes, n_classes)
+    
+    true_positives = np.diag(confusion).astype(np.float64)
+    support = confusion.sum(axis=1)
+    predicted = confusion.sum(axis=0)
+    total = support.sum()
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(predicted > 0, true_positives / predicted, 0.0)
+        recall = np.where(support > 0, true_positives / support, 0.0)
+        f1 = np.where(support + predicted > 0, 2 * true_positives / (support + predicted), 0.0)
+    
+    weights = support / total if total else support
+    return {
+        'test_accuracy': float(true_positives.sum() / total) if total else 0.0,
+        'precision': float(precision @ weights),
+        'recall': float(recall @ weights),
+        'f1_score': float(f1 @ weights),
+    }
+
+
+def disease_symptom_counts(features: np.ndarray, labels: np.ndarray, n_diseases: int,
+                           chunk_rows: int = CSV_CHUNK_ROWS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rows per disease and rows per disease with each symptom
+    
+    One sparse one-hot(labels)^T @ features product per chunk, i.e. a
+    groupby-sum over all diseases at once.
+    
+    Args:
+        features: 0/1 feature rows, dense or memory-mapped
+        labels: Encoded disease of each row
+        n_diseases: Number of encoded diseases
+        chunk_rows: Rows read at a time
+    
+    Returns:
+        Tuple of (disease counts, disease x symptom counts)
+    """
+    labels = np.asarray(labels)
+    counts = np.zeros((n_diseases, features.shape[1]), dtype=np.int64)
+    for start in range(0, len(labels), chunk_rows):
+        chunk_labels = labels[start:start + chunk_rows]
+        one_hot = sparse.csr_matrix(
+            (np.ones(len(chunk_labels), dtype=np.int64), (chunk_labels, np.arange(len(chunk_labels)))),
+            shape=(n_diseases, len(chunk_labels))
+        )
+        counts += one_hot @ np.asarray(features[start:start + chunk_rows])
+    return np.bincount(labels, minlength=n_diseases), counts
+
+
+def symptoms_per_row_counts(features: np.ndarray, bins: int = SYMPTOM_COUNT_BINS,
+                            chunk_rows: int = CSV_CHUNK_ROWS) -> np.ndarray:
+    """
+    Rows per number of symptoms present
+    
+    Args:
+        features: 0/1 feature rows, dense or memory-mapped
+        bins: Histogram bins; rows with bins - 1 or more symptoms share the last
+        chunk_rows: Rows read at a time
+    
+    Returns:
+        Array of length bins
+    """
+    counts = np.zeros(bins, dtype=np.int64)
+    for start in range(0, features.shape[0], chunk_rows):
+        per_row = np.asarray(features[start:start + chunk_rows]).sum(axis=1, dtype=np.int64)
+        counts += np.bincount(np.minimum(per_row, bins - 1), minlength=bins)
+    return counts
+
+
+def build_disease_profiles(features: np.ndarray, labels: np.ndarray, diseases: List[str],
+                           symptoms: List[str], feature_importances: Optional[np.ndarray] = None,
+                           top_k: int = None) -> DiseaseProfiles:
+    """
+    Per-disease symptom prevalence, top-k symptoms, feature importances and
+    the symptoms-per-row histogram
+    
+    Args:
+        features: 0/1 feature rows, dense or memory-mapped
+        labels: Encoded disease of each row (index into diseases)
+        diseases: Disease names
+        symptoms: Symptom names, one per feature column
+        feature_importances: The forest's feature_importances_, if available
+        top_k: Characteristic symptoms kept per disease, defaults to settings.PROFILE_TOP_K
+    
+    Returns:
+        DiseaseProfiles
+    """
+    started = time.perf_counter()
+    disease_counts, symptom_counts = disease_symptom_counts(features, labels, len(diseases))
+    profiles = DiseaseProfiles.from_counts(
+        diseases, symptoms, disease_counts, symptom_counts, symptoms_per_row_counts(features),
+        feature_importances, top_k=top_k if top_k is not None else settings.PROFILE_TOP_K
+    )
+    logger.info(f"Built {len(diseases)} disease profiles over {len(labels)} rows "
+                f"in {time.perf_counter() - started:.2f}s")
+    return profiles
+
+
+class PhaseTimer:
+    """
+    Wall time per training phase
+    
+    Called with each phase name as it starts, like a progress callback,
+    which it forwards to. The previous phase ends when the next starts.
+    """
+    
+    def __init__(self, callback: Optional[Callable[[str], None]] = None):
+        self.callback = callback
+        self.timings: Dict[str, float] = {}
+        self._phase: Optional[str] = None
+        self._started = 0.0
+    
+    def __call__(self, phase: str):
+        self._close()
+        self._phase = phase
+        self._started = time.perf_counter()
+        if self.callback is not None:
+            self.callback(phase)
+    
+    def _close(self):
+        if self._phase is not None:
+            elapsed = time.perf_counter() - self._started
+            self.timings[self._phase] = self.timings.get(self._phase, 0.0) + elapsed
+            self._phase = None
+    
+    def stop(self) -> Dict[str, float]:
+        """End the current phase and return seconds per phase"""
+        self._close()
+        return {phase: round(seconds, 4) for phase, seconds in self.timings.items()}
+    
+    def summary(self) -> str:
+        return ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in self.timings.items())
+
+
 def load_dataset(file_path: str) -> pd.DataFrame:
     """
     Load dataset from CSV file
@@ -20,7 +528,7 @@ def load_dataset(file_path: str) -> pd.DataFrame:
         DataFrame with disease and symptoms
     """
     try:
-        df = pd.read_csv(file_path)
+        df = load_encoded_dataset(file_path).to_frame()
         logger.info(f"Dataset loaded: {df.shape[0]} rows, {df.shape[1]} columns")
         return df
     except Exception as e:
@@ -68,14 +576,12 @@ def create_symptom_disease_mapping(df: pd.DataFrame) -> Dict[str, List[str]]:
     
     symptom_cols = [col for col in df.columns if col != disease_col]
     
-    for disease in df[disease_col].unique():
-        disease_df = df[df[disease_col] == disease]
-        # Get symptoms that appear in more than 50% of cases
-        common_symptoms = []
-        for col in symptom_cols:
-            if disease_df[col].mean() > 0.5:
-                common_symptoms.append(col)
-        mapping[disease] = common_symptoms
+    # Symptoms that appear in more than 50% of each disease's cases
+    prevalence = df.groupby(disease_col, sort=False)[symptom_cols].mean()
+    common = prevalence.to_numpy() > 0.5
+    columns = np.asarray(symptom_cols, dtype=object)
+    for disease, row in zip(prevalence.index, common):
+        mapping[disease] = list(columns[row])
     
     return mapping
 
@@ -94,7 +600,7 @@ def get_feature_importance(model, feature_names: List[str], top_n: int = 20) ->
     if not hasattr(model, 'feature_importances_'):
         return {}
     
-    importance_dict = dict(zip(feature_names, model.feature_importances_))
-    sorted_importance = sorted(importance_dict.items(), key=lambda x: x[1], reverse=True)
+    importances = np.asarray(model.feature_importances_)
+    top = np.argsort(-importances, kind='stable')[:top_n]
     
-    return dict(sorted_importance[:top_n])
+    return {feature_names[i]: float(importances[i]) for i in top}
@@ -0,0 +1,276 @@
+"""
+Latency-aware hyperparameter search
+Cross-validates forest candidates in a process pool, then measures what
+each one costs to serve: prediction latency, artifact size and load time.
+When the service answers with a distilled student, candidates get one too
+and are timed on that path.
+"""
+import itertools
+import logging
+import multiprocessing
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import KFold, StratifiedKFold
+
+from app.core.config import settings
+from app.ml.cache import PredictionCache
+from app.ml.distill import distill
+from app.ml.model import DiseasePredictor
+from app.ml.registry import ModelBundle, ModelRegistry
+from app.ml.training import classification_metrics, forest_params, load_encoded_dataset
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 256
+
+
+def candidate_grid(space: Dict[str, List]) -> List[Dict]:
+    """
+    Expand a search space into every combination of its values
+
+    Args:
+        space: Hyperparameter name -> values to try
+
+    Returns:
+        List of forest_params() dictionaries
+    """
+    names = list(space)
+    return [forest_params(**dict(zip(names, values))) for values in itertools.product(*space.values())]
+
+
+def _load_rows(data_file: str, n_rows: int):
+    dataset = load_encoded_dataset(data_file)
+    n_rows = min(n_rows, dataset.n_rows)
+    return dataset, np.asarray(dataset.features[:n_rows]), dataset.labels[:n_rows]
+
+
+def _folds(y: np.ndarray, n_folds: int, random_state: int):
+    """Stratified folds when every class has enough rows, plain shuffled folds otherwise"""
+    if np.bincount(y).min(initial=n_folds) >= n_folds:
+        return StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    return KFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+
+
+def _cross_validate_fold(params: Dict, data_file: str, n_rows: int, fold: int,
+                         n_folds: int, random_state: int) -> Dict[str, float]:
+    """Fit and score one candidate on one fold inside a worker process"""
+    dataset, X, y = _load_rows(data_file, n_rows)
+    train_rows, test_rows = list(_folds(y, n_folds, random_state).split(X, y))[fold]
+
+    started = time.perf_counter()
+    # One core per fit: the pool already runs a fit per core
+    model = RandomForestClassifier(**params, random_state=random_state, n_jobs=1)
+    model.fit(X[train_rows], y[train_rows])
+    fit_seconds = time.perf_counter() - started
+
+    metrics = classification_metrics(y[test_rows], model.predict(X[test_rows]), len(dataset.diseases))
+    metrics['fit_seconds'] = fit_seconds
+    return metrics
+
+
+def _serves_student() -> bool:
+    return settings.DISTILL_STUDENT and settings.STUDENT_ENABLED
+
+
+def _fit_and_publish(params: Dict, data_file: str, n_rows: int, random_state: int, registry_root: str) -> str:
+    """Fit a candidate on all rows, distill its student if one would be served, and publish both"""
+    dataset, X, y = _load_rows(data_file, n_rows)
+    model = RandomForestClassifier(**params, random_state=random_state, n_jobs=1)
+    model.fit(X, y)
+    student = None
+    if _serves_student():
+        distill_rows = np.sort(np.random.default_rng(random_state).choice(
+            len(X), size=min(settings.DISTILL_ROWS, len(X)), replace=False
+        ))
+        student = distill(model, X[distill_rows], epochs=settings.DISTILL_EPOCHS,
+                          learning_rate=settings.DISTILL_LEARNING_RATE, random_state=random_state)
+    symptom_index = {symptom: idx for idx, symptom in enumerate(dataset.symptoms)}
+    bundle = ModelBundle.build("unsaved", model, dataset.label_encoder(), symptom_index,
+                               metadata={'params': params}, student=student)
+    return ModelRegistry(registry_root).publish(bundle)
+
+
+def _percentile_ms(samples: List[float], q: float) -> float:
+    return round(float(np.percentile(samples, q)) * 1000, 4)
+
+
+def measure_serving(registry_root: str, symptom_sets: List[List[str]], repeats: int = 200) -> Dict[str, float]:
+    """
+    Load a published candidate like the service does and time it
+
+    Uses the configured INFERENCE_BACKEND, answering with the candidate's
+    student first when STUDENT_ENABLED, and the prediction cache disabled,
+    so every call runs the full predict path. Model memory includes the
+    student, since the forest stays loaded for its fallbacks.
+
+    Args:
+        registry_root: Registry holding the candidate as its active version
+        symptom_sets: Realistic inputs, e.g. rows of the dataset
+        repeats: Single-row predictions to time
+
+    Returns:
+        Load time, latency percentiles, batch throughput, sizes, the
+        backend that was timed and the share of rows the student answered
+    """
+    candidate = DiseasePredictor(registry=ModelRegistry(registry_root))
+    candidate.cache = PredictionCache(maxsize=0)
+
+    started = time.perf_counter()
+    if not candidate.load_model():
+        raise ValueError(f"Could not load candidate from {registry_root}")
+    load_ms = (time.perf_counter() - started) * 1000
+
+    version_dir = candidate.registry.path(candidate.bundle.version)
+    artifact_bytes = sum(path.stat().st_size for path in version_dir.rglob("*") if path.is_file())
+    if candidate.compiled is not None:
+        model_bytes = candidate.compiled.nbytes
+    else:
+        model_bytes = (version_dir / "model.joblib").stat().st_size
+    student = candidate.bundle.student if settings.STUDENT_ENABLED else None
+    if student is not None:
+        model_bytes += student.nbytes
+
+    for symptoms in symptom_sets[:10]:
+        candidate.predict(symptoms)
+    answers, fallbacks = candidate.student_answers, candidate.student_fallbacks
+
+    single = []
+    for i in range(repeats):
+        symptoms = symptom_sets[i % len(symptom_sets)]
+        started = time.perf_counter()
+        candidate.predict(symptoms)
+        single.append(time.perf_counter() - started)
+
+    batch = (symptom_sets * (BATCH_SIZE // len(symptom_sets) + 1))[:BATCH_SIZE]
+    batch_times = []
+    for _ in range(5):
+        started = time.perf_counter()
+        candidate.predict_batch(batch)
+        batch_times.append(time.perf_counter() - started)
+
+    student_answers = candidate.student_answers - answers
+    student_rows = student_answers + candidate.student_fallbacks - fallbacks
+    return {
+        'serving_backend': (f"student+{settings.INFERENCE_BACKEND}" if student is not None
+                            else settings.INFERENCE_BACKEND),
+        'student_answer_rate': round(student_answers / student_rows, 4) if student_rows else 0.0,
+        'load_ms': round(load_ms, 2),
+        'single_p50_ms': _percentile_ms(single, 50),
+        'single_p95_ms': _percentile_ms(single, 95),
+        'batch_rows_per_second': round(BATCH_SIZE / float(np.median(batch_times)), 1),
+        'artifact_mb': round(artifact_bytes / (1024 * 1024), 3),
+        'model_memory_mb': round(model_bytes / (1024 * 1024), 3),
+    }
+
+
+def select_candidate(results: List[Dict], latency_budget_ms: Optional[float] = None,
+                     memory_budget_mb: Optional[float] = None) -> Optional[Dict]:
+    """
+    Most accurate candidate within the budgets
+
+    Ties on cross-validated accuracy (to 3 decimals) go to the faster one.
+
+    Returns:
+        The chosen result, or None if no candidate fits the budgets
+    """
+    eligible = [
+        result for result in results
+        if (latency_budget_ms is None or result['single_p95_ms'] <= latency_budget_ms)
+        and (memory_budget_mb is None or result['model_memory_mb'] <= memory_budget_mb)
+    ]
+    if not eligible:
+        return None
+    return max(eligible, key=lambda result: (round(result['cv_accuracy'], 3), -result['single_p50_ms']))
+
+
+def tune(space: Dict[str, List], data_file: str = None, n_rows: int = None, n_folds: int = 3,
+         workers: int = None, latency_budget_ms: Optional[float] = None,
+         memory_budget_mb: Optional[float] = None) -> Dict:
+    """
+    Cross-validate every candidate in parallel and measure its serving cost
+
+    CV folds and the final fits run in a spawn process pool. Serving
+    measurements then run one candidate at a time in this process, so
+    timings are not skewed by fits running next to them.
+
+    Args:
+        space: Hyperparameter name -> values to try
+        data_file: Dataset CSV, defaults to settings.DATA_FILE
+        n_rows: Rows used, defaults to settings.N_ROWS
+        n_folds: Cross-validation folds
+        workers: Pool size, defaults to the CPU count
+        latency_budget_ms: Highest acceptable single-row p95 latency
+        memory_budget_mb: Highest acceptable model memory
+
+    Returns:
+        Dictionary with every candidate's results and the selected one
+    """
+    data_file = data_file or settings.DATA_FILE
+    n_rows = n_rows or settings.N_ROWS
+    random_state = settings.RANDOM_STATE
+    candidates = candidate_grid(space)
+
+    # Build the dataset cache once, before workers race to write it
+    dataset, X, _ = _load_rows(data_file, n_rows)
+    symptom_sets = [
+        [dataset.symptoms[idx] for idx in np.flatnonzero(row)]
+        for row in X[np.random.default_rng(random_state).choice(len(X), size=min(200, len(X)), replace=False)]
+    ]
+    symptom_sets = [symptoms for symptoms in symptom_sets if symptoms] or [[dataset.symptoms[0]]]
+
+    logger.info(f"Tuning {len(candidates)} candidates with {n_folds}-fold CV on {len(X)} rows")
+    workdir = Path(tempfile.mkdtemp(prefix="tune-"))
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            fold_futures = {
+                (index, fold): pool.submit(_cross_validate_fold, params, data_file, n_rows,
+                                           fold, n_folds, random_state)
+                for index, params in enumerate(candidates) for fold in range(n_folds)
+            }
+            fit_futures = [
+                pool.submit(_fit_and_publish, params, data_file, n_rows, random_state,
+                            str(workdir / f"candidate-{index:03d}"))
+                for index, params in enumerate(candidates)
+            ]
+            fold_results = {key: future.result() for key, future in fold_futures.items()}
+            for future in fit_futures:
+                future.result()
+
+        results = []
+        for index, params in enumerate(candidates):
+            folds = [fold_results[(index, fold)] for fold in range(n_folds)]
+            result = {
+                'params': params,
+                'cv_accuracy': float(np.mean([fold['test_accuracy'] for fold in folds])),
+                'cv_accuracy_std': float(np.std([fold['test_accuracy'] for fold in folds])),
+                'cv_f1_score': float(np.mean([fold['f1_score'] for fold in folds])),
+                'fit_seconds': float(np.mean([fold['fit_seconds'] for fold in folds])),
+                **measure_serving(str(workdir / f"candidate-{index:03d}"), symptom_sets),
+            }
+            logger.info(f"Candidate {index + 1}/{len(candidates)} {params}: "
+                        f"accuracy {result['cv_accuracy']*100:.2f}%, p50 {result['single_p50_ms']:.3f} ms, "
+                        f"{result['model_memory_mb']:.1f} MB")
+            results.append(result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'data_file': data_file,
+        'n_rows': len(X),
+        'n_folds': n_folds,
+        'inference_backend': settings.INFERENCE_BACKEND,
+        'serving_backend': (f"student+{settings.INFERENCE_BACKEND}" if _serves_student()
+                            else settings.INFERENCE_BACKEND),
+        'latency_budget_ms': latency_budget_ms,
+        'memory_budget_mb': memory_budget_mb,
+        'results': results,
+        'selected': select_candidate(results, latency_budget_ms, memory_budget_mb),
+    }
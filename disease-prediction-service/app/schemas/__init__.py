@@ -3,7 +3,20 @@ from .prediction import (
     SymptomInput,
     DiseaseOutput,
     PredictionResponse,
+    BatchSymptomInput,
+    BatchPredictionItem,
+    BatchPredictionResponse,
     TrainingRequest,
     TrainingResponse,
-    HealthResponse
+    IncrementalTrainingRequest,
+    TrainingJobStatus,
+    TrainingJobResponse,
+    HealthResponse,
+    ReadinessResponse,
+    SymptomMatch,
+    SymptomSearchResponse,
+    RelatedSymptom,
+    RelatedSymptomsResponse,
+    ProfileSymptom,
+    DiseaseProfileResponse
 )
@@ -3,6 +3,7 @@ Pydantic schemas for request/response models
 """
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
+from datetime import datetime
 
 class SymptomInput(BaseModel):
     """Input schema for symptom-based prediction"""
@@ -41,6 +42,39 @@ class PredictionResponse(BaseModel):
     success: bool
     message: str
     prediction: Optional[Dict] = None
+
+
+class BatchSymptomInput(BaseModel):
+    """Input schema for batch symptom-based prediction"""
+    symptom_sets: List[List[str]] = Field(..., description="List of symptom lists", min_length=1)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "symptom_sets": [
+                    ["fever", "cough", "headache"],
+                    ["shortness of breath", "anxiety and nervousness"]
+                ]
+            }
+        }
+
+
+class BatchPredictionItem(BaseModel):
+    """Prediction result for a single symptom list in a batch"""
+    index: int
+    success: bool
+    prediction: Optional[Dict] = None
+    error: Optional[str] = None
+
+
+class BatchPredictionResponse(BaseModel):
+    """Batch prediction response"""
+    success: bool
+    message: str
+    total: int
+    succeeded: int
+    failed: int
+    predictions: List[BatchPredictionItem]
     
 class TrainingRequest(BaseModel):
     """Request schema for model training"""
@@ -79,12 +113,80 @@ class TrainingResponse(BaseModel):
             }
         }
 
+class IncrementalTrainingRequest(BaseModel):
+    """Request schema for growing the active model with new rows"""
+    dataset_path: str = Field(..., description="CSV with new labeled rows, same columns as the training dataset, "
+                                               "under RAW_DATA_PATH or PROCESSED_DATA_PATH")
+    n_estimators: Optional[int] = Field(None, description="Trees to add", ge=1)
+    retire_oldest: int = Field(0, description="Oldest trees to drop after adding the new ones", ge=0)
+    replay_rows: Optional[int] = Field(None, description="Original rows replayed alongside the new ones", ge=0)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "dataset_path": "app/data/raw/new_cases.csv",
+                "n_estimators": 10,
+                "retire_oldest": 10
+            }
+        }
+
+
+class TrainingJobStatus(BaseModel):
+    """Status of a background training job"""
+    job_id: str
+    kind: str = Field("full", description="full or increment")
+    status: str = Field(..., description="queued, running, completed or failed")
+    phase: str = Field(..., description="Current training phase")
+    submitted_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    elapsed_seconds: Optional[float] = None
+    metrics: Optional[Dict[str, float]] = None
+    timings: Optional[Dict[str, float]] = Field(None, description="Seconds spent in each phase")
+    model_path: Optional[str] = None
+    model_version: Optional[str] = None
+    error: Optional[str] = None
+
+
+class TrainingJobResponse(BaseModel):
+    """Response schema for a submitted training job"""
+    success: bool
+    message: str
+    job: TrainingJobStatus
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "success": True,
+                "message": "Training job queued",
+                "job": {
+                    "job_id": "3f2b9c0e5d7a4e1f9a8b6c5d4e3f2a1b",
+                    "status": "queued",
+                    "phase": "queued",
+                    "submitted_at": "2026-01-04T08:32:48Z"
+                }
+            }
+        }
+
+
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str
     service: str
     version: str
     model_loaded: bool
+    ready: bool = Field(..., description="Whether the service is ready for traffic, see /health/ready")
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness probe response"""
+    ready: bool
+    model_loaded: bool
+    model_version: Optional[str] = None
+    startup_complete: bool
+    startup_seconds: Optional[float] = Field(None, description="Seconds from app import until startup completed")
+    phases: Dict[str, float] = Field(default_factory=dict, description="Seconds per startup phase")
+    error: Optional[str] = None
 
 
 class SymptomsListResponse(BaseModel):
@@ -94,6 +196,54 @@ class SymptomsListResponse(BaseModel):
     total: int
 
 
+class SymptomMatch(BaseModel):
+    """A known symptom matching a search query"""
+    symptom: str
+    confidence: float = Field(..., description="Match confidence (0-1)", ge=0, le=1)
+    match: str = Field(..., description="exact, synonym, prefix or fuzzy")
+
+
+class SymptomSearchResponse(BaseModel):
+    """Response for symptom search"""
+    success: bool
+    query: str
+    matches: List[SymptomMatch]
+
+
+class RelatedSymptom(BaseModel):
+    """A symptom suggested as the next one to ask about"""
+    symptom: str
+    information_gain: float = Field(..., description="Expected reduction of disease uncertainty, in bits")
+    probability: float = Field(..., description="Probability that the symptom is present", ge=0, le=1)
+    cooccurrence: int = Field(..., description="Training rows sharing it with each given symptom, summed")
+
+
+class RelatedSymptomsResponse(BaseModel):
+    """Response for related symptom suggestions"""
+    success: bool
+    matched_symptoms: List[str]
+    unmatched_symptoms: List[str]
+    suggestions: List[RelatedSymptom]
+
+
+class ProfileSymptom(BaseModel):
+    """A characteristic symptom of a disease"""
+    symptom: str
+    prevalence: float = Field(..., description="Share of the disease's training rows with this symptom", ge=0, le=1)
+    lift: float = Field(..., description="Prevalence relative to all training rows")
+    importance: Optional[float] = Field(None, description="Forest feature importance of the symptom")
+
+
+class DiseaseProfileResponse(BaseModel):
+    """Response for a disease profile"""
+    success: bool
+    disease: str
+    n_rows: int = Field(..., description="Training rows of this disease")
+    share: float = Field(..., description="Share of all training rows")
+    n_symptoms_seen: int = Field(..., description="Distinct symptoms seen with this disease")
+    top_symptoms: List[ProfileSymptom]
+
+
 class ModelStatusResponse(BaseModel):
     """Model status response"""
     model_loaded: bool
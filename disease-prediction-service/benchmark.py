@@ -0,0 +1,402 @@
+"""
+Benchmark script for the Disease Prediction Service
+Trains a model on a synthetic dataset and measures cold start, prediction
+latency, batch throughput, memory and /predict/ concurrency scaling, then
+writes the numbers as JSON that can be compared across commits
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SERVICE_DIR = Path(__file__).parent
+RESULTS_FORMAT = "benchmark-v1"
+HIGHER_IS_BETTER = ("per_second", "accuracy", "answer_rate")
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("benchmark")
+
+# Runs in a fresh interpreter, so imports and loading are really cold
+COLD_START_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from app.ml.model import predictor
+predictor.load_model()
+loaded = time.perf_counter()
+predictor.predict(json.loads(sys.argv[1]))
+predicted = time.perf_counter()
+from app.ml.memory import peak_rss_mb
+print(json.dumps({
+    'import_s': imported - started,
+    'load_s': loaded - imported,
+    'first_predict_ms': (predicted - loaded) * 1000,
+    'total_s': predicted - started,
+    'peak_rss_mb': peak_rss_mb(),
+}))
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000, help="Synthetic dataset rows")
+    parser.add_argument("--symptoms", type=int, default=377, help="Synthetic dataset width (symptom columns)")
+    parser.add_argument("--diseases", type=int, default=200, help="Distinct diseases")
+    parser.add_argument("--symptoms-per-row", type=int, default=5, help="Characteristic symptoms per row")
+    parser.add_argument("--n-estimators", type=int, default=100, help="Trees in the benchmarked forest")
+    parser.add_argument("--backend", choices=["sklearn", "compiled"], default=None,
+                        help="Inference backend (default: INFERENCE_BACKEND)")
+    parser.add_argument("--requests", type=int, default=2000, help="Timed single-row predictions")
+    parser.add_argument("--batch-sizes", default="1,32,256", help="Batch sizes for throughput")
+    parser.add_argument("--concurrency", default="1,4,16,32", help="Concurrent /predict/ clients")
+    parser.add_argument("--api-requests", type=int, default=1000, help="Requests per concurrency level")
+    parser.add_argument("--cold-runs", type=int, default=3, help="Fresh-interpreter cold starts")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=None, help="Keep data and models here instead of a temp dir")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the results")
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare against")
+    return parser.parse_args()
+
+
+def synthetic_dataset(path: Path, rows: int, n_symptoms: int, n_diseases: int,
+                      symptoms_per_row: int, seed: int) -> np.ndarray:
+    """
+    Write a CSV shaped like the real dataset
+
+    Every disease gets a fixed set of characteristic symptoms; each row
+    takes symptoms_per_row of them plus one random symptom as noise.
+
+    Returns:
+        The characteristic symptom columns of each disease
+    """
+    rng = np.random.default_rng(seed)
+    profile_size = min(n_symptoms, max(2 * symptoms_per_row, 4))
+    symptoms_per_row = min(symptoms_per_row, profile_size)
+    profiles = np.stack([rng.choice(n_symptoms, profile_size, replace=False) for _ in range(n_diseases)])
+
+    labels = rng.integers(0, n_diseases, rows)
+    picks = rng.random((rows, profile_size)).argsort(axis=1)[:, :symptoms_per_row]
+    features = np.zeros((rows, n_symptoms), dtype=np.uint8)
+    features[np.arange(rows)[:, None], profiles[labels[:, None], picks]] = 1
+    features[np.arange(rows), rng.integers(0, n_symptoms, rows)] = 1
+
+    frame = pd.DataFrame(features, columns=[f"symptom {i}" for i in range(n_symptoms)])
+    frame.insert(0, "diseases", np.array([f"disease {i}" for i in range(n_diseases)], dtype=object)[labels])
+    frame.to_csv(path, index=False)
+    return profiles
+
+
+def symptom_queries(profiles: np.ndarray, symptoms, symptoms_per_row: int, count: int, seed: int):
+    """Prediction inputs drawn like the training rows: a few symptoms of one disease"""
+    rng = np.random.default_rng(seed + 1)
+    queries = []
+    for disease in rng.integers(0, len(profiles), count):
+        size = int(rng.integers(2, symptoms_per_row + 1))
+        queries.append([symptoms[i] for i in rng.choice(profiles[disease], size, replace=False)])
+    return queries
+
+
+def percentiles_ms(samples) -> dict:
+    samples = np.asarray(samples) * 1000
+    return {
+        'mean_ms': round(float(samples.mean()), 4),
+        'p50_ms': round(float(np.percentile(samples, 50)), 4),
+        'p95_ms': round(float(np.percentile(samples, 95)), 4),
+        'p99_ms': round(float(np.percentile(samples, 99)), 4),
+    }
+
+
+def git_revision() -> dict:
+    """Commit being benchmarked, and whether the service has local changes"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=SERVICE_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD", "--", "."], cwd=SERVICE_DIR).returncode != 0
+        return {'commit': commit, 'dirty': dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+
+
+def measure_cold_start(symptoms, runs: int) -> dict:
+    """Median of several app imports + model loads in fresh interpreters"""
+    samples = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", COLD_START_SCRIPT, json.dumps(symptoms)],
+            cwd=SERVICE_DIR, env=os.environ, capture_output=True, text=True, check=True
+        )
+        samples.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return {key: round(float(np.median([sample[key] for sample in samples])), 4) for key in samples[0]}
+
+
+def measure_predictor(predictor, symptom_sets, n_requests: int, batch_sizes) -> dict:
+    """Single-row latency with and without the cache, and batch throughput"""
+    from app.ml.cache import PredictionCache
+
+    cache = predictor.cache
+    predictor.cache = PredictionCache(maxsize=0)
+    try:
+        for symptoms in symptom_sets[:50]:
+            predictor.predict(symptoms)
+
+        single = []
+        for i in range(n_requests):
+            symptoms = symptom_sets[i % len(symptom_sets)]
+            started = time.perf_counter()
+            predictor.predict(symptoms)
+            single.append(time.perf_counter() - started)
+
+        batches = {}
+        for size in batch_sizes:
+            batch = [symptom_sets[i % len(symptom_sets)] for i in range(size)]
+            timings = []
+            for _ in range(max(3, 2000 // size)):
+                started = time.perf_counter()
+                predictor.predict_batch(batch)
+                timings.append(time.perf_counter() - started)
+            batches[str(size)] = {
+                'batch_ms': round(float(np.median(timings)) * 1000, 4),
+                'rows_per_second': round(size / float(np.median(timings)), 1),
+            }
+    finally:
+        predictor.cache = cache
+
+    predictor.cache = PredictionCache(maxsize=len(symptom_sets))
+    try:
+        for symptoms in symptom_sets:
+            predictor.predict(symptoms)
+        cached = []
+        for i in range(n_requests):
+            symptoms = symptom_sets[i % len(symptom_sets)]
+            started = time.perf_counter()
+            predictor.predict(symptoms)
+            cached.append(time.perf_counter() - started)
+    finally:
+        predictor.cache = cache
+
+    return {
+        'student_answer_rate': predictor.student_stats()['answer_rate'],
+        'single': percentiles_ms(single),
+        'single_cached': percentiles_ms(cached),
+        'batch': batches,
+    }
+
+
+async def measure_api(symptom_sets, levels, n_requests: int) -> dict:
+    """POST /predict/ in-process through httpx's ASGI transport at several concurrency levels"""
+    import httpx
+    from main import app
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for symptoms in symptom_sets[:20]:
+            await client.post("/predict/", json={'symptoms': symptoms})
+
+        for level in levels:
+            latencies = []
+            errors = 0
+            counter = iter(range(n_requests))
+
+            async def client_loop():
+                nonlocal errors
+                for i in counter:
+                    started = time.perf_counter()
+                    response = await client.post("/predict/", json={'symptoms': symptom_sets[i % len(symptom_sets)]})
+                    latencies.append(time.perf_counter() - started)
+                    if response.status_code != 200:
+                        errors += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(client_loop() for _ in range(level)))
+            elapsed = time.perf_counter() - started
+
+            results[str(level)] = {
+                **percentiles_ms(latencies),
+                'requests_per_second': round(n_requests / elapsed, 1),
+                'errors': errors,
+            }
+            logger.info(f"  concurrency {level:>3}: {results[str(level)]['requests_per_second']:>8.1f} req/s, "
+                        f"p50 {results[str(level)]['p50_ms']:.3f} ms, p99 {results[str(level)]['p99_ms']:.3f} ms, "
+                        f"{errors} errors")
+    return results
+
+
+def measure_memory(predictor) -> dict:
+    from app.core.config import settings
+    from app.ml.memory import peak_rss_mb, process_memory
+
+    version_dir = predictor.registry.path(predictor.bundle.version)
+    artifact_bytes = sum(path.stat().st_size for path in version_dir.rglob("*") if path.is_file())
+    return {
+        'artifact_mb': round(artifact_bytes / (1024 * 1024), 3),
+        'peak_rss_mb': peak_rss_mb(),
+        **{key: value for key, value in process_memory(os.getpid(), Path(settings.MODEL_REGISTRY_PATH)).items()
+           if key != 'pid'},
+    }
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """Nested numeric results as {"a.b.c": value}"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(previous: dict, current: dict):
+    """Log every metric of both runs with its relative change"""
+    before, after = flatten(previous['results']), flatten(current['results'])
+    logger.info(f"\nCompared with {previous['git'].get('commit') or 'unknown commit'} "
+                f"({previous['timestamp']}):")
+    if previous['config'] != current['config']:
+        logger.info("  Warning: benchmark configurations differ, numbers are not directly comparable")
+    for name in sorted(set(before) & set(after)):
+        old, new = before[name], after[name]
+        change = (new - old) / old * 100 if old else 0.0
+        # Rates and accuracy improve upwards, times and sizes downwards
+        better = change > 0 if name.endswith(HIGHER_IS_BETTER) else change < 0
+        marker = "" if abs(change) < 5 else ("  better" if better else "  WORSE")
+        logger.info(f"  {name:<45} {old:>12.4f} -> {new:>12.4f} ({change:+6.1f}%){marker}")
+
+
+def main():
+    """Main benchmark function"""
+    args = parse_args()
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="benchmark-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    # Settings are read when app modules are imported; point everything at the workdir first
+    os.environ.update({
+        'DATA_FILE': str(workdir / "synthetic.csv"),
+        'RAW_DATA_PATH': str(workdir / "raw"),
+        'PROCESSED_DATA_PATH': str(workdir / "processed"),
+        'MODELS_PATH': str(workdir / "models"),
+        'MODEL_REGISTRY_PATH': str(workdir / "models" / "registry"),
+        'DATASET_CACHE_PATH': str(workdir / "processed" / "cache"),
+        'N_ESTIMATORS': str(args.n_estimators),
+        'N_ROWS': str(args.rows),
+        'PREDICTION_CACHE_SIZE': "0",
+        'DEBUG': "False",
+    })
+    if args.backend:
+        os.environ['INFERENCE_BACKEND'] = args.backend
+    sys.path.insert(0, str(SERVICE_DIR))
+
+    from app.core.config import settings
+    from app.ml.model import predictor
+
+    config = {
+        'rows': args.rows,
+        'symptoms': args.symptoms,
+        'diseases': args.diseases,
+        'symptoms_per_row': args.symptoms_per_row,
+        'n_estimators': args.n_estimators,
+        'inference_backend': settings.INFERENCE_BACKEND,
+        'student_enabled': settings.STUDENT_ENABLED,
+        'requests': args.requests,
+        'api_requests': args.api_requests,
+        'seed': args.seed,
+    }
+    logger.info("=" * 80)
+    logger.info("Disease Prediction Service Benchmark")
+    logger.info("=" * 80)
+    for name, value in config.items():
+        logger.info(f"  {name}: {value}")
+
+    logger.info(f"\nGenerating synthetic dataset in {workdir}...")
+    profiles = synthetic_dataset(Path(settings.DATA_FILE), args.rows, args.symptoms, args.diseases,
+                                 args.symptoms_per_row, args.seed)
+
+    logger.info("Training...")
+    started = time.perf_counter()
+    metrics = predictor.train()
+    predictor.save_model()
+    training_seconds = time.perf_counter() - started
+
+    # httpx logs every request at INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    symptom_sets = symptom_queries(profiles, [f"symptom {i}" for i in range(args.symptoms)],
+                                   args.symptoms_per_row, 500, args.seed)
+
+    logger.info(f"Cold start ({args.cold_runs} fresh interpreters)...")
+    cold_start = measure_cold_start(symptom_sets[0], args.cold_runs)
+
+    logger.info("Predictor latency and throughput...")
+    predictor_results = measure_predictor(
+        predictor, symptom_sets, args.requests,
+        [int(size) for size in args.batch_sizes.split(",")]
+    )
+
+    logger.info("API concurrency (httpx ASGI transport)...")
+    api_results = asyncio.run(measure_api(
+        symptom_sets, [int(level) for level in args.concurrency.split(",")], args.api_requests
+    ))
+
+    report = {
+        'format': RESULTS_FORMAT,
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        'git': git_revision(),
+        'platform': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+        },
+        'config': config,
+        'results': {
+            'training': {
+                'seconds': round(training_seconds, 3),
+                'test_accuracy': metrics['test_accuracy'],
+            },
+            'cold_start': cold_start,
+            'predictor': predictor_results,
+            'api': api_results,
+            'memory': measure_memory(predictor),
+        },
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    results = report['results']
+    logger.info("\n" + "=" * 80)
+    logger.info("Benchmark Results")
+    logger.info("=" * 80)
+    logger.info(f"  Cold start: import {cold_start['import_s']:.2f}s, load {cold_start['load_s']:.3f}s, "
+                f"first prediction {cold_start['first_predict_ms']:.1f} ms")
+    single = results['predictor']['single']
+    logger.info(f"  Single row: p50 {single['p50_ms']:.3f} ms, p95 {single['p95_ms']:.3f} ms, "
+                f"p99 {single['p99_ms']:.3f} ms")
+    for size, batch in results['predictor']['batch'].items():
+        logger.info(f"  Batch {size:>4}: {batch['rows_per_second']:>10.1f} rows/s")
+    logger.info(f"  Memory: RSS {results['memory'].get('rss_mb')} MB, artifacts {results['memory']['artifact_mb']} MB")
+    logger.info(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
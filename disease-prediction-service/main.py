@@ -3,10 +3,108 @@ Disease Prediction Service - Main Application
 FastAPI microservice for ML-based disease prediction from symptoms
 """
 
+import time
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+import asyncio
+import logging
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.startup import startup
 from app.core.config import settings
-from app.api.routes import health, prediction, training
+from app.core.metrics import MetricsMiddleware
+from app.api.dependencies import PER_WORKER_ENDPOINTS
+from app.api.routes import health, metrics, prediction, training
+from app.ml.jobs import training_jobs
+from app.ml.executor import inference_executor
+from app.ml.model import predictor
+from app.ml.shadow import shadow_evaluator
+
+startup.record("imports", time.perf_counter() - _import_started)
+logger = logging.getLogger(__name__)
+
+
+def check_worker_settings():
+    """
+    Refuse to start several API workers with the sklearn backend
+
+    sklearn trees are unpickled into private memory in every worker; only
+    the compiled forest's memory-mapped arrays are shared between them.
+
+    Raises:
+        RuntimeError: When WORKERS > 1 and INFERENCE_BACKEND is not "compiled"
+    """
+    if settings.WORKERS > 1 and settings.INFERENCE_BACKEND != "compiled":
+        raise RuntimeError(
+            f"WORKERS={settings.WORKERS} requires INFERENCE_BACKEND=compiled so the workers share one "
+            f"memory-mapped model (got INFERENCE_BACKEND={settings.INFERENCE_BACKEND})"
+        )
+
+
+async def sync_model_version():
+    """Reload when another worker activates a different model version"""
+    while True:
+        await asyncio.sleep(settings.MODEL_SYNC_INTERVAL)
+        try:
+            if await asyncio.to_thread(predictor.sync_active_version):
+                inference_executor.reset()
+        except Exception as e:
+            logger.error(f"Model version sync failed: {str(e)}")
+
+
+async def warm_up():
+    """
+    Load and warm the model in the background, then report ready
+    
+    Runs after the server starts listening, so liveness probes pass while
+    the model loads and /health/ready turns 200 once it is warm.
+    """
+    error = None
+    try:
+        with startup.phase("model_load"):
+            loaded = await asyncio.to_thread(predictor.ensure_loaded)
+        if loaded:
+            with startup.phase("warmup"):
+                await asyncio.to_thread(predictor.warm_up)
+            with startup.phase("workers"):
+                await inference_executor.warm_up()
+        else:
+            error = "No trained model available"
+    except Exception as e:
+        error = f"Startup warm-up failed: {str(e)}"
+        logger.error(error)
+    startup.mark_ready(error)
+    logger.info(f"Ready after {startup.ready_after:.2f}s ({startup.summary()})"
+                + (f"; {error}" if error else ""))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown"""
+    check_worker_settings()
+    sync_task = None
+    warmup_task = None
+    if settings.WORKERS > 1:
+        logger.warning(f"Running with WORKERS={settings.WORKERS}: shadow evaluation and "
+                       f"drift endpoints keep state per worker and answer 501 "
+                       f"({', '.join(PER_WORKER_ENDPOINTS)}); /predict/stats and /metrics report the worker "
+                       f"that answered")
+    if settings.WORKERS > 1 and settings.MODEL_SYNC_INTERVAL > 0:
+        sync_task = asyncio.create_task(sync_model_version())
+    if settings.MODEL_PRELOAD:
+        warmup_task = asyncio.create_task(warm_up())
+    else:
+        startup.mark_ready()
+        logger.info(f"Ready after {startup.ready_after:.2f}s ({startup.summary()}), model loads on first use")
+    yield
+    for task in (sync_task, warmup_task):
+        if task is not None:
+            task.cancel()
+    inference_executor.shutdown()
+    shadow_evaluator.shutdown()
+    training_jobs.shutdown()
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -15,6 +113,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -25,9 +124,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(health.router, tags=["Health"])
+app.include_router(metrics.router, tags=["Monitoring"])
 app.include_router(prediction.router, prefix="/predict", tags=["Prediction"])
 app.include_router(training.router, prefix=f"{settings.API_V1_STR}/train", tags=["Training"])
 
@@ -39,14 +140,24 @@ async def root():
         "version": "1.0.0",
         "status": "running",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "readiness": "/health/ready",
+        "metrics": "/metrics"
     }
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
+    try:
+        # Fail once here rather than in every worker's lifespan
+        check_worker_settings()
+    except RuntimeError as e:
+        sys.exit(str(e))
     uvicorn.run(
         "main:app",
         host=settings.SERVICE_HOST,
         port=settings.SERVICE_PORT,
-        reload=settings.DEBUG
+        # uvicorn ignores workers when reloading
+        reload=settings.DEBUG and settings.WORKERS == 1,
+        workers=settings.WORKERS
     )
@@ -0,0 +1,99 @@
+"""
+Shared test setup
+
+Settings are read when app.core.config is first imported, so every path
+is pointed at a temporary directory before any app module loads.
+"""
+import os
+import tempfile
+
+_ROOT = tempfile.mkdtemp(prefix="disease-prediction-tests-")
+os.environ.update({
+    "RAW_DATA_PATH": os.path.join(_ROOT, "raw"),
+    "PROCESSED_DATA_PATH": os.path.join(_ROOT, "processed"),
+    "MODELS_PATH": os.path.join(_ROOT, "models"),
+    "MODEL_REGISTRY_PATH": os.path.join(_ROOT, "models", "registry"),
+    "DATASET_CACHE_PATH": os.path.join(_ROOT, "cache"),
+    "DATA_FILE": os.path.join(_ROOT, "processed", "dataset.csv"),
+    "MODEL_PATH": os.path.join(_ROOT, "models", "disease_model.pkl"),
+    "ENCODER_PATH": os.path.join(_ROOT, "models", "label_encoder.pkl"),
+    "SYMPTOM_INDEX_PATH": os.path.join(_ROOT, "models", "symptom_index.pkl"),
+    "N_ESTIMATORS": "10",
+    "WORKERS": "1",
+})
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+N_SYMPTOMS = 30
+N_DISEASES = 6
+
+
+def write_dataset(path: str, rows: int = 1200, seed: int = 0) -> np.ndarray:
+    """
+    Synthetic CSV shaped like the real dataset
+
+    Each disease has five characteristic symptoms; a row takes three of
+    them plus one random symptom. Returns the characteristic symptom
+    columns of each disease.
+    """
+    rng = np.random.default_rng(seed)
+    profiles = np.stack([rng.choice(N_SYMPTOMS, 5, replace=False) for _ in range(N_DISEASES)])
+    labels = rng.integers(0, N_DISEASES, rows)
+    picks = rng.random((rows, 5)).argsort(axis=1)[:, :3]
+    features = np.zeros((rows, N_SYMPTOMS), dtype=np.uint8)
+    features[np.arange(rows)[:, None], profiles[labels[:, None], picks]] = 1
+    features[np.arange(rows), rng.integers(0, N_SYMPTOMS, rows)] = 1
+
+    frame = pd.DataFrame(features, columns=[f"symptom {i}" for i in range(N_SYMPTOMS)])
+    frame.insert(0, "diseases", np.array([f"disease {i}" for i in range(N_DISEASES)], dtype=object)[labels])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    frame.to_csv(path, index=False)
+    return profiles
+
+
+@pytest.fixture(scope="session")
+def disease_symptoms():
+    """Characteristic symptom names of every disease in the training data"""
+    from app.core.config import ensure_directories, settings
+    ensure_directories()
+    profiles = write_dataset(settings.DATA_FILE)
+    return [[f"symptom {column}" for column in row] for row in profiles]
+
+
+@pytest.fixture(scope="session")
+def trained_model(disease_symptoms):
+    """The global predictor serving a model trained on the synthetic dataset"""
+    from app.ml.model import predictor
+    predictor.train()
+    predictor.save_model()
+    return predictor.bundle.version
+
+
+@pytest.fixture
+def restore_served_model(trained_model):
+    """Serve the session's model again after a test that activates another version"""
+    from app.ml.executor import inference_executor
+    from app.ml.model import predictor
+    predictor.registry.pin(trained_model)
+    yield
+    predictor.registry.unpin(trained_model)
+    predictor.activate(trained_model)
+    inference_executor.reset()
+
+
+@pytest.fixture(scope="session")
+def client(trained_model):
+    """TestClient whose app finished its startup warm-up"""
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as test_client:
+        deadline = time.time() + 30
+        while test_client.get("/health/ready").status_code != 200:
+            assert time.time() < deadline, "service never became ready"
+            time.sleep(0.05)
+        yield test_client
@@ -0,0 +1,145 @@
+"""
+HTTP contract of the prediction endpoints
+"""
+import pytest
+
+
+def test_predict_returns_top_disease(client, disease_symptoms):
+    response = client.post("/predict/", json={"symptoms": disease_symptoms[0][:3]})
+
+    assert response.status_code == 200
+    prediction = response.json()["prediction"]
+    assert prediction["disease"] == "disease 0"
+    assert prediction["matched_symptoms"] == disease_symptoms[0][:3]
+
+
+def test_predict_rejects_unknown_symptoms(client):
+    response = client.post("/predict/", json={"symptoms": ["not a symptom at all"]})
+
+    assert response.status_code == 400
+
+
+def test_symptom_search_runs_on_the_executor(client):
+    from app.ml.executor import inference_executor
+    submitted = inference_executor.stats()["submitted"]
+
+    response = client.get("/predict/symptoms/search", params={"q": "symptom 1", "limit": 3})
+
+    assert response.status_code == 200
+    assert response.json()["matches"][0]["symptom"] == "symptom 1"
+    assert inference_executor.stats()["submitted"] == submitted + 1
+
+
+def test_related_symptoms_runs_on_the_executor(client, disease_symptoms):
+    from app.ml.executor import inference_executor
+    submitted = inference_executor.stats()["submitted"]
+
+    response = client.get("/predict/symptoms/related", params={"symptoms": ",".join(disease_symptoms[1][:2])})
+
+    assert response.status_code == 200
+    assert response.json()["suggestions"]
+    assert inference_executor.stats()["submitted"] == submitted + 1
+
+
+def test_info_revalidates_with_etag(client, trained_model):
+    first = client.get("/predict/info")
+    etag = first.headers["ETag"]
+
+    assert first.status_code == 200
+    assert first.json()["model_info"]["active_version"] == trained_model
+    revalidated = client.get("/predict/info", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+
+def test_info_follows_the_active_pointer(client, trained_model, monkeypatch):
+    from app.ml.model import predictor
+    etag = client.get("/predict/info").headers["ETag"]
+
+    # The sync task saw another process activate a version not loaded yet
+    monkeypatch.setattr(predictor, "active_version", "v9999")
+    response = client.get("/predict/info", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.json()["model_info"]["active_version"] == "v9999"
+    assert response.headers["ETag"] != etag
+
+
+def test_info_does_not_read_the_active_pointer(client, trained_model, monkeypatch):
+    from app.ml.model import predictor
+    etag = client.get("/predict/info").headers["ETag"]
+
+    def unreadable():
+        raise AssertionError("/predict/info read the ACTIVE file")
+
+    monkeypatch.setattr(predictor.registry, "_read_pointer", unreadable)
+
+    assert client.get("/predict/info", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/predict/info").json()["model_info"]["active_version"] == trained_model
+
+
+def test_batch_matches_single_predictions_and_reports_failures(client, disease_symptoms):
+    symptom_sets = [symptoms[:3] for symptoms in disease_symptoms] + [["not a symptom at all"]]
+
+    response = client.post("/predict/batch", json={"symptom_sets": symptom_sets})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total"], body["succeeded"], body["failed"]) == (len(symptom_sets), len(disease_symptoms), 1)
+    for item, symptoms in zip(body["predictions"], symptom_sets):
+        if item["success"]:
+            single = client.post("/predict/", json={"symptoms": symptoms}).json()["prediction"]
+            assert item["prediction"]["disease"] == single["disease"]
+            assert item["prediction"]["confidence"] == pytest.approx(single["confidence"])
+    failed = body["predictions"][-1]
+    assert (failed["index"], failed["success"], failed["prediction"]) == (len(disease_symptoms), False, None)
+    assert failed["error"]
+
+
+def test_batch_over_the_limit_is_rejected(client, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "MAX_BATCH_SIZE", 2)
+
+    response = client.post("/predict/batch", json={"symptom_sets": [["symptom 1"]] * 3})
+
+    assert response.status_code == 413
+
+
+def test_reordered_symptoms_share_a_cache_entry(client, disease_symptoms):
+    from app.ml.model import predictor
+    symptoms = disease_symptoms[2][:3]
+    client.post("/predict/", json={"symptoms": symptoms})
+    hits = predictor.cache.hits
+
+    reordered = [name.upper() for name in reversed(symptoms)]
+    response = client.post("/predict/", json={"symptoms": reordered})
+
+    assert response.status_code == 200
+    assert predictor.cache.hits == hits + 1
+    assert response.json()["prediction"]["disease"] == "disease 2"
+
+
+def test_predict_corrects_misspelled_and_colloquial_symptoms(client, disease_symptoms, monkeypatch):
+    import dataclasses
+    from app.ml.matcher import SymptomMatcher
+    from app.ml.model import predictor
+    first, second, third = disease_symptoms[0][:3]
+    bundle = predictor.bundle
+    monkeypatch.setattr(predictor, "_bundle", dataclasses.replace(
+        bundle, matcher=SymptomMatcher(bundle.symptoms, {"first sign": first})
+    ))
+
+    response = client.post("/predict/", json={
+        "symptoms": ["first sign", second.replace("symptom", "symptm"), third.replace(" ", "-"), "not a symptom"]
+    })
+
+    assert response.status_code == 200
+    prediction = response.json()["prediction"]
+    assert prediction["disease"] == "disease 0"
+    assert prediction["matched_symptoms"] == [first, second, third]
+    assert prediction["corrected_symptoms"] == {
+        "first sign": first,
+        second.replace("symptom", "symptm"): second,
+        third.replace(" ", "-"): third,
+    }
+    assert prediction["unmatched_symptoms"] == ["not a symptom"]
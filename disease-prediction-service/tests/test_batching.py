@@ -0,0 +1,125 @@
+"""
+Micro-batching of concurrent single predictions
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.ml import batching
+from app.ml.batching import MicroBatcher
+
+
+class _RecordingExecutor:
+    """Stands in for the inference executor, running each batch inline and keeping it"""
+
+    def __init__(self):
+        self.batches = []
+
+    async def run(self, fn, symptom_sets):
+        self.batches.append(symptom_sets)
+        return fn(symptom_sets)
+
+
+@pytest.fixture
+def executor(monkeypatch, trained_model):
+    executor = _RecordingExecutor()
+    monkeypatch.setattr(batching, "inference_executor", executor)
+    return executor
+
+
+def _run(scenario):
+    """Await scenario() on a fresh loop, failing on exceptions no task retrieved"""
+    errors = []
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        # A batch task that dies leaves its other requests waiting forever
+        result = await asyncio.wait_for(scenario(), timeout=5)
+        # Let batch tasks still fanning out finish before the loop closes
+        await asyncio.sleep(0.01)
+        return result
+
+    result = asyncio.run(main())
+    assert not errors, errors
+    return result
+
+
+def test_concurrent_submits_share_one_batch(executor, disease_symptoms):
+    batcher = MicroBatcher(max_wait_ms=50, max_size=10)
+
+    results = _run(lambda: asyncio.gather(*(batcher.submit(symptoms[:3]) for symptoms in disease_symptoms[:4])))
+
+    assert executor.batches == [[symptoms[:3] for symptoms in disease_symptoms[:4]]]
+    assert [result["disease"] for result in results] == [f"disease {i}" for i in range(4)]
+    assert batcher.stats()["largest_batch"] == 4
+
+
+def test_a_lone_request_is_flushed_after_the_max_wait(executor, disease_symptoms):
+    batcher = MicroBatcher(max_wait_ms=30, max_size=10)
+
+    started = time.perf_counter()
+    result = _run(lambda: batcher.submit(disease_symptoms[2][:3]))
+    elapsed = time.perf_counter() - started
+
+    assert result["disease"] == "disease 2"
+    assert executor.batches == [[disease_symptoms[2][:3]]]
+    assert elapsed >= 0.03
+
+
+def test_a_full_batch_is_flushed_without_waiting(executor, disease_symptoms):
+    batcher = MicroBatcher(max_wait_ms=10_000, max_size=2)
+
+    started = time.perf_counter()
+    _run(lambda: asyncio.gather(batcher.submit(disease_symptoms[0][:3]), batcher.submit(disease_symptoms[1][:3])))
+
+    assert time.perf_counter() - started < 5
+    assert len(executor.batches) == 1
+
+
+def test_an_invalid_symptom_list_fails_only_its_own_request(executor, disease_symptoms):
+    batcher = MicroBatcher(max_wait_ms=20, max_size=10)
+
+    results = _run(lambda: asyncio.gather(
+        batcher.submit(disease_symptoms[0][:3]),
+        batcher.submit(["not a symptom at all"]),
+        batcher.submit(disease_symptoms[1][:3]),
+        return_exceptions=True,
+    ))
+
+    assert len(executor.batches) == 1
+    assert results[0]["disease"] == "disease 0"
+    assert isinstance(results[1], ValueError)
+    assert results[2]["disease"] == "disease 1"
+
+
+def test_cancelled_requests_are_skipped_when_the_batch_returns(executor, disease_symptoms):
+    batcher = MicroBatcher(max_wait_ms=20, max_size=10)
+
+    async def scenario():
+        tasks = [asyncio.create_task(batcher.submit(symptoms[:3])) for symptoms in disease_symptoms[:3]]
+        await asyncio.sleep(0)
+        tasks[1].cancel()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = _run(scenario)
+
+    assert len(executor.batches[0]) == 3
+    assert isinstance(results[1], asyncio.CancelledError)
+    assert (results[0]["disease"], results[2]["disease"]) == ("disease 0", "disease 2")
+
+
+def test_requests_already_answered_are_left_alone(executor, disease_symptoms):
+    batcher = MicroBatcher(max_wait_ms=10_000, max_size=10)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        answered, waiting = loop.create_future(), loop.create_future()
+        answered.set_result("answered elsewhere")
+        await batcher._run([(disease_symptoms[0][:3], answered), (disease_symptoms[1][:3], waiting)])
+        return answered.result(), waiting.result()
+
+    answered, waiting = _run(scenario)
+
+    assert answered == "answered elsewhere"
+    assert waiting["disease"] == "disease 1"
@@ -0,0 +1,81 @@
+"""
+CompiledForest must reproduce RandomForestClassifier.predict_proba
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app.ml.compiled import CompiledForest
+
+
+def _fit(X: np.ndarray, seed: int = 0) -> RandomForestClassifier:
+    rng = np.random.default_rng(seed)
+    y = rng.integers(0, 4, size=len(X))
+    # Tie the label to the features so trees grow past the root
+    y[X[:, 0] > X[:, 1]] = 4
+    return RandomForestClassifier(n_estimators=8, random_state=seed).fit(X, y)
+
+
+@pytest.fixture
+def binary_data():
+    rng = np.random.default_rng(1)
+    return (rng.random((400, 24)) < 0.3).astype(np.float32)
+
+
+@pytest.fixture
+def continuous_data():
+    # Every value, and so every threshold, lies in [0, 1)
+    return np.random.default_rng(2).random((400, 6)).astype(np.float32)
+
+
+def test_binary_forest_uses_packed_path_and_matches_sklearn(binary_data):
+    model = _fit(binary_data)
+    compiled = CompiledForest.from_sklearn(model)
+
+    assert compiled.binary
+    np.testing.assert_allclose(compiled.predict_proba(binary_data), model.predict_proba(binary_data), atol=1e-9)
+
+
+def test_continuous_forest_in_unit_interval_matches_sklearn(continuous_data):
+    model = _fit(continuous_data)
+    compiled = CompiledForest.from_sklearn(model)
+
+    assert not compiled.binary
+    np.testing.assert_allclose(compiled.predict_proba(continuous_data), model.predict_proba(continuous_data),
+                               atol=1e-9)
+
+
+def test_binary_inputs_flag_allows_any_unit_threshold(binary_data):
+    model = _fit(binary_data)
+    compiled = CompiledForest.from_sklearn(model, binary_inputs=True)
+
+    assert compiled.binary
+    np.testing.assert_allclose(compiled.predict_proba(binary_data), model.predict_proba(binary_data), atol=1e-9)
+
+
+def test_non_binary_input_to_binary_forest_uses_thresholds(binary_data):
+    model = _fit(binary_data)
+    compiled = CompiledForest.from_sklearn(model)
+    X = binary_data * 0.4
+
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), atol=1e-9)
+
+
+def test_indices_match_dense_rows(binary_data):
+    model = _fit(binary_data)
+    compiled = CompiledForest.from_sklearn(model)
+    rows = [list(np.flatnonzero(row)) for row in binary_data[:50]]
+
+    np.testing.assert_allclose(compiled.predict_proba_indices(rows), model.predict_proba(binary_data[:50]),
+                               atol=1e-9)
+
+
+def test_save_load_round_trip(tmp_path, binary_data):
+    model = _fit(binary_data)
+    compiled = CompiledForest.from_sklearn(model)
+    compiled.save(tmp_path / "compiled")
+
+    loaded = CompiledForest.load(tmp_path / "compiled", mmap_mode='r')
+
+    assert loaded.binary == compiled.binary
+    np.testing.assert_allclose(loaded.predict_proba(binary_data), model.predict_proba(binary_data), atol=1e-9)
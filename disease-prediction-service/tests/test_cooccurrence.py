@@ -0,0 +1,82 @@
+"""
+Next-symptom suggestions from the co-occurrence index
+"""
+import numpy as np
+import pytest
+
+from app.ml.cooccurrence import SMOOTHING, CooccurrenceIndex
+
+ROWS_PER_DISEASE = 10
+
+
+@pytest.fixture(scope="module")
+def index():
+    """
+    Four equally common diseases over five symptoms:
+
+    0: every row of every disease, tells nothing
+    1: every row of diseases 0 and 1, splits them two against two
+    2: every row of disease 0, singles it out
+    3: half the rows of disease 0
+    4: never seen, so never suggested
+    """
+    labels = np.repeat(np.arange(4), ROWS_PER_DISEASE)
+    features = np.zeros((len(labels), 5), dtype=np.uint8)
+    features[:, 0] = 1
+    features[labels <= 1, 1] = 1
+    features[labels == 0, 2] = 1
+    features[np.flatnonzero(labels == 0)[:ROWS_PER_DISEASE // 2], 3] = 1
+    return CooccurrenceIndex.build(features, labels, n_diseases=4, chunk_rows=7)
+
+
+def _information_gain(index, known, symptom):
+    """H(D) - E[H(D | answer)] for one symptom, one disease at a time"""
+    posterior = index.posterior(known)
+    counts = index.disease_symptom.toarray()[:, symptom]
+    present = (counts + SMOOTHING) / (index.disease_counts + 2 * SMOOTHING)
+
+    def entropy(weights):
+        weights = weights[weights > 0] / weights.sum()
+        return -(weights * np.log2(weights)).sum()
+
+    p_present = (posterior * present).sum()
+    return (entropy(posterior)
+            - p_present * entropy(posterior * present)
+            - (1 - p_present) * entropy(posterior * (1 - present)))
+
+
+def test_counts_match_the_rows(index):
+    assert index.n_rows == 4 * ROWS_PER_DISEASE
+    np.testing.assert_array_equal(index.disease_counts, [ROWS_PER_DISEASE] * 4)
+    np.testing.assert_array_equal(index.symptom_counts, [40, 20, 10, 5, 0])
+    assert index.cooccurrence[1, 2] == 10
+    assert index.disease_symptom[0, 3] == 5
+
+
+def test_suggestions_are_ranked_by_information_gain(index):
+    suggestions = index.suggest([], k=10)
+
+    assert [suggestion['index'] for suggestion in suggestions] == [1, 2, 3, 0]
+    for suggestion in suggestions:
+        expected = _information_gain(index, [], suggestion['index'])
+        # The index keeps float32 tables
+        assert suggestion['information_gain'] == pytest.approx(expected, abs=1e-5)
+    assert suggestions[-1]['information_gain'] == pytest.approx(0, abs=0.01)
+    assert suggestions[0]['probability'] == pytest.approx(0.5)
+
+
+def test_known_symptoms_are_not_suggested_again(index):
+    suggestions = index.suggest([1], k=10)
+
+    indices = [suggestion['index'] for suggestion in suggestions]
+    assert 1 not in indices
+    # With diseases 0 and 1 left, symptom 2 is the one that tells them apart
+    assert indices[0] == 2
+    for suggestion in suggestions:
+        expected = _information_gain(index, [1], suggestion['index'])
+        assert suggestion['information_gain'] == pytest.approx(expected, abs=1e-5)
+        assert suggestion['cooccurrence'] == index.cooccurrence[1, suggestion['index']]
+
+
+def test_k_limits_the_suggestions(index):
+    assert [suggestion['index'] for suggestion in index.suggest([], k=2)] == [1, 2]
@@ -0,0 +1,65 @@
+"""
+Distilled student: parity with its teacher and the student-first serving path
+"""
+import numpy as np
+import pytest
+from scipy import sparse
+
+from app.core.config import settings
+from app.ml.model import predictor
+
+
+@pytest.fixture
+def rows(trained_model, disease_symptoms):
+    bundle = predictor.bundle
+    return [[bundle.symptom_index[name] for name in symptoms[:k]]
+            for symptoms in disease_symptoms for k in (1, 2, 3)]
+
+
+def _dense(rows, n_features):
+    X = np.zeros((len(rows), n_features), dtype=np.uint8)
+    for row, indices in enumerate(rows):
+        X[row, indices] = 1
+    return X
+
+
+def test_student_index_and_matrix_inputs_agree(rows):
+    student = predictor.bundle.student
+    X = _dense(rows, student.n_features)
+
+    expected = student.predict_proba(X)
+    np.testing.assert_allclose(student.predict_proba_indices(rows), expected, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(student.predict_proba(sparse.csr_matrix(X)), expected, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(expected.sum(axis=1), 1.0, rtol=1e-5)
+
+
+def test_student_agrees_with_the_forest(trained_model):
+    from app.ml.training import load_encoded_dataset
+    bundle = predictor.bundle
+    features = np.asarray(load_encoded_dataset(settings.DATA_FILE).features[:500])
+    rows = [np.flatnonzero(row).tolist() for row in features]
+
+    student = bundle.student.predict_proba_indices(rows)
+    forest = predictor._forest_proba(bundle, rows)
+    confident = student.max(axis=1) >= settings.STUDENT_CONFIDENCE_THRESHOLD
+
+    assert np.mean(student.argmax(axis=1) == forest.argmax(axis=1)) >= 0.9
+    assert np.mean(student[confident].argmax(axis=1) == forest[confident].argmax(axis=1)) >= 0.95
+
+
+@pytest.mark.parametrize("threshold, answered_by", [(1.01, "forest"), (0.0, "student")])
+def test_confidence_threshold_picks_the_backend(rows, monkeypatch, threshold, answered_by):
+    monkeypatch.setattr(settings, "STUDENT_CONFIDENCE_THRESHOLD", threshold)
+    bundle = predictor.bundle
+    expected = (predictor._forest_proba(bundle, rows) if answered_by == "forest"
+                else bundle.student.predict_proba_indices(rows))
+
+    np.testing.assert_allclose(predictor._predict_proba_indices(bundle, rows, count=False), expected)
+
+
+def test_disabled_student_serves_the_forest(rows, monkeypatch):
+    monkeypatch.setattr(settings, "STUDENT_ENABLED", False)
+    bundle = predictor.bundle
+
+    np.testing.assert_allclose(predictor._predict_proba_indices(bundle, rows, count=False),
+                               predictor._forest_proba(bundle, rows))
@@ -0,0 +1,81 @@
+"""
+Drift monitor: training profile, streaming counts and the /predict/drift endpoint
+"""
+import numpy as np
+
+from app.ml.drift import CountMinSketch, js_divergence
+from app.ml.profiles import SYMPTOM_COUNT_BINS, DiseaseProfiles
+
+
+def _profiles(rows_with_two_symptoms: int) -> DiseaseProfiles:
+    symptoms_per_row = np.zeros(SYMPTOM_COUNT_BINS, dtype=np.int64)
+    symptoms_per_row[2] = rows_with_two_symptoms
+    return DiseaseProfiles.from_counts(
+        ["flu", "cold"], ["fever", "cough", "rash"],
+        [rows_with_two_symptoms, 0], [[rows_with_two_symptoms, rows_with_two_symptoms, 0], [0, 0, 0]],
+        symptoms_per_row, top_k=2
+    )
+
+
+def test_profiles_keep_the_symptoms_per_row_histogram(tmp_path):
+    profiles = _profiles(4).merged(_profiles(6))
+    profiles.save(tmp_path / "profiles")
+
+    loaded = DiseaseProfiles.load(tmp_path / "profiles")
+    assert loaded.symptoms_per_row[2] == 10
+    assert loaded.symptoms_per_row.sum() == loaded.disease_counts.sum()
+
+
+def test_js_divergence_bounds():
+    assert js_divergence(np.array([1.0, 3.0]), np.array([2.0, 6.0])) == 0.0
+    assert abs(js_divergence(np.array([1.0, 0.0]), np.array([0.0, 1.0])) - 1.0) < 1e-12
+    assert js_divergence(np.zeros(2), np.array([1.0, 1.0])) is None
+
+
+def test_count_min_sketch_never_undercounts():
+    sketch = CountMinSketch(width=8, depth=3)
+    for number in range(50):
+        sketch.add(f"symptom {number}", count=number + 1)
+
+    assert all(sketch.estimate(f"symptom {number}") >= number + 1 for number in range(50))
+    assert sketch.total == sum(range(1, 51))
+
+
+def test_drift_report_compares_live_inputs_with_training(client, disease_symptoms):
+    assert client.post("/predict/drift/reset").status_code == 200
+    for _ in range(5):
+        client.post("/predict/", json={"symptoms": [disease_symptoms[0][0], "mystery rash"]})
+
+    report = client.get("/predict/drift").json()
+
+    assert report["rows"] == 5
+    assert report["mean_symptoms_per_row"] == 1.0
+    assert report["training_mean_symptoms_per_row"] > 3
+    assert all(value is not None and value > 0 for value in report["divergence"].values())
+    assert report["top_unmatched"] == [{"symptom": "mystery rash", "count": 5}]
+
+
+
+def test_profiles_saved_without_the_histogram_skip_that_distribution(client, disease_symptoms, tmp_path, monkeypatch):
+    import dataclasses
+    from app.ml.model import predictor
+    bundle = predictor.bundle
+    bundle.profiles.save(tmp_path / "profiles")
+    (tmp_path / "profiles" / "symptoms_per_row.npy").unlink()
+    old_profiles = DiseaseProfiles.load(tmp_path / "profiles")
+    assert old_profiles.symptoms_per_row is None
+    assert old_profiles.merged(bundle.profiles).symptoms_per_row is None
+    monkeypatch.setattr(predictor, "_bundle", dataclasses.replace(
+        bundle.with_version(bundle.version), profiles=old_profiles
+    ))
+
+    for _ in range(3):
+        client.post("/predict/", json={"symptoms": [disease_symptoms[0][0], "mystery rash"]})
+    report = client.get("/predict/drift").json()
+
+    assert report["rows"] == 3
+    assert report["training_profile"] is True
+    assert report["divergence"]["symptoms_per_row"] is None
+    assert report["training_mean_symptoms_per_row"] is None
+    assert report["divergence"]["symptom_frequency"] > 0
+    assert report["divergence"]["predicted_disease"] > 0
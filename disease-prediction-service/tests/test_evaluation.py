@@ -0,0 +1,77 @@
+"""
+Evaluation metrics reported by training
+"""
+import numpy as np
+import pytest
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+
+from app.core.config import settings
+from app.ml.model import DiseasePredictor
+from app.ml.registry import ModelRegistry
+from app.ml.training import classification_metrics
+from conftest import write_dataset
+
+
+def _sklearn_metrics(y_true, y_pred):
+    return {
+        'test_accuracy': accuracy_score(y_true, y_pred),
+        'precision': precision_score(y_true, y_pred, average='weighted', zero_division=0),
+        'recall': recall_score(y_true, y_pred, average='weighted', zero_division=0),
+        'f1_score': f1_score(y_true, y_pred, average='weighted', zero_division=0),
+    }
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_metrics_match_sklearn(seed):
+    rng = np.random.default_rng(seed)
+    y_true = rng.integers(0, 8, 500)
+    # Mostly right, with some confusion between neighbouring classes
+    y_pred = np.where(rng.random(500) < 0.7, y_true, (y_true + rng.integers(1, 3, 500)) % 8)
+
+    metrics = classification_metrics(y_true, y_pred, n_classes=8)
+
+    assert metrics == pytest.approx(_sklearn_metrics(y_true, y_pred), abs=1e-12)
+
+
+def test_never_predicted_and_absent_classes_follow_zero_division():
+    # Class 2 is never predicted, class 3 is only predicted, class 4 never occurs
+    y_true = np.array([0, 0, 1, 1, 1, 2, 2, 2, 2])
+    y_pred = np.array([0, 1, 1, 1, 3, 0, 1, 0, 3])
+
+    metrics = classification_metrics(y_true, y_pred, n_classes=5)
+
+    assert metrics == pytest.approx(_sklearn_metrics(y_true, y_pred), abs=1e-12)
+
+
+@pytest.fixture
+def dataset_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DATASET_CACHE_PATH", str(tmp_path / "cache"))
+    monkeypatch.setattr(settings, "DISTILL_STUDENT", False)
+    path = tmp_path / "dataset.csv"
+    write_dataset(str(path), rows=600, seed=6)
+    return str(path)
+
+
+def test_fast_evaluation_reports_out_of_bag_accuracy(dataset_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "FAST_EVALUATION", True)
+    fast_predictor = DiseasePredictor(ModelRegistry(str(tmp_path / "fast")))
+
+    metrics = fast_predictor.train(dataset_path)
+
+    model = fast_predictor.bundle.model
+    assert 'train_accuracy' not in metrics
+    assert metrics['oob_accuracy'] == model.oob_score_
+    assert 0.5 < metrics['oob_accuracy'] <= 1.0
+    # The per-row OOB probabilities are dropped once scored
+    assert not hasattr(model, 'oob_decision_function_')
+
+
+def test_full_evaluation_rescores_the_training_rows(dataset_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "FAST_EVALUATION", False)
+    full_predictor = DiseasePredictor(ModelRegistry(str(tmp_path / "full")))
+
+    metrics = full_predictor.train(dataset_path)
+
+    assert 'oob_accuracy' not in metrics
+    # Scored on rows the forest was fitted on, so it beats the test accuracy
+    assert metrics['train_accuracy'] >= metrics['test_accuracy']
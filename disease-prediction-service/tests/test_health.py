@@ -0,0 +1,37 @@
+"""
+Liveness and readiness probes
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+
+def test_ready_once_the_model_is_warm(client, trained_model):
+    response = client.get("/health/ready")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] and body["model_loaded"]
+    assert body["model_version"] == trained_model
+    assert {"imports", "model_load", "warmup"} <= set(body["phases"])
+    assert body["error"] is None
+
+
+def test_not_ready_while_starting_but_alive(client, monkeypatch):
+    from app.core.startup import startup
+    monkeypatch.setattr(startup, "ready", False)
+
+    assert client.get("/health/ready").status_code == 503
+    assert client.get("/health/live").status_code == 200
+    assert client.get("/health").json()["ready"] is False
+
+
+def test_serving_imports_skip_training_dependencies():
+    # A fresh interpreter: this test session has already imported everything
+    code = ("import sys, main; "
+            "print(','.join(name for name in ('pandas', 'sklearn.model_selection', 'app.ml.training') "
+            "if name in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=Path(__file__).resolve().parents[1])
+
+    assert result.stdout.strip() == ""
@@ -0,0 +1,69 @@
+"""
+Background training jobs, end to end through the worker process
+"""
+import time
+
+from app.ml.jobs import training_jobs
+from app.ml.model import predictor
+
+# Order in which a full training job reports its phases
+FULL_TRAINING_PHASES = ["queued", "starting", "loading", "encoding", "splitting", "fitting", "evaluating",
+                        "distilling", "indexing", "profiling", "saving", "completed"]
+
+
+def _follow(client, job_id: str, timeout: float = 120) -> tuple:
+    """Poll a job until it finishes; returns its final record and every phase seen on the way"""
+    phases = []
+    deadline = time.time() + timeout
+    while True:
+        job = client.get(f"/api/v1/train/jobs/{job_id}").json()
+        if not phases or phases[-1] != job["phase"]:
+            phases.append(job["phase"])
+        if job["status"] in ("completed", "failed"):
+            return job, phases
+        assert time.time() < deadline, f"job {job_id} still {job['status']} in phase {job['phase']}"
+        time.sleep(0.01)
+
+
+def test_training_job_runs_through_its_phases_and_swaps_the_model(client, trained_model, restore_served_model):
+    response = client.post("/api/v1/train/")
+
+    assert response.status_code == 202
+    submitted = response.json()["job"]
+    assert (submitted["status"], submitted["phase"]) == ("queued", "queued")
+
+    job, phases = _follow(client, submitted["job_id"])
+
+    assert job["status"] == "completed", job["error"]
+    assert job["error"] is None
+    assert phases[-1] == "completed"
+    # Polling may miss short phases, but never sees them out of order
+    assert [FULL_TRAINING_PHASES.index(phase) for phase in phases] == \
+        sorted(FULL_TRAINING_PHASES.index(phase) for phase in phases)
+    assert {"fitting", "evaluating", "saving"} <= set(job["timings"])
+    assert job["metrics"]["test_accuracy"] > 0.5
+
+    # The completion callback runs right after the record is written
+    deadline = time.time() + 10
+    while predictor.bundle.version != job["model_version"]:
+        assert time.time() < deadline, "completed job's model was never loaded"
+        time.sleep(0.01)
+    assert job["model_version"] != trained_model
+    assert predictor.registry.active_version() == job["model_version"]
+
+
+def test_failed_job_records_its_error(client, trained_model, tmp_path):
+    broken = tmp_path / "broken.csv"
+    broken.write_text("not,a,dataset\n1,2,3\n")
+    served = predictor.bundle.version
+
+    job_id = training_jobs.submit(str(broken))['job_id']
+    job, phases = _follow(client, job_id)
+
+    assert job["status"] == "failed"
+    assert job["error"]
+    assert job["phase"] not in ("queued", "completed")
+    assert job["finished_at"] is not None
+    assert job["model_version"] is None
+    assert predictor.bundle.version == served
+    assert predictor.registry.active_version() == served
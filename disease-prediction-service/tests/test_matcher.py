@@ -0,0 +1,68 @@
+"""
+Free-text symptom matching
+"""
+import pytest
+
+from app.ml.matcher import SYNONYMS, SymptomMatcher
+
+SYMPTOMS = ["headache", "fever", "shortness of breath", "sharp chest pain", "Back pain", "back-pain", "cough"]
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return SymptomMatcher(SYMPTOMS, SYNONYMS)
+
+
+def _best(matcher, text):
+    match = matcher.match(text, 1)[0]
+    return match['symptom'], match['match']
+
+
+@pytest.mark.parametrize("text", ["head ache", "Head-Ache", "  HEADACHE "])
+def test_spacing_case_and_punctuation_are_ignored(matcher, text):
+    assert matcher.match(text) == [{'index': 0, 'symptom': "headache", 'confidence': 1.0, 'match': 'exact'}]
+
+
+@pytest.mark.parametrize("text, symptom", [
+    ("feverr", "fever"),
+    ("shortnes of breth", "shortness of breath"),
+    ("sharp chest pian", "sharp chest pain"),
+    ("cuogh", "cough"),
+])
+def test_misspellings_match_fuzzily(matcher, text, symptom):
+    match = matcher.match(text, 1)[0]
+
+    assert (match['symptom'], match['match']) == (symptom, 'fuzzy')
+    assert 0.6 <= match['confidence'] < 1.0
+
+
+def test_synonyms_are_labelled_as_synonyms(matcher):
+    exact = matcher.match("pyrexia", 1)[0]
+    misspelled = matcher.match("pyrexya", 1)[0]
+
+    assert (exact['symptom'], exact['match'], exact['confidence']) == ("fever", 'synonym', 1.0)
+    assert (misspelled['symptom'], misspelled['match']) == ("fever", 'synonym')
+    assert misspelled['confidence'] < 1.0
+    assert _best(matcher, "trouble breathing") == ("shortness of breath", 'synonym')
+
+
+def test_colliding_column_names_both_stay_reachable(matcher):
+    matches = matcher.match("back pain")
+
+    assert sorted(match['index'] for match in matches) == [4, 5]
+    assert {match['match'] for match in matches} == {'exact'}
+    # A synonym for them reaches every column
+    assert sorted(match['index'] for match in matcher.match("backache")) == [4, 5]
+
+
+def test_synonyms_for_unknown_symptoms_are_ignored(matcher):
+    # "tummy ache" means "sharp abdominal pain", which this model lacks
+    assert "tummy ache" in SYNONYMS
+    assert all(match['confidence'] < 1.0 for match in matcher.match("tummy ache"))
+
+
+def test_search_lists_prefix_matches_first(matcher):
+    results = matcher.search("sh", limit=3)
+
+    assert {result['symptom'] for result in results[:2]} == {"shortness of breath", "sharp chest pain"}
+    assert {result['match'] for result in results[:2]} == {'prefix'}
@@ -0,0 +1,91 @@
+"""
+Prometheus exposition of /metrics
+"""
+import re
+
+import pytest
+
+
+def _sample(text: str, name: str, labels: str = "") -> float:
+    """Value of one sample line, 0 when the series does not exist yet"""
+    pattern = "^" + re.escape(name + (f"{{{labels}}}" if labels else "")) + r" (\S+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_metrics_use_the_text_exposition_format(client):
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_requests_total counter" in response.text
+    assert "# TYPE prediction_stage_seconds histogram" in response.text
+    assert _sample(response.text, "model_loaded") == 1
+
+
+def test_prediction_counters_follow_requests(client, disease_symptoms):
+    before = client.get("/metrics").text
+
+    client.post("/predict/", json={"symptoms": disease_symptoms[3][:2] + ["not a symptom at all"]})
+    client.post("/predict/", json={"symptoms": ["not a symptom at all"]})
+    after = client.get("/metrics").text
+
+    for name, labels, increase in [
+        ("predictions_total", 'outcome="predicted"', 1),
+        ("predictions_total", 'outcome="rejected"', 1),
+        ("http_requests_total", 'method="POST",route="/predict/",status="200"', 1),
+        ("http_requests_total", 'method="POST",route="/predict/",status="400"', 1),
+    ]:
+        assert _sample(after, name, labels) - _sample(before, name, labels) == increase, (name, labels)
+
+
+@pytest.mark.parametrize("name", ["disease 1", "dis", "predict", "profile"])
+def test_routes_are_labelled_by_template(client, name):
+    client.get(f"/predict/diseases/{name}/profile")
+
+    routes = set(re.findall(r'route="([^"]*)"', client.get("/metrics").text))
+
+    assert "/predict/diseases/{name}/profile" in routes
+    assert not [route for route in routes if "{name}" in route and route != "/predict/diseases/{name}/profile"]
+
+
+def test_prefixed_routes_keep_their_prefix(client):
+    client.get("/api/v1/train/jobs/train")
+
+    routes = set(re.findall(r'route="([^"]*)"', client.get("/metrics").text))
+
+    assert "/api/v1/train/jobs/{job_id}" in routes
+
+
+def test_unrouted_paths_share_one_label(client):
+    client.get("/no/such/path/12345")
+
+    text = client.get("/metrics").text
+
+    assert 'route="unmatched"' in text
+    assert "12345" not in text
+
+
+def test_process_workers_report_their_counters(client, disease_symptoms, monkeypatch):
+    from app.api.routes import prediction
+    from app.ml.executor import InferenceExecutor
+    executor = InferenceExecutor(mode="process", max_workers=1)
+    monkeypatch.setattr(prediction, "inference_executor", executor)
+    symptoms = disease_symptoms[4][:3]
+    before_metrics = client.get("/metrics").text
+    before_cache = client.get("/predict/stats").json()["cache"]
+
+    try:
+        for _ in range(2):
+            assert client.post("/predict/", json={"symptoms": symptoms}).status_code == 200
+        after_metrics = client.get("/metrics").text
+        after_cache = client.get("/predict/stats").json()["cache"]
+    finally:
+        executor.shutdown()
+
+    assert _sample(after_metrics, "predictions_total", 'outcome="predicted"') - \
+        _sample(before_metrics, "predictions_total", 'outcome="predicted"') == 2
+    assert _sample(after_metrics, "prediction_rows_total", 'source="cache"') - \
+        _sample(before_metrics, "prediction_rows_total", 'source="cache"') == 1
+    assert after_cache["hits"] - before_cache["hits"] == 1
+    assert after_cache["size"] is None
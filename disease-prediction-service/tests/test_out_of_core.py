@@ -0,0 +1,74 @@
+"""
+Out-of-core training on stratified shards
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app.core.config import settings
+from app.ml import training
+from app.ml.model import DiseasePredictor
+from app.ml.registry import ModelRegistry
+from app.ml.training import stratified_shards
+from conftest import N_DISEASES, write_dataset
+
+
+def test_shards_hold_every_class_and_every_row_once():
+    labels = np.random.default_rng(0).integers(0, 5, 1000)
+
+    shards = stratified_shards(labels, 7, random_state=1)
+
+    assert len(shards) == 7
+    for shard in shards:
+        assert set(labels[shard]) == set(range(5))
+    np.testing.assert_array_equal(np.sort(np.concatenate(shards)), np.arange(len(labels)))
+    # Round-robin dealing keeps shard sizes within one row per class
+    sizes = [len(shard) for shard in shards]
+    assert max(sizes) - min(sizes) <= 5
+
+
+def test_rare_classes_are_repeated_into_every_shard():
+    # Class 3 has two rows for four shards
+    labels = np.array([0] * 40 + [1] * 40 + [2] * 40 + [3] * 2)
+
+    shards = stratified_shards(labels, 4, random_state=0)
+
+    for shard in shards:
+        assert set(labels[shard]) == {0, 1, 2, 3}
+    rows, uses = np.unique(np.concatenate(shards), return_counts=True)
+    np.testing.assert_array_equal(rows, np.arange(len(labels)))
+    assert set(labels[rows[uses > 1]]) == {3}
+
+
+@pytest.fixture
+def dataset_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DATASET_CACHE_PATH", str(tmp_path / "cache"))
+    monkeypatch.setattr(settings, "DISTILL_STUDENT", False)
+    path = tmp_path / "dataset.csv"
+    write_dataset(str(path), rows=2000, seed=4)
+    return str(path)
+
+
+def test_sharded_fit_is_about_as_accurate_as_the_in_memory_fit(dataset_path, tmp_path, monkeypatch):
+    in_memory = DiseasePredictor(ModelRegistry(str(tmp_path / "in_memory"))).train(dataset_path)
+
+    monkeypatch.setattr(settings, "TRAINING_MODE", "out_of_core")
+    fits = []
+    fit = RandomForestClassifier.fit
+
+    def recording_fit(self, X, y, *args, **kwargs):
+        fits.append(len(y))
+        return fit(self, X, y, *args, **kwargs)
+
+    # Four shards of the 1600 training rows
+    monkeypatch.setattr(training, "rows_per_shard", lambda n_features, budget_mb: 400)
+    monkeypatch.setattr(RandomForestClassifier, "fit", recording_fit)
+    out_of_core_predictor = DiseasePredictor(ModelRegistry(str(tmp_path / "out_of_core")))
+    out_of_core = out_of_core_predictor.train(dataset_path)
+
+    assert len(fits) == 4 and sum(fits) == 1600
+    model = out_of_core_predictor.bundle.model
+    assert len(model.estimators_) == settings.N_ESTIMATORS
+    assert list(model.classes_) == list(range(N_DISEASES))
+    assert out_of_core['n_samples'] == 2000
+    assert out_of_core['test_accuracy'] == pytest.approx(in_memory['test_accuracy'], abs=0.05)
@@ -0,0 +1,61 @@
+"""
+Disease profiles served by /predict/diseases/{name}/profile
+"""
+import pandas as pd
+import pytest
+
+from app.core.config import settings
+
+
+@pytest.fixture(scope="module")
+def frame(disease_symptoms):
+    return pd.read_csv(settings.DATA_FILE)
+
+
+@pytest.mark.parametrize("disease", ["disease 0", "disease 3"])
+def test_prevalence_and_lift_match_a_groupby(client, frame, disease):
+    prevalence = frame.groupby("diseases").mean().loc[disease]
+    overall = frame.drop(columns="diseases").mean()
+
+    response = client.get(f"/predict/diseases/{disease}/profile")
+
+    assert response.status_code == 200
+    profile = response.json()
+    assert profile["n_rows"] == (frame["diseases"] == disease).sum()
+    assert profile["share"] == pytest.approx((frame["diseases"] == disease).mean())
+    assert profile["n_symptoms_seen"] == (prevalence > 0).sum()
+
+    top = profile["top_symptoms"]
+    assert len(top) == settings.PROFILE_TOP_K
+    assert [symptom["prevalence"] for symptom in top] == sorted((symptom["prevalence"] for symptom in top),
+                                                                reverse=True)
+    # Ties at the cut-off may pick either symptom, but never a less prevalent one
+    assert top[-1]["prevalence"] == pytest.approx(prevalence.nlargest(settings.PROFILE_TOP_K).iloc[-1])
+    for symptom in top:
+        name = symptom["symptom"]
+        assert symptom["prevalence"] == pytest.approx(prevalence[name])
+        assert symptom["lift"] == pytest.approx(prevalence[name] / overall[name], rel=1e-5)
+        assert symptom["importance"] is not None
+
+
+@pytest.mark.parametrize("name", ["DISEASE 2", "Disease 2", "  disease 2 "])
+def test_disease_lookup_is_case_insensitive(client, name):
+    response = client.get(f"/predict/diseases/{name}/profile")
+
+    assert response.status_code == 200
+    assert response.json()["disease"] == "disease 2"
+
+
+def test_unknown_disease_is_not_found(client):
+    response = client.get("/predict/diseases/no such disease/profile")
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Disease not found: no such disease"
+
+
+def test_top_k_truncates_the_characteristic_symptoms(client):
+    full = client.get("/predict/diseases/disease 1/profile").json()["top_symptoms"]
+    truncated = client.get("/predict/diseases/disease 1/profile", params={"top_k": 3}).json()["top_symptoms"]
+
+    assert truncated == full[:3]
+    assert client.get("/predict/diseases/disease 1/profile", params={"top_k": 0}).status_code == 422
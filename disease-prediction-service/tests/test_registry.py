@@ -0,0 +1,143 @@
+"""
+Model registry: loading, publishing, activation and pruning
+"""
+import shutil
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from app.core.config import settings
+from app.ml.model import DiseasePredictor
+from app.ml.registry import ModelRegistry, VersionPrunedError
+
+
+@pytest.fixture
+def legacy_artifacts(tmp_path, monkeypatch):
+    """Baseline flat artifact files, with the forest fitted on a DataFrame"""
+    symptoms = [f"symptom {column}" for column in range(12)]
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame((rng.random((200, len(symptoms))) < 0.3).astype(int), columns=symptoms)
+    encoder = LabelEncoder().fit(["flu", "cold", "migraine"])
+    y = encoder.transform(rng.choice(encoder.classes_, size=len(X)))
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+
+    paths = {name: str(tmp_path / f"{name}.pkl") for name in ("model", "encoder", "symptom_index")}
+    joblib.dump(model, paths["model"])
+    joblib.dump(encoder, paths["encoder"])
+    joblib.dump({symptom: column for column, symptom in enumerate(symptoms)}, paths["symptom_index"])
+    monkeypatch.setattr(settings, "MODEL_PATH", paths["model"])
+    monkeypatch.setattr(settings, "ENCODER_PATH", paths["encoder"])
+    monkeypatch.setattr(settings, "SYMPTOM_INDEX_PATH", paths["symptom_index"])
+    return symptoms
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path / "registry"))
+
+
+@pytest.fixture
+def bundle(trained_model):
+    """The trained bundle, still holding its fitted estimator"""
+    from app.ml.model import predictor
+    return predictor.bundle
+
+
+def test_publish_numbers_and_activates_versions(registry, bundle):
+    assert registry.publish(bundle) == "v0001"
+    assert registry.publish(bundle, activate=False) == "v0002"
+
+    assert registry.versions() == ["v0001", "v0002"]
+    assert registry.active_version() == "v0001"
+    assert [entry['active'] for entry in registry.list_versions()] == [False, True]
+
+
+def test_published_version_predicts_like_the_trained_model(registry, bundle, disease_symptoms):
+    version = registry.publish(bundle)
+    loaded = registry.load(version)
+
+    rows = [[bundle.symptom_index[name] for name in symptoms[:3]] for symptoms in disease_symptoms]
+    predictor = DiseasePredictor(registry)
+    expected = predictor._predict_proba_indices(bundle, rows, count=False)
+    np.testing.assert_allclose(predictor._predict_proba_indices(loaded, rows, count=False), expected)
+
+
+def test_rollback_restores_the_previous_version(registry, bundle):
+    first = registry.publish(bundle)
+    registry.publish(bundle)
+
+    assert registry.rollback() == first
+    assert registry.active_version() == first
+    with pytest.raises(ValueError, match="No previous model version"):
+        registry.rollback()
+
+
+def test_prune_keeps_active_previous_and_pinned_versions(registry, bundle, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_REGISTRY_KEEP", 100)
+    for _ in range(5):
+        registry.publish(bundle, activate=False)
+    registry.activate("v0002")
+    registry.activate("v0001")
+    registry.pin("v0003")
+
+    registry.prune(keep=1)
+
+    # v0001 active, v0002 the rollback target, v0003 pinned, v0005 newest
+    assert registry.versions() == ["v0001", "v0002", "v0003", "v0005"]
+    registry.unpin("v0003")
+    registry.prune(keep=1)
+    assert registry.versions() == ["v0001", "v0002", "v0005"]
+
+
+def test_rollback_to_a_pruned_version_is_reported(registry, bundle, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_REGISTRY_KEEP", 100)
+    for _ in range(3):
+        registry.publish(bundle)
+    registry.prune(keep=1)
+
+    with pytest.raises(VersionPrunedError, match="v0001 was pruned"):
+        registry.rollback("v0001")
+    with pytest.raises(ValueError, match="Unknown model version") as excinfo:
+        registry.rollback("v0042")
+    assert not isinstance(excinfo.value, VersionPrunedError)
+    assert registry.rollback() == "v0002"
+
+
+
+def test_versions_past_v9999_sort_numerically(registry, bundle):
+    registry.publish(bundle, activate=False)
+    registry.publish(bundle, activate=False)
+    registry.path("v0001").rename(registry.path("v9999"))
+    registry.path("v0002").rename(registry.path("v10000"))
+    shutil.copytree(registry.path("v9999"), registry.path("vnext"))
+
+    assert registry.versions() == ["v9999", "v10000"]
+    assert registry.publish(bundle, activate=False) == "v10001"
+    with pytest.raises(VersionPrunedError):
+        registry.rollback("v0042")
+    with pytest.raises(ValueError, match="Unknown model version") as excinfo:
+        registry.rollback("vnext")
+    assert not isinstance(excinfo.value, VersionPrunedError)
+
+def test_version_without_manifest_is_refused(registry, bundle):
+    version = registry.publish(bundle)
+    (registry.path(version) / ModelRegistry.MANIFEST_FILE).unlink()
+
+    with pytest.raises(ValueError, match="has no manifest.json"):
+        registry.load(version)
+
+
+def test_legacy_model_predicts_without_feature_name_warnings(tmp_path, legacy_artifacts):
+    predictor = DiseasePredictor(ModelRegistry(str(tmp_path / "registry")))
+    assert predictor.load_model()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        result = predictor.predict([legacy_artifacts[0], legacy_artifacts[3]])
+
+    assert result['disease'] in ("flu", "cold", "migraine")
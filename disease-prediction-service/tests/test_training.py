@@ -0,0 +1,106 @@
+"""
+Dataset loading and the binary dataset cache
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.config import settings
+from app.ml.model import DiseasePredictor
+from app.ml.training import load_encoded_dataset
+from conftest import N_DISEASES, write_dataset
+
+
+def _entries(cache):
+    return sorted(entry for entry in os.listdir(cache) if not entry.startswith("."))
+
+
+def test_cache_hit_matches_the_parsed_csv(tmp_path, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "DATASET_CACHE_PATH", str(tmp_path / "cache"))
+    write_dataset(str(tmp_path / "dataset.csv"), rows=200)
+
+    parsed = load_encoded_dataset(str(tmp_path / "dataset.csv"))
+    cached = load_encoded_dataset(str(tmp_path / "dataset.csv"))
+
+    assert isinstance(cached.features, np.memmap)
+    np.testing.assert_array_equal(cached.features, parsed.features)
+    np.testing.assert_array_equal(cached.labels, parsed.labels)
+    assert cached.symptoms == parsed.symptoms
+
+
+def test_same_file_name_in_two_directories_keeps_both_caches(tmp_path, monkeypatch):
+    from app.core.config import settings
+    cache = tmp_path / "cache"
+    monkeypatch.setattr(settings, "DATASET_CACHE_PATH", str(cache))
+    first, second = tmp_path / "a" / "dataset.csv", tmp_path / "b" / "dataset.csv"
+    write_dataset(str(first), rows=200, seed=1)
+    write_dataset(str(second), rows=300, seed=2)
+
+    load_encoded_dataset(str(first))
+    load_encoded_dataset(str(second))
+    assert len(_entries(cache)) == 2
+    assert load_encoded_dataset(str(first)).n_rows == 200
+
+    # Rewriting one file replaces only its own entry
+    write_dataset(str(first), rows=250, seed=3)
+    assert load_encoded_dataset(str(first)).n_rows == 250
+    assert len(_entries(cache)) == 2
+    assert load_encoded_dataset(str(second)).n_rows == 300
+
+
+@pytest.fixture
+def incremental(tmp_path, trained_model):
+    """A predictor of its own serving a copy of the trained model, plus a CSV of new rows"""
+    from app.ml.model import predictor
+    from app.ml.registry import ModelRegistry
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    base_version = registry.publish(predictor.bundle)
+    new_rows = tmp_path / "new_cases.csv"
+    write_dataset(str(new_rows), rows=200, seed=5)
+    return DiseasePredictor(registry), base_version, str(new_rows)
+
+
+def test_increment_adds_and_retires_trees(incremental):
+    incremental_predictor, base_version, new_rows = incremental
+    n_before = incremental_predictor.registry.read_metadata(base_version)['n_estimators']
+
+    metrics = incremental_predictor.train_increment(new_rows, n_estimators=4, retire_oldest=3, replay_rows=0)
+
+    model = incremental_predictor.bundle.model
+    assert len(model.estimators_) == model.n_estimators == n_before + 4 - 3
+    assert (metrics['trees_added'], metrics['trees_retired']) == (4, 3)
+    assert incremental_predictor.bundle.metadata['base_version'] == base_version
+
+
+def test_increment_mixes_in_a_stratified_replay(incremental):
+    incremental_predictor, _, new_rows = incremental
+
+    metrics = incremental_predictor.train_increment(new_rows, n_estimators=2, replay_rows=300)
+
+    new_train_rows = 200 - int(np.ceil(200 * settings.TEST_SIZE))
+    replayed = metrics['n_samples'] - new_train_rows
+    assert 290 <= replayed <= 310
+    assert list(incremental_predictor.bundle.model.classes_) == list(range(N_DISEASES))
+
+
+def test_increment_rejects_mismatched_columns(incremental, tmp_path):
+    incremental_predictor, _, new_rows = incremental
+    frame = pd.read_csv(new_rows).drop(columns=["symptom 3"])
+    frame.to_csv(tmp_path / "fewer_columns.csv", index=False)
+
+    with pytest.raises(ValueError, match="do not match the model"):
+        incremental_predictor.train_increment(str(tmp_path / "fewer_columns.csv"), n_estimators=2)
+
+
+def test_increment_is_published_as_a_new_version(incremental):
+    incremental_predictor, base_version, new_rows = incremental
+
+    incremental_predictor.train_increment(new_rows, n_estimators=2, replay_rows=0)
+    version = incremental_predictor.save_model()['version']
+
+    assert version != base_version
+    assert incremental_predictor.registry.active_version() == version
+    assert incremental_predictor.registry.read_metadata(version)['base_version'] == base_version
@@ -0,0 +1,210 @@
+"""
+HTTP contract of the model management endpoints
+"""
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from app.core.config import settings
+from app.ml.model import predictor
+from app.ml.registry import VersionPrunedError
+from conftest import write_dataset
+
+
+def test_rollback_to_an_unknown_version_is_not_found(client, trained_model):
+    response = client.post("/api/v1/train/rollback", params={"version": "v0042"})
+
+    assert response.status_code == 404
+    assert predictor.registry.active_version() == trained_model
+
+
+def test_rollback_to_a_pruned_version_is_gone(client, monkeypatch):
+    def pruned(version=None):
+        raise VersionPrunedError("v0001")
+
+    monkeypatch.setattr(predictor.registry, "rollback", pruned)
+    response = client.post("/api/v1/train/rollback", params={"version": "v0001"})
+
+    assert response.status_code == 410
+    assert "v0001 was pruned" in response.json()["detail"]
+
+
+def test_unknown_training_job_is_not_found(client):
+    assert client.get("/api/v1/train/jobs").status_code == 200
+    assert client.get("/api/v1/train/jobs/not-a-job").status_code == 404
+
+
+def test_jobs_submitted_through_another_worker_are_reported(client, monkeypatch):
+    from app.ml.jobs import JobStore, training_jobs
+    monkeypatch.setattr(settings, "WORKERS", 4)
+    job_id = "0123456789abcdef0123456789abcdef"
+    # Another API worker's registry writes to the same directory
+    JobStore(str(training_jobs.store.root)).write({
+        'job_id': job_id, 'kind': 'full', 'status': 'running', 'phase': 'fitting',
+        'submitted_at': time.time() - 5, 'started_at': time.time() - 4, 'finished_at': None,
+        'metrics': None, 'timings': None, 'model_path': None, 'model_version': None,
+        'activate': True, 'error': None,
+    })
+
+    response = client.get(f"/api/v1/train/jobs/{job_id}")
+
+    assert response.status_code == 200
+    assert (response.json()["status"], response.json()["phase"]) == ("running", "fitting")
+    assert job_id in [job["job_id"] for job in client.get("/api/v1/train/jobs").json()]
+    training_jobs.store.delete(job_id)
+
+
+@pytest.mark.parametrize("backend, starts", [("sklearn", False), ("compiled", True)])
+def test_several_workers_require_the_compiled_backend(monkeypatch, backend, starts):
+    from main import check_worker_settings
+    monkeypatch.setattr(settings, "WORKERS", 4)
+    monkeypatch.setattr(settings, "INFERENCE_BACKEND", backend)
+
+    if starts:
+        check_worker_settings()
+    else:
+        with pytest.raises(RuntimeError, match="WORKERS=4 requires INFERENCE_BACKEND=compiled"):
+            check_worker_settings()
+
+
+@pytest.mark.parametrize("dataset_path", [
+    "/etc/passwd",
+    os.path.join(settings.RAW_DATA_PATH, "..", "models", "dataset.csv"),
+    os.path.join(settings.RAW_DATA_PATH, "notes.txt"),
+])
+def test_increment_datasets_must_be_csv_files_in_the_data_directories(client, trained_model, dataset_path):
+    response = client.post("/api/v1/train/increment", json={"dataset_path": dataset_path})
+
+    assert response.status_code == 400
+    assert "dataset_path must be a CSV file under" in response.json()["detail"]
+
+
+def test_increment_dataset_missing_from_the_data_directories_is_not_found(client, trained_model):
+    response = client.post("/api/v1/train/increment",
+                           json={"dataset_path": os.path.join(settings.RAW_DATA_PATH, "absent.csv")})
+
+    assert response.status_code == 404
+
+
+def test_increment_dataset_with_other_columns_is_rejected_before_queueing(client, trained_model):
+    path = os.path.join(settings.RAW_DATA_PATH, "other_columns.csv")
+    write_dataset(path, rows=50, seed=3)
+    frame = pd.read_csv(path)
+    frame.drop(columns=["symptom 0"]).assign(unknown=0).to_csv(path, index=False)
+    jobs_before = len(client.get("/api/v1/train/jobs").json())
+
+    response = client.post("/api/v1/train/increment", json={"dataset_path": path})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Dataset symptoms do not match the model: 1 missing, 1 unexpected"
+    assert len(client.get("/api/v1/train/jobs").json()) == jobs_before
+
+
+def test_shadow_lifecycle(client, trained_model, disease_symptoms):
+    from app.ml.shadow import shadow_evaluator
+    candidate = predictor.registry.publish(predictor.bundle, activate=False)
+
+    loaded = client.post("/api/v1/train/shadow", params={"version": candidate})
+    assert loaded.status_code == 200
+    assert loaded.json()["shadow_version"] == candidate
+    assert client.post("/api/v1/train/shadow", params={"version": trained_model}).status_code == 409
+
+    shadow_evaluator.sample_rate = 1.0
+    try:
+        for symptoms in disease_symptoms:
+            assert client.post("/predict/", json={"symptoms": symptoms[:2]}).status_code == 200
+    finally:
+        shadow_evaluator.sample_rate = settings.SHADOW_SAMPLE_RATE
+    deadline = time.time() + 10
+    while shadow_evaluator.report()['pending'] and time.time() < deadline:
+        time.sleep(0.01)
+
+    report = client.get("/api/v1/train/shadow").json()
+    assert report["shadow_version"] == candidate
+    assert report["serving_version"] == trained_model
+    assert report["compared"] >= len(disease_symptoms) - 1
+    # Same forest under a new version number: every comparison agrees
+    assert report["agreement_rate"] == 1.0
+
+    assert client.delete("/api/v1/train/shadow").status_code == 200
+    assert client.delete("/api/v1/train/shadow").status_code == 404
+    assert predictor.registry.active_version() == trained_model
+
+
+@pytest.fixture
+def shadowed(client, trained_model, disease_symptoms, monkeypatch):
+    """A copy of the served model loaded as shadow, compared on every disease, with lenient thresholds"""
+    from app.ml.shadow import shadow_evaluator
+    monkeypatch.setattr(settings, "SHADOW_MIN_SAMPLES", len(disease_symptoms) - 1)
+    monkeypatch.setattr(settings, "SHADOW_MAX_LATENCY_RATIO", 1000.0)
+    monkeypatch.setattr(shadow_evaluator, "sample_rate", 1.0)
+    candidate = predictor.registry.publish(predictor.bundle, activate=False)
+    assert client.post("/api/v1/train/shadow", params={"version": candidate}).status_code == 200
+    for symptoms in disease_symptoms:
+        assert client.post("/predict/", json={"symptoms": symptoms[:2]}).status_code == 200
+    deadline = time.time() + 10
+    while shadow_evaluator.report()['pending'] and time.time() < deadline:
+        time.sleep(0.01)
+    yield candidate
+    shadow_evaluator.unload()
+
+
+def test_promotion_below_the_thresholds_is_refused_with_reasons(client, shadowed, monkeypatch, trained_model):
+    monkeypatch.setattr(settings, "SHADOW_MIN_SAMPLES", 10_000)
+    monkeypatch.setattr(settings, "SHADOW_MIN_AGREEMENT", 1.5)
+
+    few = client.post("/api/v1/train/shadow/promote")
+    monkeypatch.setattr(settings, "SHADOW_MIN_SAMPLES", 1)
+    disagreeing = client.post("/api/v1/train/shadow/promote")
+
+    assert few.status_code == 409
+    assert "comparisons collected" in few.json()["detail"]
+    assert disagreeing.status_code == 409
+    assert f"Model version {shadowed} is not safe to promote: Top-1 agreement 1.000 is below 1.5" == \
+        disagreeing.json()["detail"]
+    assert predictor.bundle.version == trained_model
+    assert client.get("/api/v1/train/shadow").json()["shadow_version"] == shadowed
+
+
+def test_forced_promotion_ignores_the_thresholds(client, shadowed, monkeypatch, restore_served_model):
+    monkeypatch.setattr(settings, "SHADOW_MIN_AGREEMENT", 1.5)
+
+    response = client.post("/api/v1/train/shadow/promote", params={"force": True})
+
+    assert response.status_code == 200
+    assert response.json()["shadow_report"]["safe_to_promote"] is False
+    assert predictor.bundle.version == shadowed
+
+
+def test_promotion_activates_the_shadow_and_unloads_it(client, shadowed, restore_served_model, trained_model):
+    from app.ml.shadow import shadow_evaluator
+
+    response = client.post("/api/v1/train/shadow/promote")
+
+    assert response.status_code == 200
+    assert response.json()["model_info"]["model_version"] == shadowed
+    assert predictor.bundle.version == shadowed
+    assert predictor.registry.active_version() == shadowed
+    assert shadow_evaluator.bundle is None
+    assert shadowed not in predictor.registry._pinned
+    assert client.get("/api/v1/train/shadow").json()["shadow_version"] is None
+    assert client.post("/api/v1/train/shadow/promote").status_code == 404
+
+
+@pytest.mark.parametrize("method, path", [
+    ("get", "/api/v1/train/shadow"),
+    ("post", "/api/v1/train/shadow"),
+    ("delete", "/api/v1/train/shadow"),
+    ("post", "/api/v1/train/shadow/promote"),
+    ("get", "/predict/drift"),
+    ("post", "/predict/drift/reset"),
+])
+def test_per_worker_endpoints_are_refused_with_several_workers(client, monkeypatch, method, path):
+    monkeypatch.setattr(settings, "WORKERS", 4)
+
+    response = getattr(client, method)(path)
+
+    assert response.status_code == 501
+    assert "WORKERS=4" in response.json()["detail"]
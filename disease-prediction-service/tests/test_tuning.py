@@ -0,0 +1,48 @@
+"""
+Serving measurements of tuning candidates
+"""
+import pytest
+
+from app.core.config import settings
+from app.ml.tuning import _fit_and_publish, measure_serving, select_candidate
+from conftest import write_dataset
+
+PARAMS = {'n_estimators': 5, 'max_depth': None, 'min_samples_leaf': 1, 'max_features': 'sqrt'}
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DATASET_CACHE_PATH", str(tmp_path / "cache"))
+    monkeypatch.setattr(settings, "DISTILL_ROWS", 300)
+    path = tmp_path / "dataset.csv"
+    profiles = write_dataset(str(path), rows=400)
+    return str(path), [[f"symptom {column}" for column in row[:3]] for row in profiles]
+
+
+@pytest.mark.parametrize("student_enabled", [True, False])
+def test_measure_serving_times_the_configured_path(tmp_path, monkeypatch, data_file, student_enabled):
+    monkeypatch.setattr(settings, "STUDENT_ENABLED", student_enabled)
+    path, symptom_sets = data_file
+    registry_root = str(tmp_path / "candidate")
+    _fit_and_publish(PARAMS, path, 400, 0, registry_root)
+
+    result = measure_serving(registry_root, symptom_sets, repeats=20)
+
+    if student_enabled:
+        assert result['serving_backend'] == f"student+{settings.INFERENCE_BACKEND}"
+        assert result['student_answer_rate'] > 0
+    else:
+        assert result['serving_backend'] == settings.INFERENCE_BACKEND
+        assert result['student_answer_rate'] == 0.0
+    assert result['single_p95_ms'] >= result['single_p50_ms'] > 0
+
+
+def test_select_candidate_respects_budgets():
+    results = [
+        {'cv_accuracy': 0.95, 'single_p50_ms': 1.0, 'single_p95_ms': 3.0, 'model_memory_mb': 50},
+        {'cv_accuracy': 0.93, 'single_p50_ms': 0.2, 'single_p95_ms': 0.5, 'model_memory_mb': 10},
+    ]
+
+    assert select_candidate(results) is results[0]
+    assert select_candidate(results, latency_budget_ms=1.0) is results[1]
+    assert select_candidate(results, memory_budget_mb=5) is None
@@ -3,6 +3,7 @@ Training script for Disease Prediction Model
 Run this script to train the Random Forest model
 """
 import sys
+import time
 import logging
 from pathlib import Path
 
@@ -10,7 +11,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from app.ml.model import predictor
-from app.core.config import settings
+from app.core.config import settings, ensure_directories
 
 # Setup logging
 logging.basicConfig(
@@ -22,6 +23,8 @@ logger = logging.getLogger(__name__)
 
 def main():
     """Main training function"""
+    ensure_directories()
+    
     logger.info("=" * 80)
     logger.info("Disease Prediction Model Training")
     logger.info("=" * 80)
@@ -57,7 +60,10 @@ def main():
         logger.info(f"  Number of symptoms: {metrics['n_symptoms']}")
         
         logger.info(f"\nModel Performance:")
-        logger.info(f"  Train Accuracy: {metrics['train_accuracy']*100:.2f}%")
+        if 'train_accuracy' in metrics:
+            logger.info(f"  Train Accuracy: {metrics['train_accuracy']*100:.2f}%")
+        if 'oob_accuracy' in metrics:
+            logger.info(f"  OOB Accuracy:   {metrics['oob_accuracy']*100:.2f}%")
         logger.info(f"  Test Accuracy:  {metrics['test_accuracy']*100:.2f}%")
         logger.info(f"  Precision:      {metrics['precision']*100:.2f}%")
         logger.info(f"  Recall:         {metrics['recall']*100:.2f}%")
@@ -68,12 +74,18 @@ def main():
         logger.info("Saving Model...")
         logger.info("=" * 80 + "\n")
         
+        save_started = time.perf_counter()
         saved_paths = predictor.save_model()
+        timings = {**predictor.bundle.metadata.get('timings', {}), 'saving': time.perf_counter() - save_started}
         
         logger.info("Model saved to:")
         for key, path in saved_paths.items():
             logger.info(f"  {key}: {path}")
         
+        logger.info(f"\nPhase timings:")
+        for phase, seconds in timings.items():
+            logger.info(f"  {phase}: {seconds:.2f}s")
+        
         logger.info("\n" + "=" * 80)
         logger.info("Training Completed Successfully!")
         logger.info("=" * 80)
@@ -0,0 +1,121 @@
+"""
+Hyperparameter tuning script for Disease Prediction Model
+Searches forest size and tree shape, scoring each candidate on accuracy
+and on what it costs to serve, then picks the best one within a budget
+"""
+import argparse
+import json
+import sys
+import logging
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.ml.tuning import tune
+from app.core.config import settings
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_values(text: str, cast):
+    """Parse a comma separated list, "none" meaning unset"""
+    return [None if value.strip().lower() == "none" else cast(value.strip()) for value in text.split(",")]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n-estimators", default="20,50,100", help="Forest sizes to try")
+    parser.add_argument("--max-depth", default="none,20,40", help="Depth limits to try, none for unbounded")
+    parser.add_argument("--min-samples-leaf", default="1,2", help="Minimum samples per leaf to try")
+    parser.add_argument("--max-features", default="sqrt", help="max_features values to try (sqrt, log2, int, float)")
+    parser.add_argument("--folds", type=int, default=3, help="Cross-validation folds")
+    parser.add_argument("--rows", type=int, default=settings.N_ROWS, help="Dataset rows to use")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--latency-budget-ms", type=float, default=None, help="Highest acceptable p95 latency")
+    parser.add_argument("--memory-budget-mb", type=float, default=None, help="Highest acceptable model memory")
+    parser.add_argument("--output", default="tuning_results.json", help="Where to write all results")
+    return parser.parse_args()
+
+
+def main():
+    """Main tuning function"""
+    args = parse_args()
+    space = {
+        'n_estimators': parse_values(args.n_estimators, int),
+        'max_depth': parse_values(args.max_depth, int),
+        'min_samples_leaf': parse_values(args.min_samples_leaf, int),
+        'max_features': parse_values(args.max_features, str),
+    }
+
+    logger.info("=" * 80)
+    logger.info("Disease Prediction Model Tuning")
+    logger.info("=" * 80)
+    logger.info(f"\nConfiguration:")
+    logger.info(f"  Data file: {settings.DATA_FILE}")
+    logger.info(f"  Rows: {args.rows}")
+    logger.info(f"  Folds: {args.folds}")
+    logger.info(f"  Inference backend: {settings.INFERENCE_BACKEND}"
+                f"{' behind the distilled student' if settings.DISTILL_STUDENT and settings.STUDENT_ENABLED else ''}")
+    for name, values in space.items():
+        logger.info(f"  {name}: {values}")
+
+    if not Path(settings.DATA_FILE).exists():
+        logger.error(f"\nError: Data file not found: {settings.DATA_FILE}")
+        return
+
+    try:
+        report = tune(
+            space,
+            n_rows=args.rows,
+            n_folds=args.folds,
+            workers=args.workers,
+            latency_budget_ms=args.latency_budget_ms,
+            memory_budget_mb=args.memory_budget_mb,
+        )
+    except Exception as e:
+        logger.error(f"\nTuning failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    logger.info("\n" + "=" * 80)
+    logger.info("Tuning Results")
+    logger.info("=" * 80)
+    logger.info(f"\n  {'trees':>5} {'depth':>5} {'leaf':>4} {'feat':>5} {'accuracy':>9} "
+                f"{'p50 ms':>8} {'p95 ms':>8} {'rows/s':>9} {'MB':>7} {'load ms':>8}")
+    for result in sorted(report['results'], key=lambda r: -r['cv_accuracy']):
+        params = result['params']
+        logger.info(f"  {params['n_estimators']:>5} {str(params['max_depth']):>5} {params['min_samples_leaf']:>4} "
+                    f"{str(params['max_features']):>5} {result['cv_accuracy']*100:>8.2f}% "
+                    f"{result['single_p50_ms']:>8.3f} {result['single_p95_ms']:>8.3f} "
+                    f"{result['batch_rows_per_second']:>9.0f} {result['model_memory_mb']:>7.1f} "
+                    f"{result['load_ms']:>8.1f}")
+
+    selected = report['selected']
+    if selected is None:
+        logger.info("\nNo candidate fits the latency/memory budget.")
+        return
+
+    params = selected['params']
+    logger.info(f"\nSelected candidate ({selected['cv_accuracy']*100:.2f}% CV accuracy, "
+                f"p95 {selected['single_p95_ms']:.3f} ms, {selected['model_memory_mb']:.1f} MB).")
+    logger.info("Settings to train it with:")
+    logger.info(f"  N_ESTIMATORS={params['n_estimators']}")
+    if params['max_depth'] is not None:
+        logger.info(f"  MAX_DEPTH={params['max_depth']}")
+    logger.info(f"  MIN_SAMPLES_LEAF={params['min_samples_leaf']}")
+    logger.info(f"  MAX_FEATURES={params['max_features']}")
+    logger.info(f"\nAll results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()